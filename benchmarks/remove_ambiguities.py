@@ -0,0 +1,145 @@
+"""Benchmark of the entity linker disambiguation stage on long documents.
+
+It compares the candidate grouping and selection of EntityLinker._remove_ambiguities
+with the previous span based implementation, on synthetic documents with a growing
+number of overlapping candidate entities. Both the wall time and the allocations are
+reported: the number of Span objects created and the peak memory traced by tracemalloc.
+
+Usage, with the package installed:
+    python benchmarks/remove_ambiguities.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import spacy
+from rdflib import Graph
+from spacy.tokens import Doc, Span
+
+import buzz_el.entity_linker.entity_linker as entity_linker_module
+from buzz_el.entity_linker import EntityLinker
+from buzz_el.graph import KnowledgeGraph
+
+SENTENCE = "The New York City court heard the New York appeal of the city council. "
+# ambiguous entities, with two URIs per pattern, and unambiguous ones
+PATTERNS = [
+    {"label": "KG_ENT", "pattern": pattern, "id": f"uri:{pattern}#{i}"}
+    for pattern in ["new york", "york city", "new york city", "city"]
+    for i in range(2)
+] + [
+    {"label": "KG_ENT", "pattern": pattern, "id": f"uri:{pattern}"}
+    for pattern in ["court", "appeal", "council"]
+]
+
+
+def previous_remove_ambiguities(entity_linker: EntityLinker, doc: Doc) -> Doc:
+    """The span based implementation, grouping spans in Python lists."""
+    spans = doc.spans[entity_linker.entity_matcher.spans_key]
+    doc_entities = []
+    if spans.has_overlap:
+        groups: List[list] = []
+        group = []
+        group_end = 0
+        for span in spans:
+            if group and span.start < group_end:
+                group.append(span)
+                group_end = max(group_end, span.end)
+            else:
+                if group:
+                    groups.append(group)
+                group = [span]
+                group_end = span.end
+        if group:
+            groups.append(group)
+        for group in groups:
+            doc_entities.extend(entity_linker.disambiguator(group))
+    else:
+        doc_entities = spans
+    doc.set_ents(doc_entities)
+    return doc
+
+
+def count_spans(function: Callable[[], int]) -> Tuple[int, int]:
+    """Number of Span objects created, and peak traced memory in KiB, of a run.
+
+    The spans created by the entity linker are counted through its module Span name,
+    the function returns the number of spans it creates otherwise.
+    """
+    created_spans = 0
+
+    class CountingSpan(Span):
+        def __init__(self, *args, **kwargs) -> None:
+            nonlocal created_spans
+            created_spans += 1
+
+    entity_linker_module.Span = CountingSpan
+    tracemalloc.start()
+    try:
+        function_spans = function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        entity_linker_module.Span = Span
+    return created_spans + function_spans, peak_memory // 1024
+
+
+def best_time(function, repeat: int) -> float:
+    """Best wall time of several runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    nlp = spacy.blank("en")
+    kg = KnowledgeGraph(
+        kg=Graph(), entity_patterns=PATTERNS, get_entity_context=lambda uri: ""
+    )
+    entity_linker = EntityLinker(kg, nlp)
+    entity_matcher = entity_linker.entity_matcher
+    sentence_len = len(nlp.make_doc(SENTENCE))
+
+    print(
+        f"{'tokens':>9} {'candidates':>11} {'previous (s)':>13} {'array (s)':>10} "
+        f"{'previous spans':>15} {'array spans':>12} "
+        f"{'previous peak (KiB)':>20} {'array peak (KiB)':>17}"
+    )
+    for size in args.sizes:
+        doc = nlp.make_doc(SENTENCE * max(1, size // sentence_len))
+        matches = entity_matcher.match(doc)
+        entity_matcher.set_annotations(doc, matches)
+
+        def run_previous() -> int:
+            previous_remove_ambiguities(entity_linker, doc)
+            # iterating the doc span group creates a Span object per candidate
+            return len(matches)
+
+        def run_array() -> int:
+            entity_linker._remove_ambiguities(doc, matches=matches)
+            return 0
+
+        previous_time = best_time(run_previous, args.repeat)
+        array_time = best_time(run_array, args.repeat)
+        previous_spans, previous_peak = count_spans(run_previous)
+        array_spans, array_peak = count_spans(run_array)
+        print(
+            f"{len(doc):>9} {len(matches):>11} {previous_time:>13.3f} "
+            f"{array_time:>10.3f} {previous_spans:>15} {array_spans:>12} "
+            f"{previous_peak:>20} {array_peak:>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Deterministic synthetic knowledge graphs and documents for the benchmarks.
+
+Entities get labels made of pseudo-words, in one or several languages, a comment used
+as context string, and links to other entities. Documents mention entity labels among
+filler words, with optional typos to exercise the fuzzy matchers.
+
+Usage, to write a graph to a file:
+    python benchmarks/synthetic_kg.py graph.nt --entities 100000
+"""
+
+import argparse
+import random
+from typing import Dict, List, Optional, Sequence, TextIO
+
+NAMESPACE = "http://example.org/buzz-el/synthetic#"
+RDFS_LABEL = "<http://www.w3.org/2000/01/rdf-schema#label>"
+RDFS_COMMENT = "<http://www.w3.org/2000/01/rdf-schema#comment>"
+SKOS_ALT_LABEL = "<http://www.w3.org/2004/02/skos/core#altLabel>"
+RELATED_TO = f"<{NAMESPACE}relatedTo>"
+
+_SYLLABLES = [
+    consonant + vowel
+    for consonant in "bcdfghjklmnprstvz"
+    for vowel in ["a", "e", "i", "o", "u", "ou", "ai"]
+]
+
+
+class SyntheticKG:
+    """
+    A deterministic synthetic knowledge graph.
+
+    Attributes
+    ----------
+    n_entities : int
+        Number of entities.
+    labels_per_entity : int
+        Number of labels per entity and language, the first one is the rdfs:label and
+        the others skos:altLabel.
+    languages : Sequence[str]
+        The language tags of the labels.
+    label_word_weights : Sequence[float]
+        The relative frequencies of the labels of 1, 2, 3... words.
+    links_per_entity : int
+        Number of links from each entity to other entities.
+    seed : int
+        The random seed, the same parameters always give the same graph.
+    labels : Dict[str, List[List[str]]]
+        The labels of each language, per entity.
+    """
+
+    def __init__(
+        self,
+        n_entities: Optional[int] = 10000,
+        labels_per_entity: Optional[int] = 2,
+        languages: Optional[Sequence[str]] = ("en",),
+        label_word_weights: Optional[Sequence[float]] = (0.3, 0.4, 0.2, 0.1),
+        links_per_entity: Optional[int] = 3,
+        seed: Optional[int] = 0,
+    ) -> None:
+        self.n_entities = n_entities
+        self.labels_per_entity = labels_per_entity
+        self.languages = list(languages)
+        self.label_word_weights = list(label_word_weights)
+        self.links_per_entity = links_per_entity
+        self.seed = seed
+
+        rng = random.Random(seed)
+        vocabulary_size = max(1000, n_entities // 2)
+        self.words = sorted(
+            {
+                "".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4)))
+                for _ in range(vocabulary_size)
+            }
+        )
+        word_counts = range(1, len(self.label_word_weights) + 1)
+        self.labels: Dict[str, List[List[str]]] = {
+            language: [
+                [
+                    " ".join(
+                        rng.choices(
+                            self.words,
+                            k=rng.choices(word_counts, self.label_word_weights)[0],
+                        )
+                    )
+                    for _ in range(labels_per_entity)
+                ]
+                for _ in range(n_entities)
+            ]
+            for language in self.languages
+        }
+        self.links = [
+            rng.sample(range(n_entities), min(links_per_entity, n_entities))
+            for _ in range(n_entities)
+        ]
+        self.comments = [
+            " ".join(rng.choices(self.words, k=12)) for _ in range(n_entities)
+        ]
+
+    @staticmethod
+    def entity_uri(entity_id: int) -> str:
+        """Get the URI of an entity."""
+        return f"{NAMESPACE}entity{entity_id}"
+
+    def write(self, kg_file: TextIO) -> None:
+        """Write the graph as N-Triples.
+
+        Parameters
+        ----------
+        kg_file : TextIO
+            The file to write to.
+        """
+        for entity_id in range(self.n_entities):
+            subject = f"<{self.entity_uri(entity_id)}>"
+            for language in self.languages:
+                for label_id, label in enumerate(self.labels[language][entity_id]):
+                    predicate = RDFS_LABEL if label_id == 0 else SKOS_ALT_LABEL
+                    kg_file.write(f'{subject} {predicate} "{label}"@{language} .\n')
+            kg_file.write(
+                f'{subject} {RDFS_COMMENT} "{self.comments[entity_id]}"@'
+                f"{self.languages[0]} .\n"
+            )
+            for linked_id in self.links[entity_id]:
+                if linked_id != entity_id:
+                    kg_file.write(
+                        f"{subject} {RELATED_TO} <{self.entity_uri(linked_id)}> .\n"
+                    )
+
+    def documents(
+        self,
+        n_docs: Optional[int] = 1000,
+        mentions_per_doc: Optional[int] = 5,
+        filler_words: Optional[int] = 40,
+        typo_rate: Optional[float] = 0.0,
+        language: Optional[str] = None,
+        seed: Optional[int] = 1,
+    ) -> List[str]:
+        """Generate documents mentioning entity labels.
+
+        Parameters
+        ----------
+        n_docs : Optional[int], optional
+            Number of documents, by default 1000.
+        mentions_per_doc : Optional[int], optional
+            Number of entity mentions per document, by default 5.
+        filler_words : Optional[int], optional
+            Number of words around the mentions per document, by default 40.
+        typo_rate : Optional[float], optional
+            Probability to swap two letters of a mention word, by default 0.
+        language : Optional[str], optional
+            The language of the mentioned labels, by default the first language.
+        seed : Optional[int], optional
+            The random seed, by default 1.
+
+        Returns
+        -------
+        List[str]
+            The documents.
+        """
+        rng = random.Random(seed)
+        labels = self.labels[language or self.languages[0]]
+        docs = []
+        for _ in range(n_docs):
+            words = rng.choices(self.words, k=filler_words)
+            for _ in range(mentions_per_doc):
+                mention = rng.choice(rng.choice(labels)).split()
+                for position, word in enumerate(mention):
+                    if len(word) > 3 and rng.random() < typo_rate:
+                        i = rng.randrange(1, len(word) - 2)
+                        mention[position] = (
+                            word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+                        )
+                words.insert(rng.randrange(len(words) + 1), " ".join(mention))
+            docs.append(" ".join(words) + ".")
+        return docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="the N-Triples file to write")
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--labels-per-entity", type=int, default=2)
+    parser.add_argument("--languages", nargs="+", default=["en"])
+    parser.add_argument(
+        "--label-word-weights", type=float, nargs="+", default=[0.3, 0.4, 0.2, 0.1]
+    )
+    parser.add_argument("--links-per-entity", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    synthetic_kg = SyntheticKG(
+        n_entities=args.entities,
+        labels_per_entity=args.labels_per_entity,
+        languages=args.languages,
+        label_word_weights=args.label_word_weights,
+        links_per_entity=args.links_per_entity,
+        seed=args.seed,
+    )
+    with open(args.output, "w", encoding="utf-8") as kg_file:
+        synthetic_kg.write(kg_file)
+
+
+if __name__ == "__main__":
+    main()
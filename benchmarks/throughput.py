@@ -0,0 +1,191 @@
+"""Benchmark of loading, matching and linking throughput on a synthetic knowledge graph.
+
+A deterministic synthetic graph is generated, see synthetic_kg.py, then each stage is
+timed: graph loading and pattern building for the RDF loaders, entity matcher build
+and per doc matching latency for each matching engine, and EntityLinker.pipe
+throughput. The peak resident memory of the process is reported after each stage.
+
+Usage, with the package installed:
+    python benchmarks/throughput.py [--entities 100000] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import spacy
+
+from buzz_el.entity_linker import EntityLinker
+from buzz_el.entity_matcher import EntityMatcher
+from buzz_el.graph import RDFGraphLoader, StreamingRDFGraphLoader
+
+from synthetic_kg import RDFS_COMMENT, RDFS_LABEL, SKOS_ALT_LABEL, SyntheticKG
+
+# engine name: EntityMatcher options
+MATCHER_OPTIONS = {
+    "span_ruler": {"string_engine": "span_ruler"},
+    "aho_corasick": {"string_engine": "aho_corasick"},
+    "ngram": {"use_fuzzy": True, "fuzzy_engine": "ngram", "fuzzy_threshold": 80},
+    "spaczz": {"use_fuzzy": True, "fuzzy_engine": "spaczz", "fuzzy_threshold": 80},
+    "hybrid_ngram": {
+        "use_fuzzy": True,
+        "fuzzy_engine": "ngram",
+        "fuzzy_threshold": 80,
+        "hybrid": True,
+    },
+}
+LOADERS = {"rdf": RDFGraphLoader, "streaming": StreamingRDFGraphLoader}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of the process, in MB."""
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak_rss / 2**20 if sys.platform == "darwin" else peak_rss / 2**10
+
+
+def timed(results: Dict[str, dict], name: str, function):
+    """Run a stage, record its wall time and the peak memory, and return its output."""
+    start = time.perf_counter()
+    output = function()
+    results[name] = {
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return output
+
+
+def load(loader_class: type, kg_file_path: str, language: str):
+    """Build a graph loader and load its graph."""
+    loader = loader_class(
+        kg_file_path,
+        label_properties={RDFS_LABEL, SKOS_ALT_LABEL},
+        context_properties={RDFS_COMMENT},
+        lang_filter_tag=language,
+    )
+    loader.kg
+    return loader
+
+
+def latencies(entity_matcher: EntityMatcher, docs: List) -> Dict[str, float]:
+    """Per doc matching latency percentiles and throughput."""
+    doc_times = []
+    for doc in docs:
+        start = time.perf_counter()
+        entity_matcher(doc)
+        doc_times.append(time.perf_counter() - start)
+    doc_times = np.array(doc_times)
+    return {
+        "p50_ms": float(np.percentile(doc_times, 50) * 1000),
+        "p95_ms": float(np.percentile(doc_times, 95) * 1000),
+        "docs_per_second": len(docs) / doc_times.sum(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--labels-per-entity", type=int, default=2)
+    parser.add_argument("--languages", nargs="+", default=["en"])
+    parser.add_argument(
+        "--label-word-weights", type=float, nargs="+", default=[0.3, 0.4, 0.2, 0.1]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--fuzzy-docs", type=int, default=50)
+    parser.add_argument("--typo-rate", type=float, default=0.1)
+    parser.add_argument(
+        "--loaders", nargs="+", choices=list(LOADERS), default=list(LOADERS)
+    )
+    parser.add_argument(
+        "--matchers",
+        nargs="+",
+        choices=list(MATCHER_OPTIONS),
+        default=["span_ruler", "aho_corasick", "ngram"],
+    )
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results: Dict[str, dict] = {"parameters": vars(args)}
+    synthetic_kg = timed(
+        results,
+        "generate",
+        lambda: SyntheticKG(
+            n_entities=args.entities,
+            labels_per_entity=args.labels_per_entity,
+            languages=args.languages,
+            label_word_weights=args.label_word_weights,
+            seed=args.seed,
+        ),
+    )
+    texts = synthetic_kg.documents(n_docs=args.docs, typo_rate=args.typo_rate)
+    nlp = spacy.blank(args.languages[0])
+    docs = [nlp.make_doc(text) for text in texts]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        kg_file_path = os.path.join(tmp_dir, "synthetic.nt")
+        with open(kg_file_path, "w", encoding="utf-8") as kg_file:
+            synthetic_kg.write(kg_file)
+
+        kg = None
+        for loader_name in args.loaders:
+            loader = timed(
+                results,
+                f"{loader_name}_loader.load",
+                lambda: load(LOADERS[loader_name], kg_file_path, args.languages[0]),
+            )
+            timed(
+                results, f"{loader_name}_loader.build_patterns", loader.build_patterns
+            )
+            kg = loader()
+
+        for matcher_name in args.matchers:
+            options = MATCHER_OPTIONS[matcher_name]
+            entity_matcher = timed(
+                results,
+                f"{matcher_name}.build",
+                lambda: EntityMatcher(kg, nlp, **options),
+            )
+            matcher_docs = docs[: args.fuzzy_docs] if "use_fuzzy" in options else docs
+            results[f"{matcher_name}.match"] = latencies(
+                entity_matcher, [doc.copy() for doc in matcher_docs]
+            )
+
+        entity_linker = EntityLinker(kg, nlp)
+        timed(
+            results,
+            "entity_linker.pipe",
+            lambda: list(
+                entity_linker.pipe(
+                    (doc.copy() for doc in docs),
+                    batch_size=args.batch_size,
+                    n_process=args.n_process,
+                )
+            ),
+        )
+        results["entity_linker.pipe"]["docs_per_second"] = (
+            len(docs) / results["entity_linker.pipe"]["seconds"]
+        )
+
+    for name, stage_results in results.items():
+        if name != "parameters":
+            print(
+                f"{name:<32} "
+                + " ".join(f"{key}={value:.3f}" for key, value in stage_results.items())
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
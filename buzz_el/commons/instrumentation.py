@@ -0,0 +1,246 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, Optional
+
+# upper bounds, in seconds, of the stage wall time histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Instrumentation:
+    """
+    Per stage wall time histograms and event counters of the linking pipeline.
+
+    Components given an instrumentation (EntityLinker, EntityMatcher, KnowledgeGraph)
+    time their stages with it, e.g. "entity_matcher.match" or
+    "entity_linker.disambiguate", and count their events, e.g. "entity_linker.candidates"
+    or "knowledge_graph.get_context.calls". Results are exported as a dict with to_dict,
+    and each timing and count can also be forwarded to a callback, e.g. to feed
+    Prometheus histograms and counters.
+
+    Components default to NO_INSTRUMENTATION, which records nothing at near-zero cost.
+    With several worker processes, each worker records in its own copy: only the
+    callback sees their timings and counts.
+
+    Attributes
+    ----------
+    buckets : Tuple[float, ...]
+        The sorted upper bounds, in seconds, of the wall time histogram buckets.
+    callback : Optional[Callable[[str, str, float], None]]
+        Called with the kind ("timing" or "counter"), name and value of each record.
+    enabled : bool
+        Whether records are kept, False for NoInstrumentation.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        buckets: Optional[Iterable[float]] = DEFAULT_BUCKETS,
+        callback: Optional[Callable[[str, str, float], None]] = None,
+    ) -> None:
+        """Initialise the instrumentation.
+
+        Parameters
+        ----------
+        buckets : Optional[Iterable[float]], optional
+            The upper bounds, in seconds, of the wall time histogram buckets, by default
+            DEFAULT_BUCKETS. An unbounded bucket is always added.
+        callback : Optional[Callable[[str, str, float], None]], optional
+            Called with the kind ("timing" or "counter"), name and value of each record,
+            by default None.
+
+        Raises
+        ------
+        ValueError
+            If there is no bucket or a bucket bound is not strictly positive.
+        """
+        buckets = tuple(sorted(buckets))
+        if not buckets or buckets[0] <= 0:
+            raise ValueError(
+                f"buckets must be strictly positive upper bounds, got {buckets}."
+            )
+        self.buckets = buckets
+        self.callback = callback
+
+        self._lock = threading.Lock()
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the wall time of a stage.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+        seconds : float
+            The wall time in seconds.
+        """
+        with self._lock:
+            timing = self._timings.get(stage)
+            if timing is None:
+                timing = self._timings[stage] = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "bucket_counts": [0] * (len(self.buckets) + 1),
+                }
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["bucket_counts"][bisect_left(self.buckets, seconds)] += 1
+        if self.callback is not None:
+            self.callback("timing", stage, seconds)
+
+    def count(self, counter: str, value: float = 1) -> None:
+        """Increment a counter.
+
+        Parameters
+        ----------
+        counter : str
+            The counter name.
+        value : float, optional
+            The increment, by default 1.
+        """
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+        if self.callback is not None:
+            self.callback("counter", counter, value)
+
+    @contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timer(self, stage: str) -> ContextManager[None]:
+        """Get a context manager recording the wall time of its block.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+
+        Returns
+        -------
+        ContextManager[None]
+            The timing context manager.
+        """
+        return self._timer(stage)
+
+    def timed_iter(self, stage: str, iterable: Iterable) -> Iterator:
+        """Iterate while recording the wall time to produce each item, e.g. of a lazy
+        tokenisation.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+        iterable : Iterable
+            The iterable to time.
+
+        Returns
+        -------
+        Iterator
+            An iterator over the same items.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start)
+            yield item
+
+    def wrap(self, stage: str, function: Callable) -> Callable:
+        """Wrap a callable to record the wall time of each call.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name, also counted as the "{stage}.calls" counter.
+        function : Callable
+            The callable to time.
+
+        Returns
+        -------
+        Callable
+            The timed callable.
+        """
+
+        def timed_function(*args, **kwargs):
+            self.count(f"{stage}.calls")
+            with self._timer(stage):
+                return function(*args, **kwargs)
+
+        return timed_function
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Export the records.
+
+        Returns
+        -------
+        Dict[str, Dict[str, Any]]
+            The "timings" of each stage, with their count, sum in seconds and cumulative
+            histogram bucket counts keyed by upper bound (the last one being "+Inf"),
+            and the "counters" values.
+        """
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        with self._lock:
+            timings = {}
+            for stage, timing in self._timings.items():
+                cumulative_count = 0
+                buckets = {}
+                for bound, bucket_count in zip(bounds, timing["bucket_counts"]):
+                    cumulative_count += bucket_count
+                    buckets[bound] = cumulative_count
+                timings[stage] = {
+                    "count": timing["count"],
+                    "sum": timing["sum"],
+                    "buckets": buckets,
+                }
+            return {"timings": timings, "counters": dict(self._counters)}
+
+    def reset(self) -> None:
+        """Remove all the records."""
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+
+class NoInstrumentation(Instrumentation):
+    """
+    An instrumentation recording nothing, the default of the components.
+
+    Its methods do not measure time, so that disabled instrumentation costs a method
+    call per stage.
+    """
+
+    enabled = False
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, counter: str, value: float = 1) -> None:
+        pass
+
+    def timer(self, stage: str) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    def timed_iter(self, stage: str, iterable: Iterable) -> Iterator:
+        return iter(iterable)
+
+    def wrap(self, stage: str, function: Callable) -> Callable:
+        return function
+
+
+NO_INSTRUMENTATION = NoInstrumentation()
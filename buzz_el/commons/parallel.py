@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+Component = Union[Callable[[Doc], Doc], Callable[[List[Doc]], List[Doc]]]
+
+# the component applied by the worker processes, whether it processes batches of docs,
+# and the vocab of its docs, inherited from the parent process
+_worker_component: Optional[Component] = None
+_worker_batched: bool = False
+_worker_vocab: Optional[Vocab] = None
+
+
+def _set_worker_component(component: Component, batched: bool, vocab: Vocab) -> None:
+    """Worker process initialiser storing the component to apply."""
+    global _worker_component, _worker_batched, _worker_vocab
+    _worker_component = component
+    _worker_batched = batched
+    _worker_vocab = vocab
+
+
+def _process_batch(docs_bytes: List[bytes]) -> List[bytes]:
+    """Apply the worker component to a batch of serialised docs.
+
+    Parameters
+    ----------
+    docs_bytes : List[bytes]
+        The serialised docs.
+
+    Returns
+    -------
+    List[bytes]
+        The serialised processed docs.
+    """
+    docs = [Doc(_worker_vocab).from_bytes(doc_bytes) for doc_bytes in docs_bytes]
+    if _worker_batched:
+        docs = _worker_component(docs)
+    else:
+        docs = [_worker_component(doc) for doc in docs]
+    return [doc.to_bytes() for doc in docs]
+
+
+def _batches(docs: Iterable[Doc], batch_size: int) -> Iterator[List[Doc]]:
+    """Group docs in batches, lazily."""
+    docs = iter(docs)
+    while True:
+        batch = list(islice(docs, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def multiprocess_pipe(
+    component: Component,
+    vocab: Vocab,
+    docs: Iterable[Doc],
+    batch_size: Optional[int] = 128,
+    n_process: Optional[int] = 1,
+    batched: Optional[bool] = False,
+) -> Iterator[Doc]:
+    """Apply a doc component to docs, fanning batches of docs out to worker processes.
+
+    Worker processes are forked, so they share the component (and the knowledge graph it
+    holds, e.g. a memory mapped snapshot) with the parent process instead of rebuilding
+    it. Docs are sent to and from the workers as bytes. The output order is the input
+    order. With a single process, docs are processed in place in the current process.
+
+    A batched component is applied to whole batches of docs, e.g. to share work between
+    the docs of a batch.
+
+    Parameters
+    ----------
+    component : Union[Callable[[Doc], Doc], Callable[[List[Doc]], List[Doc]]]
+        The component to apply, to a doc or to a batch of docs if batched.
+    vocab : Vocab
+        The vocab of the docs.
+    docs : Iterable[Doc]
+        The docs to process.
+    batch_size : Optional[int], optional
+        Number of docs sent to a worker process at once, by default 128.
+    n_process : Optional[int], optional
+        Number of worker processes, -1 for the number of CPU cores, by default 1.
+    batched : Optional[bool], optional
+        Whether the component processes batches of docs, by default False.
+
+    Returns
+    -------
+    Iterator[Doc]
+        The processed docs.
+
+    Raises
+    ------
+    ValueError
+        If the batch size or the number of processes is invalid, or if processes cannot
+        be forked on the platform.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be strictly positive, got {batch_size}.")
+    if n_process == -1:
+        n_process = os.cpu_count()
+    if n_process < 1:
+        raise ValueError(f"n_process must be strictly positive or -1, got {n_process}.")
+    if n_process > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        raise ValueError("Multiprocess pipe needs the fork start method.")
+
+    if n_process == 1:
+        return _pipe(component, docs, batch_size, batched)
+    return _multiprocess_pipe(component, vocab, docs, batch_size, n_process, batched)
+
+
+def _pipe(
+    component: Component, docs: Iterable[Doc], batch_size: int, batched: bool
+) -> Iterator[Doc]:
+    """Apply a doc component to docs in place, in the current process."""
+    if batched:
+        for batch in _batches(docs, batch_size):
+            yield from component(batch)
+    else:
+        for doc in docs:
+            yield component(doc)
+
+
+def _multiprocess_pipe(
+    component: Component,
+    vocab: Vocab,
+    docs: Iterable[Doc],
+    batch_size: int,
+    n_process: int,
+    batched: bool,
+) -> Iterator[Doc]:
+    """Apply a doc component to docs in forked worker processes, keeping the order."""
+    context = multiprocessing.get_context("fork")
+    with context.Pool(
+        n_process,
+        initializer=_set_worker_component,
+        initargs=(component, batched, vocab),
+    ) as pool:
+        docs_bytes = (
+            [doc.to_bytes() for doc in batch] for batch in _batches(docs, batch_size)
+        )
+        for processed_batch in pool.imap(_process_batch, docs_bytes):
+            for doc_bytes in processed_batch:
+                yield Doc(vocab).from_bytes(doc_bytes)
@@ -1 +1,3 @@
+from .context_similarity_disambiguator import ContextSimilarityDisambiguator
 from .disambiguator import Disambiguator
+from .graph_coherence_disambiguator import GraphCoherenceDisambiguator
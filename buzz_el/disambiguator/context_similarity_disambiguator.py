@@ -0,0 +1,278 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from spacy.tokens import Span
+
+from ..graph import KnowledgeGraph
+from .disambiguator import Disambiguator
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class ContextSimilarityDisambiguator(Disambiguator):
+    """
+    A disambiguator selecting the candidate entity whose context string is the most
+    similar to the document text around the mention.
+
+    Texts are represented as hashed bag-of-words TF-IDF vectors: words are lower-cased
+    and hashed to n_features buckets, and weighted with their inverse document frequency
+    over the entity context strings. The entity vectors are L2 normalised and computed
+    once, when the disambiguator is built, and stored as a CSR-like sparse matrix. Scoring
+    the candidates of a mention is then a single sparse dot product between their rows
+    and the mention window vector. The candidates of many mentions, e.g. of a batch of
+    docs, are scored at once with disambiguate_batch.
+
+    Ties, e.g. between entities without context, are broken in favour of the longest
+    candidate, then of the first one, so the output is deterministic.
+
+    Attributes
+    ----------
+    kg : KnowledgeGraph
+        The knowledge graph whose entity context strings are vectorised.
+    window : int
+        Number of tokens on each side of the mention used as document context.
+    n_features : int
+        Number of hashing buckets of the vectors.
+    """
+
+    def __init__(
+        self,
+        knowledge_graph: KnowledgeGraph,
+        window: Optional[int] = 50,
+        n_features: Optional[int] = 2**18,
+    ) -> None:
+        """Initialise the disambiguator and vectorise the entity context strings.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The knowledge graph whose entity context strings are vectorised.
+        window : Optional[int], optional
+            Number of tokens on each side of the mention used as document context,
+            by default 50.
+        n_features : Optional[int], optional
+            Number of hashing buckets of the vectors, by default 2**18.
+
+        Raises
+        ------
+        ValueError
+            If the window is negative or the number of features is not positive.
+        """
+        if window < 0:
+            raise ValueError(f"window must be positive, got {window}.")
+        if n_features < 1:
+            raise ValueError(f"n_features must be strictly positive, got {n_features}.")
+        super().__init__()
+        self.kg = knowledge_graph
+        self.window = window
+        self.n_features = n_features
+
+        self._entity_rows: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0, dtype=np.float32)
+        self._idf = np.ones(n_features, dtype=np.float32)
+        self._build_entity_vectors()
+
+    def for_knowledge_graph(
+        self, knowledge_graph: KnowledgeGraph
+    ) -> "ContextSimilarityDisambiguator":
+        """
+        Build the same disambiguator on another knowledge graph, vectorising its entity
+        context strings.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The knowledge graph.
+
+        Returns
+        -------
+        ContextSimilarityDisambiguator
+            The disambiguator of the knowledge graph.
+        """
+        return ContextSimilarityDisambiguator(
+            knowledge_graph, window=self.window, n_features=self.n_features
+        )
+
+    def _hashed_counts(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the sorted hashed word buckets of a text and their counts."""
+        buckets = np.fromiter(
+            (
+                zlib.crc32(word.encode("utf-8")) % self.n_features
+                for word in _WORD_PATTERN.findall(text.lower())
+            ),
+            dtype=np.int64,
+        )
+        return np.unique(buckets, return_counts=True)
+
+    def _build_entity_vectors(self) -> None:
+        """Vectorise the context strings of all the knowledge graph entities."""
+        rows_buckets, rows_counts = [], []
+        for entity_uri in self.kg.entity_uris():
+            buckets, counts = self._hashed_counts(self.kg.get_context(entity_uri))
+            self._entity_rows[entity_uri] = len(rows_buckets)
+            rows_buckets.append(buckets)
+            rows_counts.append(counts)
+
+        row_lens = np.array([len(buckets) for buckets in rows_buckets], dtype=np.int64)
+        self._indptr = np.zeros(len(row_lens) + 1, dtype=np.int64)
+        np.cumsum(row_lens, out=self._indptr[1:])
+        if not self._indptr[-1]:
+            return
+        self._indices = np.concatenate(rows_buckets)
+        counts = np.concatenate(rows_counts).astype(np.float32)
+
+        # smoothed inverse document frequency over the entity context strings
+        document_frequencies = np.bincount(self._indices, minlength=self.n_features)
+        self._idf = (
+            np.log((1 + len(row_lens)) / (1 + document_frequencies)) + 1
+        ).astype(np.float32)
+
+        data = counts * self._idf[self._indices]
+        row_ids = np.repeat(np.arange(len(row_lens)), row_lens)
+        row_norms = np.sqrt(np.bincount(row_ids, weights=data**2))
+        self._data = (data / row_norms[row_ids]).astype(np.float32)
+
+    def _window_vector(self, spans: List[Span]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorise the document window around the candidate spans.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The sorted buckets and their TF-IDF weights.
+        """
+        doc = spans[0].doc
+        start = max(0, min(span.start for span in spans) - self.window)
+        end = min(len(doc), max(span.end for span in spans) + self.window)
+        buckets, counts = self._hashed_counts(doc[start:end].text)
+        return buckets, counts * self._idf[buckets]
+
+    def _score(
+        self,
+        pair_groups: np.ndarray,
+        pair_rows: np.ndarray,
+        window_keys: np.ndarray,
+        window_weights: np.ndarray,
+    ) -> np.ndarray:
+        """Compute the dot products between entity vectors and window vectors.
+
+        Parameters
+        ----------
+        pair_groups : np.ndarray
+            The group of each (group, entity) pair to score.
+        pair_rows : np.ndarray
+            The entity row of each pair, -1 for unknown entities which score 0.
+        window_keys : np.ndarray
+            The sorted group * n_features + bucket keys of the window vectors.
+        window_weights : np.ndarray
+            The weights of the window vectors.
+
+        Returns
+        -------
+        np.ndarray
+            The scores of the pairs.
+        """
+        scores = np.zeros(len(pair_rows), dtype=np.float64)
+        known = pair_rows >= 0
+        if not len(window_keys) or not known.any():
+            return scores
+
+        row_starts = self._indptr[pair_rows[known]]
+        row_lens = self._indptr[pair_rows[known] + 1] - row_starts
+        positions = np.repeat(row_starts - (np.cumsum(row_lens) - row_lens), row_lens)
+        positions += np.arange(row_lens.sum())
+        keys = (
+            np.repeat(pair_groups[known], row_lens) * self.n_features
+            + self._indices[positions]
+        )
+
+        # look the entity buckets up in the sorted window buckets of their group
+        matches = np.minimum(np.searchsorted(window_keys, keys), len(window_keys) - 1)
+        products = np.where(
+            window_keys[matches] == keys,
+            window_weights[matches] * self._data[positions],
+            0,
+        )
+        scores[known] = np.bincount(
+            np.repeat(np.arange(len(row_lens)), row_lens),
+            weights=products,
+            minlength=len(row_lens),
+        )
+        return scores
+
+    def disambiguate_batch(self, span_groups: List[List[Span]]) -> List[List[Span]]:
+        """
+        Select the candidate entity the most similar to the document context, for
+        several groups of overlapping candidates at once.
+
+        The candidate entity rows are looked up once per distinct entity, and all the
+        candidates of all the groups are scored in a single vectorised operation.
+
+        Parameters
+        ----------
+        span_groups : List[List[Span]]
+            The groups of overlapping candidate spans, possibly from several docs.
+
+        Returns
+        -------
+        List[List[Span]]
+            The selected entity span of each group.
+        """
+        if not span_groups:
+            return []
+        spans = [span for group in span_groups for span in group]
+        group_lens = np.array([len(group) for group in span_groups], dtype=np.int64)
+        pair_groups = np.repeat(np.arange(len(span_groups)), group_lens)
+
+        entity_uris, pair_entities = np.unique(
+            [span.id_ for span in spans], return_inverse=True
+        )
+        entity_rows = np.array(
+            [self._entity_rows.get(entity_uri, -1) for entity_uri in entity_uris],
+            dtype=np.int64,
+        )
+
+        window_keys, window_weights = [], []
+        for group_id, group in enumerate(span_groups):
+            buckets, weights = self._window_vector(group)
+            window_keys.append(group_id * self.n_features + buckets)
+            window_weights.append(weights)
+        scores = self._score(
+            pair_groups,
+            entity_rows[pair_entities],
+            np.concatenate(window_keys),
+            np.concatenate(window_weights),
+        )
+
+        # best candidate of each group: highest score, then longest, then first
+        # (np.lexsort sorts by the last key first)
+        order = np.lexsort(
+            (
+                np.arange(len(spans)),
+                [-len(span) for span in spans],
+                -scores,
+                pair_groups,
+            )
+        )
+        group_starts = np.zeros(len(span_groups), dtype=np.int64)
+        np.cumsum(group_lens[:-1], out=group_starts[1:])
+        return [[spans[best]] for best in order[group_starts].tolist()]
+
+    def __call__(self, overlapping_spans: Iterable[Span]) -> Iterable[Span]:
+        """
+        Select the candidate entity the most similar to the document context.
+
+        Parameters
+        ----------
+        overlapping_spans : Iterable[Span]
+            The overlapping candidate entities spans, from the same doc.
+
+        Returns
+        -------
+        Iterable[Span]
+            The selected entity span.
+        """
+        return self.disambiguate_batch([list(overlapping_spans)])[0]
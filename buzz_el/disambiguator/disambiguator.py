@@ -1,8 +1,10 @@
 import random
-from typing import Iterable
+from typing import Iterable, List
 
 from spacy.tokens import Span
 
+from ..graph import KnowledgeGraph
+
 
 class Disambiguator:
     def __init__(self) -> None:
@@ -10,3 +12,42 @@ class Disambiguator:
 
     def __call__(self, overlapping_spans: Iterable[Span]) -> Iterable[Span]:
         return [random.choice(overlapping_spans)]
+
+    def disambiguate_batch(self, span_groups: List[List[Span]]) -> List[Iterable[Span]]:
+        """
+        Disambiguate several groups of overlapping candidate spans at once.
+
+        Disambiguators sharing work between groups, e.g. vectorised scoring, override
+        this method. By default, each group is disambiguated on its own.
+
+        Parameters
+        ----------
+        span_groups : List[List[Span]]
+            The groups of overlapping candidate spans, possibly from several docs.
+
+        Returns
+        -------
+        List[Iterable[Span]]
+            The selected spans of each group.
+        """
+        return [self(spans) for spans in span_groups]
+
+    def for_knowledge_graph(self, knowledge_graph: KnowledgeGraph) -> "Disambiguator":
+        """
+        Get the disambiguator to use with another knowledge graph, or with the same one
+        once updated, e.g. when the entity linker knowledge graph is swapped.
+
+        Disambiguators depending on the knowledge graph content override this method to
+        rebuild their data. By default, the disambiguator itself is returned.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The knowledge graph.
+
+        Returns
+        -------
+        Disambiguator
+            The disambiguator of the knowledge graph.
+        """
+        return self
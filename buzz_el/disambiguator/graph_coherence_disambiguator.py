@@ -0,0 +1,217 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from spacy.tokens import Span
+
+from ..graph import EntityAdjacency, KnowledgeGraph
+from .disambiguator import Disambiguator
+
+
+class GraphCoherenceDisambiguator(Disambiguator):
+    """
+    A disambiguator selecting the candidate entity the most connected, in the knowledge
+    graph, to the other candidate entities of the document.
+
+    The score of a candidate is the number of distinct candidate entities of the same doc,
+    outside its own group, it is adjacent to. The doc candidates are read from the entity
+    matcher spans of the doc, if set, and from the groups disambiguated at once. All the
+    (candidate, doc entity) pairs of a batch are looked up in the entity adjacency in one
+    vectorised operation.
+
+    Groups where no candidate is connected to the doc entities are given to the fallback
+    disambiguator if any. Otherwise, ties are broken in favour of the longest candidate,
+    then of the first one.
+
+    Attributes
+    ----------
+    adjacency : EntityAdjacency
+        The adjacency of the knowledge graph entities, see RDFGraphLoader.build_adjacency.
+    fallback : Optional[Disambiguator]
+        The disambiguator of the groups without connected candidates.
+    spans_key : str
+        The spans key of the entity matcher, under which the doc candidates are read.
+    """
+
+    def __init__(
+        self,
+        adjacency: EntityAdjacency,
+        fallback: Optional[Disambiguator] = None,
+        spans_key: Optional[str] = None,
+    ) -> None:
+        """Initialise the disambiguator.
+
+        Parameters
+        ----------
+        adjacency : EntityAdjacency
+            The adjacency of the knowledge graph entities.
+        fallback : Optional[Disambiguator], optional
+            The disambiguator of the groups without connected candidates, by default
+            None.
+        spans_key : Optional[str], optional
+            The spans key of the entity matcher, under which the doc candidates are read,
+            by default "string". Other span groups of the doc are ignored.
+        """
+        super().__init__()
+        self.adjacency = adjacency
+        self.fallback = fallback
+        if spans_key is None:
+            spans_key = "string"
+        self.spans_key = spans_key
+
+    def for_knowledge_graph(
+        self, knowledge_graph: KnowledgeGraph
+    ) -> "GraphCoherenceDisambiguator":
+        """
+        Build the same disambiguator on another knowledge graph, rebuilding the entity
+        adjacency from its triples.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The knowledge graph, with its KG object, e.g. an rdflib graph.
+
+        Returns
+        -------
+        GraphCoherenceDisambiguator
+            The disambiguator of the knowledge graph.
+
+        Raises
+        ------
+        ValueError
+            If the knowledge graph has no KG object to read the triples from, e.g. when
+            loaded from a snapshot.
+        """
+        if knowledge_graph.kg is None:
+            raise ValueError(
+                "The entity adjacency cannot be rebuilt without the knowledge graph "
+                "triples, give the disambiguator of the new knowledge graph instead."
+            )
+        return GraphCoherenceDisambiguator(
+            EntityAdjacency.from_triples(
+                knowledge_graph.entity_uris(), knowledge_graph.kg
+            ),
+            fallback=(
+                None
+                if self.fallback is None
+                else self.fallback.for_knowledge_graph(knowledge_graph)
+            ),
+            spans_key=self.spans_key,
+        )
+
+    def _doc_entity_ids(self, span_groups: List[List[Span]]) -> Dict[int, np.ndarray]:
+        """Get the distinct candidate entity ids of the docs of the span groups."""
+        docs = {}
+        doc_entity_uris = {}
+        for spans in span_groups:
+            doc = spans[0].doc
+            docs[id(doc)] = doc
+            doc_entity_uris.setdefault(id(doc), set()).update(
+                span.id_ for span in spans
+            )
+        for doc_key, doc in docs.items():
+            doc_entity_uris[doc_key].update(
+                span.id_ for span in doc.spans.get(self.spans_key, ())
+            )
+
+        doc_entity_ids = {}
+        for doc_key, entity_uris in doc_entity_uris.items():
+            entity_ids = self.adjacency.entity_ids(entity_uris)
+            doc_entity_ids[doc_key] = np.unique(entity_ids[entity_ids >= 0])
+        return doc_entity_ids
+
+    def _score(self, span_groups: List[List[Span]]) -> List[np.ndarray]:
+        """Compute the connectivity score of the candidates of each group.
+
+        Parameters
+        ----------
+        span_groups : List[List[Span]]
+            The groups of overlapping candidate spans.
+
+        Returns
+        -------
+        List[np.ndarray]
+            The scores of the candidates of each group.
+        """
+        doc_entity_ids = self._doc_entity_ids(span_groups)
+
+        candidate_ids, context_ids, pair_candidates = [], [], []
+        n_candidates = 0
+        for spans in span_groups:
+            group_ids = self.adjacency.entity_ids(span.id_ for span in spans)
+            group_context_ids = np.setdiff1d(
+                doc_entity_ids[id(spans[0].doc)], group_ids
+            )
+            candidate_ids.append(np.repeat(group_ids, len(group_context_ids)))
+            context_ids.append(np.tile(group_context_ids, len(group_ids)))
+            pair_candidates.append(
+                np.repeat(
+                    np.arange(n_candidates, n_candidates + len(spans)),
+                    len(group_context_ids),
+                )
+            )
+            n_candidates += len(spans)
+
+        connected = self.adjacency.connected(
+            np.concatenate(candidate_ids), np.concatenate(context_ids)
+        )
+        scores = np.bincount(
+            np.concatenate(pair_candidates)[connected], minlength=n_candidates
+        )
+        group_ends = np.cumsum([len(spans) for spans in span_groups])
+        return np.split(scores, group_ends[:-1])
+
+    def disambiguate_batch(self, span_groups: List[List[Span]]) -> List[List[Span]]:
+        """
+        Select the candidate entity the most connected to the document entities, for
+        several groups of overlapping candidates at once.
+
+        Parameters
+        ----------
+        span_groups : List[List[Span]]
+            The groups of overlapping candidate spans, possibly from several docs.
+
+        Returns
+        -------
+        List[List[Span]]
+            The selected entity spans of each group.
+        """
+        if not span_groups:
+            return []
+        span_groups = [list(spans) for spans in span_groups]
+
+        selected_spans = []
+        fallback_groups = []
+        for spans, scores in zip(span_groups, self._score(span_groups)):
+            if self.fallback is not None and not scores.any():
+                fallback_groups.append(len(selected_spans))
+                selected_spans.append(None)
+                continue
+            # highest score, then longest, then first (np.lexsort sorts by the last key)
+            best = np.lexsort(
+                (np.arange(len(spans)), [-len(span) for span in spans], -scores)
+            )[0]
+            selected_spans.append([spans[best]])
+
+        if fallback_groups:
+            fallback_selections = self.fallback.disambiguate_batch(
+                [span_groups[group_id] for group_id in fallback_groups]
+            )
+            for group_id, spans in zip(fallback_groups, fallback_selections):
+                selected_spans[group_id] = list(spans)
+        return selected_spans
+
+    def __call__(self, overlapping_spans: Iterable[Span]) -> Iterable[Span]:
+        """
+        Select the candidate entity the most connected to the document entities.
+
+        Parameters
+        ----------
+        overlapping_spans : Iterable[Span]
+            The overlapping candidate entities spans, from the same doc.
+
+        Returns
+        -------
+        Iterable[Span]
+            The selected entity span.
+        """
+        return self.disambiguate_batch([list(overlapping_spans)])[0]
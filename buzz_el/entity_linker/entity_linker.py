@@ -1,11 +1,39 @@
-from typing import Iterable, Optional
+import threading
+from concurrent.futures import Future
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import numpy as np
 from spacy.language import Language
 from spacy.tokens import Doc, Span
 
+from ..commons.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from ..commons.parallel import multiprocess_pipe
 from ..disambiguator import Disambiguator
 from ..entity_matcher import EntityMatcher
-from ..graph import KnowledgeGraph
+from ..graph import KnowledgeGraph, KnowledgeGraphUpdate
+from ..graph.knowledge_graph import Triple
+
+# version of the knowledge graph the doc entities were linked with
+if not Doc.has_extension("kg_version"):
+    Doc.set_extension("kg_version", default=None)
+
+
+class _LinkerState(NamedTuple):
+    """The knowledge graph version used by the linker, swapped as a whole."""
+
+    version: str
+    kg: KnowledgeGraph
+    entity_matcher: EntityMatcher
+    disambiguator: Disambiguator
 
 
 class EntityLinker:
@@ -16,16 +44,31 @@ class EntityLinker:
     Then, disambiguator is applied when ambiguous candidate entities are found
     for the same tokens.
 
+    The knowledge graph, its entity matcher and disambiguator can be replaced while the
+    linker is in use (see swap and swap_in_background): they are held in a single
+    immutable state, read once per doc, so docs being processed finish with the version
+    they started with.
+    Each processed doc gets the version it was linked with in its `doc._.kg_version`
+    attribute.
+
     Attributes
     ----------
     kg : KnowledgeGraph
         The knowledge graph to link the entities.
+    kg_version : str
+        The version of the knowledge graph.
     spacy_model : Language
         The spaCy model to use in internal spaCy components.
     entity_matcher : EntityMatcher
         The entity matcher to extract candidate entities.
     disambiguator : Disambiguator
         The disambiguator to filter ambiguous candidate entities.
+    instrumentation : Instrumentation
+        The instrumentation recording the wall time of the linking stages
+        ("entity_linker.tokenize", "entity_linker.match", "entity_linker.group",
+        "entity_linker.set_annotations", "entity_linker.disambiguate") and the number of
+        docs, candidates and ambiguous groups ("entity_linker.docs",
+        "entity_linker.candidates", "entity_linker.ambiguous_groups").
     """
 
     def __init__(
@@ -34,6 +77,8 @@ class EntityLinker:
         spacy_model: Language,
         entity_matcher: Optional[EntityMatcher] = None,
         disambiguator: Optional[Disambiguator] = None,
+        kg_version: Optional[str] = None,
+        instrumentation: Optional[Instrumentation] = None,
     ) -> None:
         """
         Initialiser for the entity linker.
@@ -48,17 +93,154 @@ class EntityLinker:
             The entity matcher to extract candidate entities.
         disambiguator : Disambiguator
             The disambiguator to filter ambiguous candidate entities.
+        kg_version : Optional[str], optional
+            The version of the knowledge graph, by default "0".
+        instrumentation : Optional[Instrumentation], optional
+            The instrumentation recording the linking stages, by default None (nothing is
+            recorded). The entity matcher and the knowledge graph have their own.
         """
-        self.kg = knowledge_graph
         self.spacy_model = spacy_model
         if entity_matcher is None:
-            self.entity_matcher = EntityMatcher(self.kg, spacy_model)
-        else:
-            self.entity_matcher = entity_matcher
+            entity_matcher = EntityMatcher(knowledge_graph, spacy_model)
         if disambiguator is None:
-            self.disambiguator = Disambiguator()
-        else:
-            self.disambiguator = disambiguator
+            disambiguator = Disambiguator()
+        self.instrumentation = (
+            NO_INSTRUMENTATION if instrumentation is None else instrumentation
+        )
+
+        self._generation = 0
+        self._swap_lock = threading.Lock()
+        self._state = _LinkerState(
+            version=str(self._generation) if kg_version is None else kg_version,
+            kg=knowledge_graph,
+            entity_matcher=entity_matcher,
+            disambiguator=disambiguator,
+        )
+
+    @property
+    def kg(self) -> KnowledgeGraph:
+        """The current knowledge graph."""
+        return self._state.kg
+
+    @property
+    def entity_matcher(self) -> EntityMatcher:
+        """The current entity matcher."""
+        return self._state.entity_matcher
+
+    @property
+    def disambiguator(self) -> Disambiguator:
+        """The current disambiguator."""
+        return self._state.disambiguator
+
+    @property
+    def kg_version(self) -> str:
+        """The current knowledge graph version."""
+        return self._state.version
+
+    def swap(
+        self,
+        knowledge_graph: KnowledgeGraph,
+        entity_matcher: Optional[EntityMatcher] = None,
+        kg_version: Optional[str] = None,
+        disambiguator: Optional[Disambiguator] = None,
+    ) -> str:
+        """
+        Replace the knowledge graph, the entity matcher and the disambiguator, atomically.
+
+        Docs being processed finish with the previous knowledge graph, the next ones use
+        the new one. The previous knowledge graph is released once no doc uses it.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The new knowledge graph.
+        entity_matcher : Optional[EntityMatcher], optional
+            The entity matcher of the new knowledge graph, by default None: it is built
+            with the current entity matcher options.
+        kg_version : Optional[str], optional
+            The version of the new knowledge graph, by default the number of swaps.
+        disambiguator : Optional[Disambiguator], optional
+            The disambiguator of the new knowledge graph, by default None: it is rebuilt
+            from the current one, see Disambiguator.for_knowledge_graph.
+
+        Returns
+        -------
+        str
+            The version of the new knowledge graph.
+        """
+        with self._swap_lock:
+            # built from the state replaced, so that concurrent swaps do not mix options
+            state = self._state
+            if entity_matcher is None:
+                entity_matcher = EntityMatcher(
+                    knowledge_graph, self.spacy_model, **state.entity_matcher.options()
+                )
+            if disambiguator is None:
+                disambiguator = state.disambiguator.for_knowledge_graph(knowledge_graph)
+            self._generation += 1
+            if kg_version is None:
+                kg_version = str(self._generation)
+            # a single reference assignment, seen whole by the processing threads
+            self._state = _LinkerState(
+                version=kg_version,
+                kg=knowledge_graph,
+                entity_matcher=entity_matcher,
+                disambiguator=disambiguator,
+            )
+        return kg_version
+
+    def swap_in_background(
+        self,
+        build_knowledge_graph: Callable[[], KnowledgeGraph],
+        kg_version: Optional[str] = None,
+        build_disambiguator: Optional[Callable[[KnowledgeGraph], Disambiguator]] = None,
+    ) -> Future:
+        """
+        Build a knowledge graph, its entity matcher and disambiguator in a background
+        thread, and swap them in once built.
+
+        The linker keeps processing docs with the current knowledge graph meanwhile.
+
+        Parameters
+        ----------
+        build_knowledge_graph : Callable[[], KnowledgeGraph]
+            Builds the new knowledge graph, e.g. a graph loader or
+            `lambda: KnowledgeGraph.from_disk(snapshot_path)`.
+        kg_version : Optional[str], optional
+            The version of the new knowledge graph, by default the number of swaps.
+        build_disambiguator : Optional[Callable[[KnowledgeGraph], Disambiguator]], optional
+            Builds the disambiguator of the new knowledge graph, by default None: it is
+            rebuilt from the current one, see Disambiguator.for_knowledge_graph.
+
+        Returns
+        -------
+        Future
+            The future result of the swap, i.e. the new version, or the exception raised
+            while building the knowledge graph (the current one is then kept).
+        """
+        future = Future()
+
+        def build_and_swap() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                knowledge_graph = build_knowledge_graph()
+                future.set_result(
+                    self.swap(
+                        knowledge_graph,
+                        kg_version=kg_version,
+                        disambiguator=(
+                            None
+                            if build_disambiguator is None
+                            else build_disambiguator(knowledge_graph)
+                        ),
+                    )
+                )
+            except Exception as error:
+                future.set_exception(error)
+
+        threading.Thread(target=build_and_swap, name="kg-swap", daemon=True).start()
+        return future
 
     def __call__(self, doc: Doc) -> Doc:
         """
@@ -74,56 +256,283 @@ class EntityLinker:
         Doc
             The spaCy doc processed.
         """
-        doc = self.entity_matcher(doc)
-        doc = self._remove_ambiguities(doc)
-        return doc
+        return self._link_batch([doc])[0]
 
-    def pipe(self, docs: Iterable[Doc]) -> Iterable[Doc]:
+    def pipe(
+        self,
+        docs: Iterable[Doc],
+        batch_size: Optional[int] = 128,
+        n_process: Optional[int] = 1,
+    ) -> Iterable[Doc]:
         """
         Apply the entity linking component to an iterable of spaCy docs.
 
+        Docs are processed in batches: the ambiguous candidates of all the docs of a
+        batch are disambiguated at once, see Disambiguator.disambiguate_batch.
+
+        With several processes, batches of docs are processed by forked worker processes
+        sharing this component, and the processed docs are returned in the input order.
+        They are then copies of the input docs.
+
         Parameters
         ----------
         docs : Iterable[Doc]
             An iterable of spaCy docs to process.
+        batch_size : Optional[int], optional
+            Number of docs disambiguated together, and sent to a worker process at once,
+            by default 128.
+        n_process : Optional[int], optional
+            Number of worker processes, -1 for the number of CPU cores, by default 1.
 
         Returns
         -------
         Iterable[Doc]
             An iterable of processed spaCy docs.
         """
+        return multiprocess_pipe(
+            self._link_batch,
+            self.spacy_model.vocab,
+            docs,
+            batch_size=batch_size,
+            n_process=n_process,
+            batched=True,
+        )
+
+    def _link_batch(self, docs: List[Doc]) -> List[Doc]:
+        """
+        Apply the entity linking to a batch of spaCy docs.
+
+        The docs are all processed with the same knowledge graph version.
+
+        Parameters
+        ----------
+        docs : List[Doc]
+            The spaCy docs to process.
+
+        Returns
+        -------
+        List[Doc]
+            The spaCy docs processed.
+        """
+        state = self._state
+        instrumentation = self.instrumentation
+        docs_candidate_groups = []
+        for doc in docs:
+            # the candidates are kept as tuples for the disambiguation, and set as spans
+            with instrumentation.timer("entity_linker.match"):
+                matches = state.entity_matcher.match(doc)
+            with instrumentation.timer("entity_linker.set_annotations"):
+                state.entity_matcher.set_annotations(doc, matches)
+            with instrumentation.timer("entity_linker.group"):
+                docs_candidate_groups.append(self._group_overlapping(matches))
+            instrumentation.count("entity_linker.candidates", len(matches))
+        instrumentation.count("entity_linker.docs", len(docs))
+        self._set_entities(docs, docs_candidate_groups, state.disambiguator)
         for doc in docs:
-            processed_doc = self(doc)
-            yield processed_doc
+            doc._.kg_version = state.version
+        return docs
 
-    def _remove_ambiguities(self, doc: Doc) -> Doc:
+    def update(
+        self,
+        added_triples: Iterable[Triple] = (),
+        removed_triples: Iterable[Triple] = (),
+        *,
+        graph_name: Optional[str] = None,
+    ) -> KnowledgeGraphUpdate:
+        """
+        Apply a diff to the knowledge graph and propagate it to the entity matcher.
+
+        The linker is not rebuilt, see EntityMatcher.update. The disambiguator is
+        rebuilt on the updated knowledge graph if the diff affects entities, see
+        Disambiguator.for_knowledge_graph.
+
+        Parameters
+        ----------
+        added_triples : Iterable[Triple], optional
+            The triples to add, by default ().
+        removed_triples : Iterable[Triple], optional
+            The triples to remove, by default ().
+        graph_name : Optional[str], optional
+            The name of the knowledge graph the diff applies to, for a federated
+            knowledge graph, by default None. See KnowledgeGraph.update.
+
+        Returns
+        -------
+        KnowledgeGraphUpdate
+            The changes of the affected entities.
+        """
+        with self._swap_lock:
+            state = self._state
+            kg_update = state.entity_matcher.update(
+                added_triples=added_triples,
+                removed_triples=removed_triples,
+                graph_name=graph_name,
+            )
+            if kg_update.entity_uris:
+                self._state = state._replace(
+                    disambiguator=state.disambiguator.for_knowledge_graph(state.kg)
+                )
+        return kg_update
+
+    def link_texts(
+        self, texts: Iterable[str], batch_size: Optional[int] = 1000
+    ) -> Iterator[List[Tuple[int, int, str]]]:
+        """
+        Link the entities of plain texts, without building full spaCy docs.
+
+        Texts are only tokenised, and neither the doc spans nor the doc ents are set.
+        If a text has ambiguous candidates, all its candidate groups are given to the
+        disambiguator at once, as spans, so that it sees the other candidates of the text
+        (see Disambiguator.disambiguate_batch). Spans are not created otherwise.
+        It suits high volumes of short texts, e.g. search queries.
+
+        Parameters
+        ----------
+        texts : Iterable[str]
+            The texts to process.
+        batch_size : Optional[int], optional
+            Number of texts to tokenise per batch, by default 1000.
+
+        Returns
+        -------
+        Iterator[List[Tuple[int, int, str]]]
+            For each text, its linked entities as (start char, end char, entity URI).
+        """
+        instrumentation = self.instrumentation
+        for doc in instrumentation.timed_iter(
+            "entity_linker.tokenize",
+            self.spacy_model.tokenizer.pipe(texts, batch_size=batch_size),
+        ):
+            state = self._state
+            entities = []
+            with instrumentation.timer("entity_linker.match"):
+                doc_matches = state.entity_matcher.match(doc)
+            with instrumentation.timer("entity_linker.group"):
+                candidate_groups = self._group_overlapping(doc_matches)
+            instrumentation.count("entity_linker.candidates", len(doc_matches))
+            instrumentation.count("entity_linker.docs")
+            n_ambiguous_groups = sum(len(matches) > 1 for matches in candidate_groups)
+            if n_ambiguous_groups:
+                instrumentation.count(
+                    "entity_linker.ambiguous_groups", n_ambiguous_groups
+                )
+                span_groups = [
+                    [
+                        Span(doc, start, end, label=label, span_id=entity_uri)
+                        for start, end, label, entity_uri in matches
+                    ]
+                    for matches in candidate_groups
+                ]
+                with instrumentation.timer("entity_linker.disambiguate"):
+                    candidate_groups = [
+                        [
+                            (span.start, span.end, span.label_, span.id_)
+                            for span in spans
+                        ]
+                        for spans in state.disambiguator.disambiguate_batch(span_groups)
+                    ]
+            for matches in candidate_groups:
+                for start, end, _, entity_uri in matches:
+                    end_token = doc[end - 1]
+                    entities.append(
+                        (doc[start].idx, end_token.idx + len(end_token), entity_uri)
+                    )
+            yield entities
+
+    def _remove_ambiguities(
+        self,
+        doc: Doc,
+        spans_key: Optional[str] = None,
+        matches: Optional[Sequence[Tuple[int, int, str, str]]] = None,
+    ) -> Doc:
         """
-        Check if the doc span group has overlap.
-        If it is the case, the disambiguator is used to determine the right candidate.
+        Group the overlapping candidate entities and keep one entity per group.
+        The disambiguator is only used for the groups of several candidates.
         Entities found are stored in the doc ents attribute.
 
+        Candidates are grouped with an array sweep over their boundaries, as tuples: spans
+        are only created for the candidates of the ambiguous groups and for the entities.
+
         Parameters
         ----------
         doc : Doc
             The spaCy doc to process.
+        spans_key : Optional[str], optional
+            The key of the candidate spans, by default the entity matcher spans key.
+            They are read only if the matches are not given.
+        matches : Optional[Sequence[Tuple[int, int, str, str]]], optional
+            The candidate entities as sorted (start token, end token, label, entity URI)
+            tuples, by default None: they are read from the doc spans.
 
         Returns
         -------
         Doc
             The spaCy doc processed.
         """
-        doc_entities = []
-        if doc.spans[self.entity_matcher.spans_key].has_overlap:
-            overlapping_spans = self._extract_overlapping_spans(doc)
-            for spans in overlapping_spans:
-                selected_entities = self.disambiguator(spans)
-                doc_entities.extend(selected_entities)
-        else:
-            doc_entities = doc.spans[self.entity_matcher.spans_key]
-        doc.set_ents(doc_entities)
+        if matches is None:
+            if spans_key is None:
+                spans_key = self.entity_matcher.spans_key
+            matches = [
+                (span.start, span.end, span.label_, span.id_)
+                for span in doc.spans[spans_key]
+            ]
+
+        self._set_entities(
+            [doc], [self._group_overlapping(matches)], self.disambiguator
+        )
         return doc
 
-    def _extract_overlapping_spans(self, doc: Doc) -> Iterable[Iterable[Span]]:
+    def _set_entities(
+        self,
+        docs: List[Doc],
+        docs_candidate_groups: List[List[Sequence[Tuple[int, int, str, str]]]],
+        disambiguator: Disambiguator,
+    ) -> None:
+        """
+        Disambiguate the candidate groups of several docs at once, and set the doc ents.
+
+        Spans are only created for the candidates of the ambiguous groups, given to the
+        disambiguator, and for the entities of the single candidate groups.
+
+        Parameters
+        ----------
+        docs : List[Doc]
+            The spaCy docs to modify.
+        docs_candidate_groups : List[List[Sequence[Tuple[int, int, str, str]]]]
+            The groups of overlapping candidate entities of each doc, as
+            (start token, end token, label, entity URI) tuples.
+        disambiguator : Disambiguator
+            The disambiguator of the knowledge graph version the docs are linked with.
+        """
+        ambiguous_groups = [
+            [
+                Span(doc, start, end, label=label, span_id=entity_uri)
+                for start, end, label, entity_uri in matches
+            ]
+            for doc, candidate_groups in zip(docs, docs_candidate_groups)
+            for matches in candidate_groups
+            if len(matches) > 1
+        ]
+        self.instrumentation.count(
+            "entity_linker.ambiguous_groups", len(ambiguous_groups)
+        )
+        with self.instrumentation.timer("entity_linker.disambiguate"):
+            selected_entities = iter(disambiguator.disambiguate_batch(ambiguous_groups))
+        for doc, candidate_groups in zip(docs, docs_candidate_groups):
+            doc_entities = []
+            for matches in candidate_groups:
+                if len(matches) > 1:
+                    doc_entities.extend(next(selected_entities))
+                else:
+                    start, end, label, entity_uri = matches[0]
+                    doc_entities.append(
+                        Span(doc, start, end, label=label, span_id=entity_uri)
+                    )
+            doc.set_ents(doc_entities)
+
+    def _extract_overlapping_spans(
+        self, doc: Doc, spans_key: Optional[str] = None
+    ) -> Iterable[Iterable[Span]]:
         """
         Group overlapping candidate entities spans together.
 
@@ -131,25 +540,69 @@ class EntityLinker:
         ----------
         doc : Doc
             The spaCy doc to process.
+        spans_key : Optional[str], optional
+            The key of the candidate spans, by default the entity matcher spans key.
 
         Returns
         -------
         Iterable[Iterable[Span]]
 
         """
-        overlapping_spans = []
-        entity_group = []
-        span_end = 0
-        for entity in doc.spans[self.entity_matcher.spans_key]:
-            if len(entity_group) == 0:
-                entity_group.append(entity)
-                span_end = entity.end
-            elif entity.start < span_end:
-                entity_group.append(entity)
-                span_end = max(span_end, entity.end)
-            else:
-                overlapping_spans.append(entity_group)
-                entity_group = [entity]
-                span_end = entity.end
-        overlapping_spans.append(entity_group)
-        return overlapping_spans
+        if spans_key is None:
+            spans_key = self.entity_matcher.spans_key
+        return self._group_overlapping(list(doc.spans[spans_key]))
+
+    @staticmethod
+    def _overlap_group_bounds(matches: Sequence) -> List[int]:
+        """
+        Find the bounds of the groups of overlapping matches, with an array sweep.
+
+        A match starts a new group when it starts after the end of all the previous
+        matches, i.e. after the running maximum of their ends.
+
+        Parameters
+        ----------
+        matches : Sequence
+            The matches, spans or (start, end, ...) tuples, sorted by start.
+
+        Returns
+        -------
+        List[int]
+            The index of the first match of each group, followed by the number of
+            matches: group i is matches[bounds[i]:bounds[i + 1]].
+        """
+        if not len(matches):
+            return [0]
+        if isinstance(matches[0], Span):
+            starts = np.fromiter(
+                (span.start for span in matches), np.int64, len(matches)
+            )
+            ends = np.fromiter((span.end for span in matches), np.int64, len(matches))
+        else:
+            starts = np.fromiter(
+                (match[0] for match in matches), np.int64, len(matches)
+            )
+            ends = np.fromiter((match[1] for match in matches), np.int64, len(matches))
+        new_groups = starts[1:] >= np.maximum.accumulate(ends)[:-1]
+        return [0] + (np.flatnonzero(new_groups) + 1).tolist() + [len(matches)]
+
+    @classmethod
+    def _group_overlapping(cls, matches: Sequence) -> List[List]:
+        """
+        Group overlapping matches together.
+
+        Parameters
+        ----------
+        matches : Sequence
+            The matches, spans or (start, end, ...) tuples, sorted by start.
+
+        Returns
+        -------
+        List[List]
+            The groups of overlapping matches.
+        """
+        group_bounds = cls._overlap_group_bounds(matches)
+        return [
+            list(matches[group_start:group_end])
+            for group_start, group_end in zip(group_bounds[:-1], group_bounds[1:])
+        ]
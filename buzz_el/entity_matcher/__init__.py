@@ -1,2 +1,6 @@
-from .entity_matcher import EntityMatcher
+from .aho_corasick_ruler import AhoCorasickRuler
+from .entity_matcher import EntityMatcher, has_content_word
 from .fuzzy_ruler import FuzzyRuler
+from .label_normalizer import LabelNormalizer
+from .ngram_fuzzy_ruler import NGramFuzzyMatcher, NGramFuzzyRuler
+from .phrase_ruler import PhraseRuler
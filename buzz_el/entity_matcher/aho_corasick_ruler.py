@@ -0,0 +1,503 @@
+import json
+from array import array
+from os import PathLike
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from spacy.language import Language
+from spacy.tokens import Doc, Span
+from spacy.util import ensure_path
+
+from ..graph import EntityPatterns
+from ..graph.snapshot import StringTable
+from .label_normalizer import LabelNormalizer
+
+# transitions are stored in a single dict, keyed by (state << _TOKEN_BITS) | token id
+_TOKEN_BITS = 32
+
+
+class AhoCorasickRuler:
+    """
+    An exact entity matcher based on an Aho-Corasick automaton over token sequences.
+
+    Patterns are tokenised with the spaCy tokenizer only, and their normalised tokens
+    (lower-cased if ignoring case, as the span ruler LOWER attribute, and mapped to
+    their label normaliser key if any) are interned as integer ids. The automaton goes
+    through the doc tokens once, whatever the number of patterns. Failure links are
+    computed lazily, before the first match following pattern additions.
+
+    Removed patterns are detached from the automaton states, and the automaton is rebuilt
+    from the live patterns once the detached ones outnumber them, so that the memory of a
+    ruler updated again and again stays bounded.
+
+    The automaton can be saved to disk and loaded back without re-tokenising patterns.
+
+    Attributes
+    ----------
+    spacy_model : Language
+        The spaCy model whose tokenizer is used to tokenise the patterns.
+    ignore_case : bool
+        Whether to ignore case.
+    spans_key : str
+        The spans key to use to store the matches found in the spaCy doc spans
+        attribute.
+    normalizer : Optional[LabelNormalizer]
+        The normaliser mapping the pattern and doc tokens to their keys, if any.
+    patterns : EntityPatterns
+        The patterns added to the ruler, pattern ids being their index.
+    """
+
+    def __init__(
+        self,
+        spacy_model: Language,
+        ignore_case: Optional[bool] = True,
+        spans_key: Optional[str] = None,
+        normalizer: Optional[LabelNormalizer] = None,
+    ) -> None:
+        """Initialiser for the Aho-Corasick ruler.
+
+        Parameters
+        ----------
+        spacy_model : Language
+            The spaCy model whose tokenizer is used to tokenise the patterns.
+        ignore_case : Optional[bool], optional
+            Whether to ignore case, by default True.
+        spans_key : Optional[str], optional
+            The spans key to use to store the matches found in the spaCy doc spans
+            attribute, by default "string".
+        normalizer : Optional[LabelNormalizer], optional
+            The normaliser mapping the pattern and doc tokens to their keys, by default
+            None (the token texts are used).
+        """
+        self.spacy_model = spacy_model
+        self.normalizer = normalizer
+        self.ignore_case = ignore_case
+        if spans_key is None:
+            spans_key = "string"
+        self.spans_key = spans_key
+
+        self._reset()
+
+    def _reset(self) -> None:
+        """Empty the patterns store and the automaton."""
+        self.patterns = EntityPatterns()
+        self._token_ids: Dict[str, int] = {}
+        # state 0 is the root, states are numbered in creation order
+        self._transitions: Dict[int, int] = {}
+        self._depths = array("I", [0])
+        self._state_patterns: Dict[int, List[int]] = {}
+        # final state of each pattern, 0 for the patterns without token
+        self._pattern_states = array("I")
+        # pattern ids of each entity URI, built on first removal
+        self._uri_pattern_ids: Optional[Dict[str, List[int]]] = None
+        # ids of the removed patterns, still in the patterns store
+        self._detached_pattern_ids: Set[int] = set()
+        self._failures: Optional[array] = None
+        self._output_links: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.patterns) - len(self._detached_pattern_ids)
+
+    def _doc_keys(self, doc: Doc) -> List[Optional[str]]:
+        """Normalise the tokens of a doc, None for the tokens to skip."""
+        if self.normalizer is None:
+            keys = [token.text for token in doc]
+        else:
+            keys = self.normalizer.doc_keys(doc)
+        if self.ignore_case:
+            keys = [key if key is None else key.lower() for key in keys]
+        return keys
+
+    def add_patterns(
+        self, patterns: Iterable[Dict[str, str]], batch_size: Optional[int] = 1000
+    ) -> None:
+        """
+        Add patterns to the ruler.
+
+        The pattern format is: `{label (str), pattern (str), id (str)}`.
+
+        Parameters
+        ----------
+        patterns: Iterable[Dict[str,str]]
+            The patterns to add.
+        batch_size : Optional[int], optional
+            Number of patterns to tokenise per batch, by default 1000.
+        """
+        first_pattern_id = len(self.patterns)
+        self.patterns.extend(patterns)
+        pattern_docs = self.spacy_model.tokenizer.pipe(
+            (
+                self.patterns.phrase(pattern_id)
+                for pattern_id in range(first_pattern_id, len(self.patterns))
+            ),
+            batch_size=batch_size,
+        )
+
+        for pattern_id, pattern_doc in enumerate(pattern_docs, first_pattern_id):
+            keys = [key for key in self._doc_keys(pattern_doc) if key is not None]
+            if not keys:
+                self._pattern_states.append(0)
+                continue
+            state = 0
+            for key in keys:
+                token_id = self._token_ids.setdefault(key, len(self._token_ids))
+                transition = (state << _TOKEN_BITS) | token_id
+                next_state = self._transitions.get(transition)
+                if next_state is None:
+                    next_state = self._transitions[transition] = len(self._depths)
+                    self._depths.append(self._depths[state] + 1)
+                state = next_state
+            self._state_patterns.setdefault(state, []).append(pattern_id)
+            self._pattern_states.append(state)
+
+        # the URI map is only built on the first removal, then kept up to date
+        if self._uri_pattern_ids is not None:
+            uris, pattern_uri_ids = self.patterns.uris, self.patterns.pattern_uri_ids
+            for pattern_id in range(first_pattern_id, len(self.patterns)):
+                self._uri_pattern_ids.setdefault(
+                    uris[pattern_uri_ids[pattern_id]], []
+                ).append(pattern_id)
+        self._failures = None
+        self._output_links = None
+
+    def remove_by_id(self, entity_uri: str) -> None:
+        """
+        Remove the patterns of an entity from the ruler.
+
+        The patterns are detached from the automaton states, the states themselves are
+        kept. They stay in the patterns store, so that pattern ids are unchanged, until
+        they outnumber the live patterns: the ruler is then rebuilt from the live ones.
+
+        Parameters
+        ----------
+        entity_uri : str
+            The URI of the entity.
+
+        Raises
+        ------
+        ValueError
+            If the ruler has no pattern for the entity.
+        """
+        if self._uri_pattern_ids is None:
+            self._uri_pattern_ids = {}
+            uris = self.patterns.uris
+            for pattern_id, uri_id in enumerate(self.patterns.pattern_uri_ids):
+                self._uri_pattern_ids.setdefault(uris[uri_id], []).append(pattern_id)
+
+        pattern_ids = self._uri_pattern_ids.pop(entity_uri, None)
+        if pattern_ids is None:
+            raise ValueError(f"No pattern with id '{entity_uri}' in the ruler.")
+        for pattern_id in pattern_ids:
+            # already removed, when the map was built from a loaded ruler
+            if pattern_id in self._detached_pattern_ids:
+                continue
+            self._detached_pattern_ids.add(pattern_id)
+            state = self._pattern_states[pattern_id]
+            state_pattern_ids = self._state_patterns.get(state, [])
+            if pattern_id not in state_pattern_ids:
+                continue
+            state_pattern_ids.remove(pattern_id)
+            if not state_pattern_ids:
+                del self._state_patterns[state]
+        # output links depend on the states with patterns
+        self._failures = None
+        self._output_links = None
+
+        # amortised: the live patterns are re-added after as many removals
+        if 2 * len(self._detached_pattern_ids) > len(self.patterns):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild the automaton and the patterns store from the live patterns.
+
+        It is a no-op if no pattern is removed. Pattern ids are renumbered.
+        """
+        if not self._detached_pattern_ids:
+            return
+        patterns, detached_pattern_ids = self.patterns, self._detached_pattern_ids
+        self._reset()
+        self.add_patterns(
+            patterns[pattern_id]
+            for pattern_id in range(len(patterns))
+            if pattern_id not in detached_pattern_ids
+        )
+
+    def _compile(self) -> None:
+        """Compute the failure and output links of the automaton, breadth first."""
+        children: Dict[int, List[Tuple[int, int]]] = {}
+        for transition, child in self._transitions.items():
+            children.setdefault(transition >> _TOKEN_BITS, []).append(
+                (transition & ((1 << _TOKEN_BITS) - 1), child)
+            )
+
+        failures = array("I", bytes(4 * len(self._depths)))
+        # nearest state with patterns along the failure chain, 0 if none
+        output_links = array("I", bytes(4 * len(self._depths)))
+        queue = [child for _, child in children.get(0, [])]
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for token_id, child in children.get(state, []):
+                failure = failures[state]
+                while (
+                    failure
+                    and ((failure << _TOKEN_BITS) | token_id) not in self._transitions
+                ):
+                    failure = failures[failure]
+                failures[child] = self._transitions.get(
+                    (failure << _TOKEN_BITS) | token_id, 0
+                )
+                output_links[child] = (
+                    failures[child]
+                    if failures[child] in self._state_patterns
+                    else output_links[failures[child]]
+                )
+                queue.append(child)
+
+        self._failures = failures
+        self._output_links = output_links
+
+    def match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+        """
+        Find the entity matches of a spaCy doc, without modifying it.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to match.
+
+        Returns
+        -------
+        List[Tuple[int, int, str, str]]
+            The sorted distinct matches as (start token, end token, label, entity URI).
+        """
+        if self._failures is None:
+            self._compile()
+        transitions = self._transitions
+        failures = self._failures
+        output_links = self._output_links
+        state_patterns = self._state_patterns
+
+        matched = set()
+        state = 0
+        # positions of the tokens not skipped, to find the start of the matches
+        positions = []
+        for position, key in enumerate(self._doc_keys(doc)):
+            if key is None:
+                continue
+            positions.append(position)
+            token_id = self._token_ids.get(key)
+            if token_id is None:
+                state = 0
+                continue
+            while state and ((state << _TOKEN_BITS) | token_id) not in transitions:
+                state = failures[state]
+            state = transitions.get((state << _TOKEN_BITS) | token_id, 0)
+
+            output_state = state if state in state_patterns else output_links[state]
+            while output_state:
+                start = positions[len(positions) - self._depths[output_state]]
+                for pattern_id in state_patterns[output_state]:
+                    matched.add((start, position + 1, pattern_id))
+                output_state = output_links[output_state]
+
+        uris = self.patterns.uris
+        entity_labels = self.patterns.entity_labels
+        pattern_uri_ids = self.patterns.pattern_uri_ids
+        pattern_entity_label_ids = self.patterns.pattern_entity_label_ids
+        return sorted(
+            {
+                (
+                    start,
+                    end,
+                    entity_labels[pattern_entity_label_ids[pattern_id]],
+                    uris[pattern_uri_ids[pattern_id]],
+                )
+                for start, end, pattern_id in matched
+            }
+        )
+
+    def __call__(self, doc: Doc) -> Doc:
+        """
+        Apply the ruler to a spaCy doc.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to process.
+
+        Returns
+        -------
+        Doc
+            The spaCy doc processed.
+        """
+        self.set_annotations(doc, self.match(doc))
+        return doc
+
+    def set_annotations(
+        self, doc: Doc, matches: List[Tuple[int, int, str, str]]
+    ) -> None:
+        """
+        Modify the spaCy doc with matches information in the spans attribute.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to modify.
+        matches : List[Tuple[int, int, str, str]]
+            The sorted distinct matches found by the ruler.
+        """
+        doc.spans[self.spans_key] = [
+            Span(doc, start, end, label=label, span_id=entity_uri)
+            for start, end, label, entity_uri in matches
+        ]
+
+    def to_disk(self, path: PathLike) -> None:
+        """Save the automaton and its patterns to a numpy npz file.
+
+        The removed patterns are dropped first, see compact.
+
+        Parameters
+        ----------
+        path : PathLike
+            The file path.
+        """
+        self.compact()
+        if self._failures is None:
+            self._compile()
+        tokens = [None] * len(self._token_ids)
+        for token, token_id in self._token_ids.items():
+            tokens[token_id] = token
+        state_pattern_states = np.array(list(self._state_patterns), dtype=np.int64)
+        state_pattern_lens = np.array(
+            [len(pattern_ids) for pattern_ids in self._state_patterns.values()],
+            dtype=np.int64,
+        )
+
+        sections = {
+            "ignore_case": np.array([self.ignore_case]),
+            "normalizer_config": np.array(
+                [
+                    json.dumps(
+                        None if self.normalizer is None else self.normalizer.to_config()
+                    )
+                ]
+            ),
+            "transition_keys": np.fromiter(self._transitions.keys(), dtype=np.int64),
+            "transition_states": np.fromiter(
+                self._transitions.values(), dtype=np.int64
+            ),
+            "depths": np.asarray(self._depths, dtype=np.uint32),
+            "failures": np.asarray(self._failures, dtype=np.uint32),
+            "output_links": np.asarray(self._output_links, dtype=np.uint32),
+            "state_pattern_states": state_pattern_states,
+            "state_pattern_lens": state_pattern_lens,
+            "state_pattern_ids": np.array(
+                [
+                    pattern_id
+                    for pattern_ids in self._state_patterns.values()
+                    for pattern_id in pattern_ids
+                ],
+                dtype=np.int64,
+            ),
+            "phrase_offsets": np.asarray(self.patterns.phrase_offsets, dtype=np.uint64),
+            "phrase_data": np.frombuffer(bytes(self.patterns.phrase_data), np.uint8),
+            "pattern_uri_ids": np.asarray(self.patterns.pattern_uri_ids, np.uint32),
+            "pattern_entity_label_ids": np.asarray(
+                self.patterns.pattern_entity_label_ids, np.uint32
+            ),
+        }
+        for name, strings in [
+            ("tokens", tokens),
+            ("uris", self.patterns.uris),
+            ("entity_labels", self.patterns.entity_labels),
+        ]:
+            table = StringTable.from_strings(strings)
+            sections[f"{name}_offsets"] = table.offsets
+            sections[f"{name}_data"] = table.data
+
+        with open(ensure_path(path), "wb") as ruler_file:
+            np.savez(ruler_file, **sections)
+
+    @classmethod
+    def from_disk(
+        cls,
+        path: PathLike,
+        spacy_model: Language,
+        spans_key: Optional[str] = None,
+    ) -> "AhoCorasickRuler":
+        """Load a ruler saved with to_disk.
+
+        Loaded patterns are read-only, the ruler must be rebuilt to add new ones.
+
+        Parameters
+        ----------
+        path : PathLike
+            The file path.
+        spacy_model : Language
+            The spaCy model whose tokenizer is used to tokenise the patterns.
+        spans_key : Optional[str], optional
+            The spans key to use to store the matches found in the spaCy doc spans
+            attribute, by default "string".
+
+        Returns
+        -------
+        AhoCorasickRuler
+            The loaded ruler.
+        """
+        with np.load(ensure_path(path)) as sections:
+            sections = dict(sections)
+
+        def string_table(name: str) -> StringTable:
+            return StringTable(sections[f"{name}_offsets"], sections[f"{name}_data"])
+
+        normalizer_config = None
+        if "normalizer_config" in sections:
+            normalizer_config = json.loads(str(sections["normalizer_config"][0]))
+        ruler = cls(
+            spacy_model,
+            ignore_case=bool(sections["ignore_case"][0]),
+            spans_key=spans_key,
+            normalizer=(
+                None
+                if normalizer_config is None
+                else LabelNormalizer(**normalizer_config)
+            ),
+        )
+        ruler.patterns = EntityPatterns.from_buffers(
+            uris=list(string_table("uris")),
+            entity_labels=list(string_table("entity_labels")),
+            phrase_offsets=sections["phrase_offsets"],
+            phrase_data=sections["phrase_data"],
+            pattern_uri_ids=sections["pattern_uri_ids"],
+            pattern_entity_label_ids=sections["pattern_entity_label_ids"],
+        )
+        ruler._token_ids = {
+            token: token_id for token_id, token in enumerate(string_table("tokens"))
+        }
+        ruler._transitions = dict(
+            zip(
+                sections["transition_keys"].tolist(),
+                sections["transition_states"].tolist(),
+            )
+        )
+        ruler._depths = array("I", sections["depths"].tolist())
+        ruler._failures = array("I", sections["failures"].tolist())
+        ruler._output_links = array("I", sections["output_links"].tolist())
+        state_pattern_ids = np.split(
+            sections["state_pattern_ids"],
+            np.cumsum(sections["state_pattern_lens"])[:-1],
+        )
+        ruler._state_patterns = {
+            state: pattern_ids.tolist()
+            for state, pattern_ids in zip(
+                sections["state_pattern_states"].tolist(), state_pattern_ids
+            )
+        }
+        pattern_states = np.zeros(len(ruler.patterns), dtype=np.uint32)
+        pattern_states[sections["state_pattern_ids"]] = np.repeat(
+            sections["state_pattern_states"], sections["state_pattern_lens"]
+        )
+        ruler._pattern_states = array("I", pattern_states.tolist())
+        return ruler
@@ -1,11 +1,37 @@
-from typing import Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from spacy.language import Language
 from spacy.pipeline import SpanRuler
-from spacy.tokens import Doc
+from spacy.tokens import Doc, Span
 
-from ..graph import KnowledgeGraph
+from ..commons.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from ..commons.parallel import multiprocess_pipe
+from ..graph import KnowledgeGraph, KnowledgeGraphUpdate
+from ..graph.knowledge_graph import Triple
+from .aho_corasick_ruler import AhoCorasickRuler
 from .fuzzy_ruler import FuzzyRuler
+from .label_normalizer import LabelNormalizer
+from .ngram_fuzzy_ruler import NGramFuzzyRuler
+from .phrase_ruler import PhraseRuler
+
+
+def has_content_word(span: Span) -> bool:
+    """
+    Check whether a token span has a word other than a stop word, a cheap hybrid mode
+    fuzzy prefilter.
+
+    Parameters
+    ----------
+    span : Span
+        The token span.
+
+    Returns
+    -------
+    bool
+        Whether a token is alphabetic and not a stop word.
+    """
+    return any(token.is_alpha and not token.is_stop for token in span)
 
 
 class EntityMatcher:
@@ -30,14 +56,34 @@ class EntityMatcher:
         It corresponds to min_r parameter in spaczz FuzzyMatcher.
         Minimum ratio needed to match as a value between 0 and 100.
         Default is 0, which deactivates this behavior.
+    fuzzy_engine : str
+        The fuzzy matching engine, either "spaczz" (spaczz FuzzyMatcher) or "ngram"
+        (character n-gram candidate blocking, suited to large knowledge graphs).
+    string_engine : str
+        The string matching engine, either "span_ruler" (spaCy phrase matcher, as the
+        spaCy SpanRuler) or "aho_corasick" (Aho-Corasick automaton, suited to very large
+        label dictionaries).
+    label_normalizer : Optional[LabelNormalizer]
+        The normaliser catching the label variants with exact matching, if any.
+    hybrid : bool
+        Whether fuzzy matching is restricted to the text not covered by exact matches.
+    fuzzy_prefilter : Optional[Callable[[Span], bool]]
+        In hybrid mode, the check of the uncovered text spans worth fuzzy matching, if
+        any.
     spans_key : string
         Key to use to get entity matches in spaCy doc spans.
+    instrumentation : Instrumentation
+        The instrumentation recording the matching wall time ("entity_matcher.match")
+        and the number of matches ("entity_matcher.matches").
     _string_matcher: Callable[spacy.tokens.Doc, spacy.tokens.Doc]
         The string matcher component matching entities through string alignment.
     _fuzzy_matcher: Callable[spacy.tokens.Doc, spacy.tokens.Doc]
         The fuzzy matcher component matching entities through string fuzzy alignment.
     """
 
+    fuzzy_engines = {"spaczz": FuzzyRuler, "ngram": NGramFuzzyRuler}
+    string_engines = ("span_ruler", "aho_corasick")
+
     def __init__(
         self,
         knowledge_graph: KnowledgeGraph,
@@ -45,6 +91,12 @@ class EntityMatcher:
         ignore_case: Optional[bool] = True,
         use_fuzzy: Optional[bool] = False,
         fuzzy_threshold: Optional[int] = None,
+        fuzzy_engine: Optional[str] = "spaczz",
+        string_engine: Optional[str] = "span_ruler",
+        instrumentation: Optional[Instrumentation] = None,
+        label_normalizer: Optional[LabelNormalizer] = None,
+        hybrid: Optional[bool] = False,
+        fuzzy_prefilter: Optional[Callable[[Span], bool]] = None,
     ) -> None:
         """Initialiser for the entity matcher.
 
@@ -62,22 +114,96 @@ class EntityMatcher:
             It corresponds to min_r parameter in spaczz FuzzyMatcher.
             Minimum ratio needed to match as a value between 0 and 100.
             Default is 0, which deactivates this behavior.
+        fuzzy_engine : Optional[str], optional
+            The fuzzy matching engine, either "spaczz" or "ngram", by default "spaczz".
+        string_engine : Optional[str], optional
+            The string matching engine, either "span_ruler" or "aho_corasick",
+            by default "span_ruler".
+        instrumentation : Optional[Instrumentation], optional
+            The instrumentation recording the matching stage, by default None (nothing
+            is recorded).
+        label_normalizer : Optional[LabelNormalizer], optional
+            The normaliser catching the label variants (accents, hyphens, plurals...),
+            by default None. The Aho-Corasick engine matches the normalised keys of the
+            pattern and doc tokens, the other engines are given the label variants as
+            extra patterns.
+        hybrid : Optional[bool], optional
+            Whether to run the string matcher first, and the fuzzy matcher only on the
+            token spans not covered by exact matches, by default False. It needs
+            use_fuzzy, and both matchers results are stored under the "hybrid" spans key.
+        fuzzy_prefilter : Optional[Callable[[Span], bool]], optional
+            In hybrid mode, a cheap check of the uncovered token spans: only the spans
+            passing it are fuzzy matched, by default None (all of them are), see
+            has_content_word.
+
+        Raises
+        ------
+        ValueError
+            If the fuzzy or string engine is unknown, or hybrid mode is set without
+            fuzzy matching.
         """
+        if fuzzy_engine not in self.fuzzy_engines:
+            raise ValueError(
+                f"Unknown fuzzy engine '{fuzzy_engine}', "
+                f"expected one of {tuple(self.fuzzy_engines)}."
+            )
+        if string_engine not in self.string_engines:
+            raise ValueError(
+                f"Unknown string engine '{string_engine}', "
+                f"expected one of {self.string_engines}."
+            )
+        if hybrid and not use_fuzzy:
+            raise ValueError("The hybrid mode needs fuzzy matching, set use_fuzzy.")
+
         self.spacy_model = spacy_model
         self.kg = knowledge_graph
         self.ignore_case = ignore_case
         self.use_fuzzy = use_fuzzy
         self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_engine = fuzzy_engine
+        self.string_engine = string_engine
+        self.label_normalizer = label_normalizer
+        self.hybrid = hybrid
+        self.fuzzy_prefilter = fuzzy_prefilter
+        self.instrumentation = (
+            NO_INSTRUMENTATION if instrumentation is None else instrumentation
+        )
 
         self._string_matcher = None
         self._fuzzy_matcher = None
-        if self.use_fuzzy:
+        if self.hybrid:
+            self.spans_key = "hybrid"
+            self.build_string_matcher()
+            self.build_fuzzy_matcher()
+        elif self.use_fuzzy:
             self.spans_key = "fuzzy"
             self.build_fuzzy_matcher()
         else:
             self.spans_key = "string"
             self.build_string_matcher()
 
+    def options(self) -> Dict[str, Any]:
+        """
+        Get the matcher options, to build a matcher of another knowledge graph.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The initialiser keyword arguments, other than the knowledge graph and the
+            spaCy model.
+        """
+        return {
+            "ignore_case": self.ignore_case,
+            "use_fuzzy": self.use_fuzzy,
+            "fuzzy_threshold": self.fuzzy_threshold,
+            "fuzzy_engine": self.fuzzy_engine,
+            "string_engine": self.string_engine,
+            "instrumentation": self.instrumentation,
+            "label_normalizer": self.label_normalizer,
+            "hybrid": self.hybrid,
+            "fuzzy_prefilter": self.fuzzy_prefilter,
+        }
+
     def __call__(self, doc: Doc) -> Doc:
         """
         Apply the entity matching to a spaCy doc.
@@ -92,33 +218,224 @@ class EntityMatcher:
         Doc
             The spaCy doc processed.
         """
-        if (self._string_matcher is None) and (self._fuzzy_matcher is None):
-            self.build_string_matcher()
-            doc = self._string_matcher(doc)
-        elif self._fuzzy_matcher is not None:
-            doc = self._fuzzy_matcher(doc)
-        else:
-            doc = self._string_matcher(doc)
+        with self.instrumentation.timer("entity_matcher.match"):
+            if self.hybrid:
+                self.set_annotations(doc, self._match(doc))
+            elif (self._string_matcher is None) and (self._fuzzy_matcher is None):
+                self.build_string_matcher()
+                doc = self._string_matcher(doc)
+            elif self._fuzzy_matcher is not None:
+                doc = self._fuzzy_matcher(doc)
+            else:
+                doc = self._string_matcher(doc)
+        self.instrumentation.count(
+            "entity_matcher.matches", len(doc.spans.get(self.spans_key, ()))
+        )
 
         return doc
 
-    def pipe(self, docs: Iterable[Doc]) -> Iterable[Doc]:
+    def match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+        """
+        Find the entity matches of a spaCy doc, without modifying it.
+
+        No span is created, which makes it cheaper than calling the matcher when only the
+        matches are needed.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to match.
+
+        Returns
+        -------
+        List[Tuple[int, int, str, str]]
+            The sorted distinct matches as (start token, end token, label, entity URI).
+        """
+        with self.instrumentation.timer("entity_matcher.match"):
+            matches = self._match(doc)
+        self.instrumentation.count("entity_matcher.matches", len(matches))
+        return matches
+
+    def _match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+        """Find the sorted distinct entity matches of a spaCy doc, see match."""
+        if self.hybrid:
+            matches = self._string_match(doc)
+            matches.extend(self._fuzzy_match_uncovered(doc, matches))
+            return sorted(matches)
+        if self._fuzzy_matcher is not None:
+            return self._fuzzy_match(doc)
+        return self._string_match(doc)
+
+    def _string_match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+        """Find the sorted distinct string matches of a spaCy doc."""
+        if self._string_matcher is None:
+            self.build_string_matcher()
+        ruler = self._string_matcher
+        if not isinstance(ruler, SpanRuler):
+            return ruler.match(doc)
+        # custom span ruler config, its public match method builds the spans
+        return sorted(
+            {(span.start, span.end, span.label_, span.id_) for span in ruler.match(doc)}
+        )
+
+    def _fuzzy_match(
+        self, doc: Doc, offset: Optional[int] = 0
+    ) -> List[Tuple[int, int, str, str]]:
+        """Find the sorted distinct fuzzy matches of a spaCy doc, shifted by an offset."""
+        matches = set()
+        for label_with_id, start, end, _, _ in self._fuzzy_matcher.matcher(doc):
+            if start != end:
+                label, _, entity_uri = label_with_id.partition("#")
+                matches.add((start + offset, end + offset, label, entity_uri))
+        return sorted(matches)
+
+    def _fuzzy_match_uncovered(
+        self, doc: Doc, matches: List[Tuple[int, int, str, str]]
+    ) -> List[Tuple[int, int, str, str]]:
+        """
+        Fuzzy match the maximal token spans of a doc not covered by the given matches.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc.
+        matches : List[Tuple[int, int, str, str]]
+            The exact matches.
+
+        Returns
+        -------
+        List[Tuple[int, int, str, str]]
+            The fuzzy matches of the uncovered spans, in doc token positions.
+        """
+        covered = np.zeros(len(doc) + 2, dtype=np.int8)
+        for start, end, _, _ in matches:
+            covered[start + 1 : end + 1] = 1
+        covered[0] = covered[-1] = 1
+        # uncovered runs start after a covered token and end before one
+        boundaries = np.diff(covered)
+        region_starts = np.flatnonzero(boundaries == -1)
+        region_ends = np.flatnonzero(boundaries == 1)
+
+        fuzzy_matches = []
+        for start, end in zip(region_starts.tolist(), region_ends.tolist()):
+            region = doc[start:end]
+            if self.fuzzy_prefilter is not None and not self.fuzzy_prefilter(region):
+                continue
+            if start == 0 and end == len(doc):
+                fuzzy_matches.extend(self._fuzzy_match(doc))
+            else:
+                fuzzy_matches.extend(self._fuzzy_match(region.as_doc(), offset=start))
+        return fuzzy_matches
+
+    def set_annotations(
+        self, doc: Doc, matches: List[Tuple[int, int, str, str]]
+    ) -> None:
+        """
+        Modify the spaCy doc with matches information in the spans attribute.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to modify.
+        matches : List[Tuple[int, int, str, str]]
+            The sorted distinct matches, see match.
+        """
+        doc.spans[self.spans_key] = [
+            Span(doc, start, end, label=label, span_id=entity_uri)
+            for start, end, label, entity_uri in matches
+        ]
+
+    def pipe(
+        self,
+        docs: Iterable[Doc],
+        batch_size: Optional[int] = 128,
+        n_process: Optional[int] = 1,
+    ) -> Iterable[Doc]:
         """
         Apply the entity matching component to an iterable of spaCy docs.
 
+        With several processes, batches of docs are processed by forked worker processes
+        sharing this component, and the processed docs are returned in the input order.
+        They are then copies of the input docs.
+
         Parameters
         ----------
         docs : Iterable[Doc]
             An iterable of spaCy docs to process.
+        batch_size : Optional[int], optional
+            Number of docs sent to a worker process at once, by default 128.
+        n_process : Optional[int], optional
+            Number of worker processes, -1 for the number of CPU cores, by default 1.
 
         Returns
         -------
         Iterable[Doc]
             An iterable of processed spaCy docs.
         """
-        for doc in docs:
-            processed_doc = self(doc)
-            yield processed_doc
+        return multiprocess_pipe(
+            self,
+            self.spacy_model.vocab,
+            docs,
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+
+    def update(
+        self,
+        added_triples: Iterable[Triple] = (),
+        removed_triples: Iterable[Triple] = (),
+        *,
+        graph_name: Optional[str] = None,
+    ) -> KnowledgeGraphUpdate:
+        """
+        Apply a diff to the knowledge graph and propagate it to the matchers.
+
+        Parameters
+        ----------
+        added_triples : Iterable[Triple], optional
+            The triples to add, by default ().
+        removed_triples : Iterable[Triple], optional
+            The triples to remove, by default ().
+        graph_name : Optional[str], optional
+            The name of the knowledge graph the diff applies to, for a federated
+            knowledge graph, by default None. See KnowledgeGraph.update.
+
+        Returns
+        -------
+        KnowledgeGraphUpdate
+            The changes of the affected entities.
+        """
+        kg_update = self.kg.update(
+            added_triples=added_triples,
+            removed_triples=removed_triples,
+            graph_name=graph_name,
+        )
+        self.apply_kg_update(kg_update)
+        return kg_update
+
+    def apply_kg_update(self, kg_update: KnowledgeGraphUpdate) -> None:
+        """
+        Replace the patterns of the entities affected by a knowledge graph update.
+
+        Only these entities patterns are removed from and added to the matchers, which
+        are not rebuilt. With a custom span ruler config, the patterns are removed with
+        SpanRuler.remove_by_id, which goes through all the patterns for each entity.
+
+        Parameters
+        ----------
+        kg_update : KnowledgeGraphUpdate
+            The knowledge graph update, see KnowledgeGraph.update.
+        """
+        for ruler in (self._string_matcher, self._fuzzy_matcher):
+            if ruler is None:
+                continue
+            for entity_uri in kg_update.entity_uris:
+                try:
+                    ruler.remove_by_id(entity_uri)
+                except ValueError:
+                    # new entity, without previous patterns
+                    pass
+            ruler.add_patterns(self._ruler_patterns(ruler, kg_update.entity_patterns))
 
     def build_string_matcher(self, config: Optional[Dict] = None) -> None:
         """
@@ -129,18 +446,25 @@ class EntityMatcher:
         Parameters
         ----------
         config : Optional[Dict], optional
-            Configuration for the spaCy span ruler, by default None.
-            See: <https://spacy.io/api/spanruler#config>
-        """
-        if config is None:
-            string_matcher_config = {"spans_key": "string"}
-            if self.ignore_case:
-                string_matcher_config["phrase_matcher_attr"] = "LOWER"
-            ruler = SpanRuler(self.spacy_model, **string_matcher_config)
+            Configuration for the spaCy span ruler, by default None: a phrase ruler is
+            built. See: <https://spacy.io/api/spanruler#config>
+            It is not used by the Aho-Corasick engine.
+        """
+        if self.string_engine == "aho_corasick":
+            ruler = AhoCorasickRuler(
+                self.spacy_model,
+                ignore_case=self.ignore_case,
+                spans_key="string",
+                normalizer=self.label_normalizer,
+            )
+        elif config is None:
+            ruler = PhraseRuler(
+                self.spacy_model, ignore_case=self.ignore_case, spans_key="string"
+            )
         else:
             ruler = SpanRuler(self.spacy_model, **config)
 
-        ruler.add_patterns(self.kg.entity_patterns)
+        ruler.add_patterns(self._ruler_patterns(ruler, self.kg.entity_patterns))
 
         self._string_matcher = ruler
 
@@ -155,22 +479,26 @@ class EntityMatcher:
         config : Optional[Dict], optional
             Configuration for the custom fuzzy ruler, by default None.
             See: <https://spaczz.readthedocs.io/en/latest/reference.html#spaczz.matcher.FuzzyMatcher.defaults>
+            for the spaczz engine and NGramFuzzyMatcher for the ngram engine.
         """
-        if config is not None:
-            ruler = FuzzyRuler(
-                spacy_model=self.spacy_model,
-                ignore_case=self.ignore_case,
-                spans_key=self.spans_key,
-                fuzzy_threshold=self.fuzzy_threshold,
-                **config,
-            )
-        else:
-            ruler = FuzzyRuler(
-                spacy_model=self.spacy_model,
-                ignore_case=self.ignore_case,
-                spans_key=self.spans_key,
-                fuzzy_threshold=self.fuzzy_threshold,
-            )
+        ruler = self.fuzzy_engines[self.fuzzy_engine](
+            spacy_model=self.spacy_model,
+            ignore_case=self.ignore_case,
+            spans_key=self.spans_key,
+            fuzzy_threshold=self.fuzzy_threshold,
+            config=config,
+        )
 
-        ruler.add_patterns(self.kg.entity_patterns)
+        ruler.add_patterns(self._ruler_patterns(ruler, self.kg.entity_patterns))
         self._fuzzy_matcher = ruler
+
+    def _ruler_patterns(
+        self, ruler: Any, patterns: Iterable[Dict[str, str]]
+    ) -> Iterable[Dict[str, str]]:
+        """
+        Get the patterns to add to a ruler: the label variants are added for the rulers
+        not normalising the tokens themselves.
+        """
+        if self.label_normalizer is None or isinstance(ruler, AhoCorasickRuler):
+            return patterns
+        return self.label_normalizer.expand_patterns(patterns)
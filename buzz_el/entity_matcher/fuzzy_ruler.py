@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from spacy.language import Language
 from spacy.tokens import Doc, Span
@@ -65,25 +65,88 @@ class FuzzyRuler:
         if self.fuzzy_threshold is not None:
             config["min_r"] = self.fuzzy_threshold
 
-        self.matcher = FuzzyMatcher(
+        self.matcher = self._build_matcher(config)
+        # matcher labels (label#id) of each entity URI, to remove entities
+        self._labels_by_id: Dict[str, Set[str]] = {}
+
+    def _build_matcher(self, config: Dict) -> FuzzyMatcher:
+        """
+        Build the fuzzy matcher the patterns are added to.
+
+        Parameters
+        ----------
+        config : Dict
+            Configuration for the fuzzy matcher.
+
+        Returns
+        -------
+        FuzzyMatcher
+            The spaczz fuzzy matcher.
+        """
+        return FuzzyMatcher(
             vocab=self.spacy_model.vocab, ignore_case=self.ignore_case, **config
         )
 
-    def add_patterns(self, patterns: List[Dict[str, str]]) -> None:
+    def add_patterns(
+        self, patterns: Iterable[Dict[str, str]], batch_size: Optional[int] = 1000
+    ) -> None:
         """
         Add patterns to the ruler.
 
         The spaczz pattern adapted to our case is:
         `{label (str), pattern (str), id (str)}`.
 
+        Pattern docs are only tokenised (no other pipeline component is needed by the fuzzy
+        matcher), in batches, and added to the matcher with one call per entity.
+
         Parameters
         ----------
-        patterns: List[Dict[str,str]]
+        patterns: Iterable[Dict[str,str]]
             The patterns to add.
+        batch_size : Optional[int], optional
+            Number of patterns to tokenise per batch, by default 1000.
         """
+        pattern_texts_by_label = {}
         for pattern in patterns:
             label_with_id = f"{pattern['label']}#{pattern['id']}"
-            self.matcher.add(label_with_id, [self.spacy_model(pattern["pattern"])])
+            self._labels_by_id.setdefault(pattern["id"], set()).add(label_with_id)
+            pattern_texts_by_label.setdefault(label_with_id, []).append(
+                pattern["pattern"]
+            )
+
+        pattern_docs = self.spacy_model.tokenizer.pipe(
+            (
+                pattern_text
+                for pattern_texts in pattern_texts_by_label.values()
+                for pattern_text in pattern_texts
+            ),
+            batch_size=batch_size,
+        )
+        for label_with_id, pattern_texts in pattern_texts_by_label.items():
+            self.matcher.add(
+                label_with_id, [next(pattern_docs) for _ in range(len(pattern_texts))]
+            )
+
+    def remove_by_id(self, entity_uri: str) -> None:
+        """
+        Remove the patterns of an entity from the ruler.
+
+        Parameters
+        ----------
+        entity_uri : str
+            The URI of the entity.
+
+        Raises
+        ------
+        ValueError
+            If the ruler has no pattern for the entity.
+        """
+        labels_with_id = self._labels_by_id.pop(entity_uri, None)
+        if labels_with_id is None:
+            raise ValueError(f"No pattern with id '{entity_uri}' in the fuzzy ruler.")
+        for label_with_id in labels_with_id:
+            if label_with_id in self.matcher:
+                self.matcher.remove(label_with_id)
 
     def __call__(self, doc: Doc) -> Doc:
         """
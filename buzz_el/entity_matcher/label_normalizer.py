@@ -0,0 +1,316 @@
+import re
+import unicodedata
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from spacy.tokens import Doc
+
+from ..graph import EntityPatterns
+
+# punctuation joining the parts of a word, e.g. "fior-di-latte" or "and/or"
+CONNECTORS = frozenset("-‐‑‒–—_/")
+
+# the same connectors, between two word characters
+_CONNECTOR_PATTERN = re.compile(
+    r"(?<=\w)[" + re.escape("".join(sorted(CONNECTORS))) + r"](?=\w)"
+)
+
+
+def _fold(text: str, fold_unicode: bool, strip_accents: bool) -> str:
+    """Apply the Unicode folding and accent stripping to a text."""
+    if fold_unicode:
+        text = unicodedata.normalize("NFKC", text)
+    if strip_accents:
+        text = "".join(
+            character
+            for character in unicodedata.normalize("NFKD", text)
+            if not unicodedata.combining(character)
+        )
+    return text
+
+
+def _normalize(
+    fold_unicode: bool,
+    strip_accents: bool,
+    collapse_punctuation: bool,
+    fold_plurals: bool,
+    token_text: str,
+) -> str:
+    """Get the key of a token text, see LabelNormalizer.normalize."""
+    key = _fold(token_text, fold_unicode, strip_accents)
+    if collapse_punctuation and not all(character in CONNECTORS for character in key):
+        key = "".join(character for character in key if character not in CONNECTORS)
+    if fold_plurals:
+        key = LabelNormalizer.singularize(key)
+    return key
+
+
+@lru_cache(maxsize=None)
+def _cached_normalize(
+    fold_unicode: bool,
+    strip_accents: bool,
+    collapse_punctuation: bool,
+    fold_plurals: bool,
+    cache_size: int,
+) -> Callable[[str], str]:
+    """Get the cached key function of some normaliser settings.
+
+    It is shared by the normalisers with the same settings, and kept out of their
+    attributes so that they can be pickled, e.g. for worker processes.
+    """
+    return lru_cache(maxsize=cache_size)(
+        partial(
+            _normalize, fold_unicode, strip_accents, collapse_punctuation, fold_plurals
+        )
+    )
+
+
+class LabelNormalizer:
+    """
+    A normaliser of entity labels and doc tokens, so that exact matching catches the
+    common variants of a label.
+
+    It can be used in two ways:
+
+    - as a key function (normalize and doc_keys): each pattern and doc token is mapped
+      to a normalised key, connector punctuation tokens attached to both neighbours
+      being skipped. "Fior-di-latte" and "fior di latte" get the same keys. It is used
+      by the Aho-Corasick ruler.
+    - as a pattern expansion (expand and expand_patterns): the variants of each label
+      are added as extra patterns at build time, for the matchers comparing the raw
+      token texts, e.g. the span ruler.
+
+    Plural folding relies on simple English suffix rules, so it is disabled by default
+    and should only be enabled for English.
+
+    Attributes
+    ----------
+    fold_unicode : bool
+        Whether to apply the Unicode NFKC normalisation, e.g. to fold ligatures and
+        full-width characters.
+    strip_accents : bool
+        Whether to remove the accents.
+    collapse_punctuation : bool
+        Whether to ignore the punctuation joining word parts, e.g. hyphens.
+    fold_plurals : bool
+        Whether to map plural and singular forms to the same key.
+    """
+
+    def __init__(
+        self,
+        fold_unicode: Optional[bool] = True,
+        strip_accents: Optional[bool] = True,
+        collapse_punctuation: Optional[bool] = True,
+        fold_plurals: Optional[bool] = False,
+        cache_size: Optional[int] = 2**16,
+    ) -> None:
+        """Initialise the label normaliser.
+
+        Parameters
+        ----------
+        fold_unicode : Optional[bool], optional
+            Whether to apply the Unicode NFKC normalisation, by default True.
+        strip_accents : Optional[bool], optional
+            Whether to remove the accents, by default True.
+        collapse_punctuation : Optional[bool], optional
+            Whether to ignore the punctuation joining word parts, by default True.
+        fold_plurals : Optional[bool], optional
+            Whether to map plural and singular forms of English words to the same key,
+            by default False.
+        cache_size : Optional[int], optional
+            Number of token texts whose key is cached, by default 2**16.
+        """
+        self.fold_unicode = fold_unicode
+        self.strip_accents = strip_accents
+        self.collapse_punctuation = collapse_punctuation
+        self.fold_plurals = fold_plurals
+        self.cache_size = cache_size
+        # token texts repeat a lot, keys are only computed once per distinct text
+        self._normalize = _cached_normalize(**self.to_config())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["_normalize"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._normalize = _cached_normalize(**self.to_config())
+
+    def to_config(self) -> Dict[str, Union[bool, int]]:
+        """Get the normaliser settings, to build it again.
+
+        Returns
+        -------
+        Dict[str, Union[bool, int]]
+            The initialiser keyword arguments.
+        """
+        return {
+            "fold_unicode": self.fold_unicode,
+            "strip_accents": self.strip_accents,
+            "collapse_punctuation": self.collapse_punctuation,
+            "fold_plurals": self.fold_plurals,
+            "cache_size": self.cache_size,
+        }
+
+    @staticmethod
+    def singularize(word: str) -> str:
+        """Get the singular form of an English word, with simple suffix rules.
+
+        Parameters
+        ----------
+        word : str
+            The word.
+
+        Returns
+        -------
+        str
+            The singular form, the word itself if it does not look plural.
+        """
+        lower_word = word.lower()
+        if len(word) < 4 or not word.isalpha():
+            return word
+        if lower_word.endswith("ies"):
+            return word[:-3] + ("Y" if word[-1].isupper() else "y")
+        if lower_word.endswith(("sses", "xes", "zes", "ches", "shes", "oes")):
+            return word[:-2]
+        if lower_word.endswith("s") and not lower_word.endswith(("ss", "us", "is")):
+            return word[:-1]
+        return word
+
+    @staticmethod
+    def pluralize(word: str) -> str:
+        """Get the plural form of an English word, with simple suffix rules.
+
+        Parameters
+        ----------
+        word : str
+            The word.
+
+        Returns
+        -------
+        str
+            The plural form.
+        """
+        lower_word = word.lower()
+        if lower_word.endswith("y") and lower_word[-2:-1] not in "aeiou":
+            return word[:-1] + "ies"
+        if lower_word.endswith(("s", "x", "z", "ch", "sh", "o")):
+            return word + "es"
+        return word + "s"
+
+    def _fold(self, text: str) -> str:
+        """Apply the Unicode folding and accent stripping to a text."""
+        return _fold(text, self.fold_unicode, self.strip_accents)
+
+    def normalize(self, token_text: str) -> str:
+        """Get the key of a token text.
+
+        Parameters
+        ----------
+        token_text : str
+            The token text.
+
+        Returns
+        -------
+        str
+            The folded text, without connector punctuation unless it is only made of
+            it, and singular if plurals are folded.
+        """
+        return self._normalize(token_text)
+
+    def is_connector(self, doc: Doc, index: int) -> bool:
+        """Check whether a token is punctuation joining the parts of a word.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc.
+        index : int
+            The token index.
+
+        Returns
+        -------
+        bool
+            Whether the token is only made of connector characters and attached to both
+            its neighbours, e.g. the hyphens of "fior-di-latte".
+        """
+        token = doc[index]
+        return (
+            self.collapse_punctuation
+            and 0 < index < len(doc) - 1
+            and not token.whitespace_
+            and not doc[index - 1].whitespace_
+            and all(character in CONNECTORS for character in token.text)
+        )
+
+    def doc_keys(self, doc: Doc) -> List[Optional[str]]:
+        """Get the keys of the tokens of a doc.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc, e.g. a tokenised pattern.
+
+        Returns
+        -------
+        List[Optional[str]]
+            The key of each token, None for the skipped connector punctuation.
+        """
+        return [
+            None if self.is_connector(doc, index) else self._normalize(token.text)
+            for index, token in enumerate(doc)
+        ]
+
+    def expand(self, label: str) -> List[str]:
+        """Get the variants of a label.
+
+        Parameters
+        ----------
+        label : str
+            The label.
+
+        Returns
+        -------
+        List[str]
+            The distinct variants, starting with the label itself: folded forms, forms
+            with connector punctuation replaced with spaces or spaces replaced with
+            hyphens, and singular or plural forms of the last word.
+        """
+        variants = dict.fromkeys([label, self._fold(label)])
+        if self.collapse_punctuation:
+            for variant in list(variants):
+                variants[_CONNECTOR_PATTERN.sub(" ", variant)] = None
+                words = variant.split()
+                if 1 < len(words) <= 4:
+                    variants["-".join(words)] = None
+        if self.fold_plurals:
+            for variant in list(variants):
+                head, separator, last_word = variant.rpartition(" ")
+                if not last_word.isalpha() or len(last_word) < 3:
+                    continue
+                singular = self.singularize(last_word)
+                inflected = (
+                    singular if singular != last_word else self.pluralize(last_word)
+                )
+                variants[head + separator + inflected] = None
+        return list(variants)
+
+    def expand_patterns(self, patterns: Iterable[Dict[str, str]]) -> EntityPatterns:
+        """Add the variants of the phrase patterns.
+
+        Parameters
+        ----------
+        patterns : Iterable[Dict[str, str]]
+            The entity patterns.
+
+        Returns
+        -------
+        EntityPatterns
+            The patterns and their variants, with the same labels and ids.
+        """
+        return EntityPatterns(
+            {**pattern, "pattern": variant}
+            for pattern in patterns
+            for variant in self.expand(pattern["pattern"])
+        )
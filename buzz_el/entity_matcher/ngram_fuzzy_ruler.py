@@ -0,0 +1,492 @@
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from .fuzzy_ruler import FuzzyRuler
+
+
+class NGramFuzzyMatcher:
+    """
+    A fuzzy phrase matcher shortlisting candidate patterns with a character q-gram index.
+
+    Each pattern text is indexed by its (space padded) character q-grams. For every token
+    window of a doc, only the patterns sharing enough q-grams with the window, and with a
+    compatible length, are scored with the rapidfuzz ratio. The cost then depends on the
+    number of candidate patterns per window instead of the total number of patterns.
+    Both the shortlisting and the scoring of all the windows of a doc are vectorised.
+
+    Match results follow the spaczz matcher format: (label, start, end, ratio, pattern).
+
+    Attributes
+    ----------
+    vocab : Vocab
+        The spaCy vocab, kept for consistency with the spaCy and spaczz matchers API.
+    ignore_case : bool
+        Whether to lower-case texts before matching.
+    min_r : int
+        Minimum ratio needed to match as a value between 0 and 100, by default 75.
+    q : int
+        The size of the character n-grams used to shortlist candidates, by default 3.
+    flex : int
+        Maximum difference between the number of tokens of a pattern and of a matched
+        window, by default 1.
+    workers : int
+        Number of threads used to score the candidates, -1 for all the CPU cores.
+    """
+
+    name = "ngram_fuzzy_matcher"
+
+    def __init__(
+        self,
+        vocab: Vocab,
+        ignore_case: Optional[bool] = True,
+        min_r: Optional[int] = 75,
+        q: Optional[int] = 3,
+        flex: Optional[int] = 1,
+        workers: Optional[int] = 1,
+    ) -> None:
+        """Initialise the matcher.
+
+        Parameters
+        ----------
+        vocab : Vocab
+            The spaCy vocab.
+        ignore_case : Optional[bool], optional
+            Whether to lower-case texts before matching, by default True.
+        min_r : Optional[int], optional
+            Minimum ratio needed to match as a value between 0 and 100, by default 75.
+            0 or None set the default value.
+        q : Optional[int], optional
+            The size of the character n-grams used to shortlist candidates, by default 3.
+        flex : Optional[int], optional
+            Maximum difference between the number of tokens of a pattern and of a matched
+            window, by default 1.
+        workers : Optional[int], optional
+            Number of threads used to score the candidates, -1 for all the CPU cores,
+            by default 1.
+        """
+        self.vocab = vocab
+        self.ignore_case = ignore_case
+        self.min_r = min_r if min_r else 75
+        self.q = q
+        self.flex = flex
+        self.workers = workers
+
+        self._pattern_labels: List[str] = []
+        self._pattern_texts: List[str] = []
+        self._pattern_n_tokens = array("I")
+        self._pattern_n_grams = array("I")
+        # removed patterns stay in the q-gram index, but are never candidates
+        self._pattern_active = array("B")
+        self._label_patterns: Dict[str, List[int]] = {}
+        self._gram_index: Dict[str, array] = defaultdict(lambda: array("I"))
+        self._max_n_tokens = 0
+        # array views of the index, built on first match and dropped when patterns change
+        self._gram_ids: Dict[str, int] = {}
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._label_patterns)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._label_patterns
+
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        """All labels present in the matcher.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            The labels.
+        """
+        return tuple(self._label_patterns)
+
+    @property
+    def patterns(self) -> List[Dict[str, str]]:
+        """All patterns present in the matcher.
+
+        Returns
+        -------
+        List[Dict[str, str]]
+            The patterns as {label, pattern} dicts, pattern being the normalised text.
+        """
+        return [
+            {
+                "label": self._pattern_labels[pattern_id],
+                "pattern": self._pattern_texts[pattern_id],
+            }
+            for pattern_ids in self._label_patterns.values()
+            for pattern_id in pattern_ids
+        ]
+
+    def _normalise(self, text: str) -> str:
+        """Normalise a text before indexing or scoring."""
+        return text.lower() if self.ignore_case else text
+
+    def _grams(self, text: str) -> Set[str]:
+        """Get the distinct space padded character q-grams of a normalised text."""
+        padded_text = f" {text} "
+        if len(padded_text) <= self.q:
+            return {padded_text}
+        return {
+            padded_text[i : i + self.q] for i in range(len(padded_text) - self.q + 1)
+        }
+
+    def add(self, label: str, patterns: List[Doc]) -> None:
+        """Add patterns to the matcher.
+
+        Parameters
+        ----------
+        label : str
+            The label of the patterns.
+        patterns : List[Doc]
+            The pattern docs.
+        """
+        for pattern in patterns:
+            pattern_id = len(self._pattern_texts)
+            pattern_text = self._normalise(pattern.text)
+            pattern_grams = self._grams(pattern_text)
+
+            self._pattern_labels.append(label)
+            self._pattern_texts.append(pattern_text)
+            self._pattern_n_tokens.append(len(pattern))
+            self._pattern_n_grams.append(len(pattern_grams))
+            self._pattern_active.append(1)
+            self._label_patterns.setdefault(label, []).append(pattern_id)
+            for gram in pattern_grams:
+                self._gram_index[gram].append(pattern_id)
+            self._max_n_tokens = max(self._max_n_tokens, len(pattern))
+        self._arrays = None
+
+    def remove(self, label: str) -> None:
+        """Remove a label and its patterns from the matcher.
+
+        Parameters
+        ----------
+        label : str
+            The label to remove.
+
+        Raises
+        ------
+        ValueError
+            If the label is not in the matcher.
+        """
+        if label not in self._label_patterns:
+            raise ValueError(f"The label '{label}' is not in the matcher.")
+        for pattern_id in self._label_patterns.pop(label):
+            self._pattern_active[pattern_id] = 0
+        self._arrays = None
+
+    def _index_arrays(self) -> Dict[str, np.ndarray]:
+        """Get the q-gram index and pattern statistics as arrays, building them if needed.
+
+        The postings are stored CSR-like: the patterns of gram id g are
+        postings[offsets[g]:offsets[g + 1]].
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            The offsets, postings, pattern_lens, pattern_n_tokens, pattern_n_grams and
+            pattern_active arrays.
+        """
+        if self._arrays is None:
+            self._gram_ids = {
+                gram: gram_id for gram_id, gram in enumerate(self._gram_index)
+            }
+            postings_lens = np.array(
+                [len(postings) for postings in self._gram_index.values()],
+                dtype=np.int64,
+            )
+            offsets = np.zeros(len(postings_lens) + 1, dtype=np.int64)
+            np.cumsum(postings_lens, out=offsets[1:])
+            postings = np.frombuffer(
+                b"".join(postings.tobytes() for postings in self._gram_index.values()),
+                dtype=np.uint32,
+            )
+            self._arrays = {
+                "offsets": offsets,
+                "postings": postings.astype(np.int64),
+                "pattern_lens": np.array(
+                    [len(pattern_text) for pattern_text in self._pattern_texts],
+                    dtype=np.int64,
+                ),
+                "pattern_n_tokens": np.array(self._pattern_n_tokens, dtype=np.int64),
+                "pattern_n_grams": np.array(self._pattern_n_grams, dtype=np.int64),
+                "pattern_active": np.array(self._pattern_active, dtype=bool),
+            }
+        return self._arrays
+
+    def _candidate_pairs(
+        self, window_texts: List[str], window_n_tokens: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist the (window, pattern) pairs that may match.
+
+        A pair is kept if the pattern and window numbers of tokens differ by at most flex,
+        if their lengths are compatible with min_r, and if they share enough q-grams: a
+        single character insertion or deletion changes at most q q-grams, and min_r bounds
+        the number of such edits.
+
+        Parameters
+        ----------
+        window_texts : List[str]
+            The normalised window texts.
+        window_n_tokens : np.ndarray
+            The number of tokens of each window.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The window ids and pattern ids of the candidate pairs.
+        """
+        arrays = self._index_arrays()
+        n_patterns = len(self._pattern_texts)
+
+        window_n_grams = np.zeros(len(window_texts), dtype=np.int64)
+        window_n_known_grams = np.zeros(len(window_texts), dtype=np.int64)
+        gram_ids = []
+        for window_id, window_text in enumerate(window_texts):
+            window_grams = self._grams(window_text)
+            window_gram_ids = [
+                self._gram_ids[gram] for gram in window_grams if gram in self._gram_ids
+            ]
+            window_n_grams[window_id] = len(window_grams)
+            window_n_known_grams[window_id] = len(window_gram_ids)
+            gram_ids.extend(window_gram_ids)
+        if not gram_ids:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        # expand each (window, gram) occurrence into the gram postings
+        gram_ids = np.array(gram_ids, dtype=np.int64)
+        gram_windows = np.repeat(np.arange(len(window_texts)), window_n_known_grams)
+        postings_starts = arrays["offsets"][gram_ids]
+        postings_lens = arrays["offsets"][gram_ids + 1] - postings_starts
+        postings_positions = np.repeat(
+            postings_starts - (np.cumsum(postings_lens) - postings_lens), postings_lens
+        ) + np.arange(postings_lens.sum())
+        pair_keys = (
+            np.repeat(gram_windows, postings_lens) * n_patterns
+            + arrays["postings"][postings_positions]
+        )
+        pair_keys, n_shared = np.unique(pair_keys, return_counts=True)
+        window_ids, pattern_ids = np.divmod(pair_keys, n_patterns)
+
+        window_lens = np.array([len(window_text) for window_text in window_texts])[
+            window_ids
+        ]
+        pattern_lens = arrays["pattern_lens"][pattern_ids]
+        total_lens = window_lens + pattern_lens
+        max_edits = np.floor((1 - self.min_r / 100) * total_lens).astype(np.int64)
+        min_shared = np.maximum(
+            1,
+            np.maximum(
+                window_n_grams[window_ids], arrays["pattern_n_grams"][pattern_ids]
+            )
+            - self.q * max_edits,
+        )
+        keep = (
+            arrays["pattern_active"][pattern_ids]
+            & (
+                np.abs(
+                    arrays["pattern_n_tokens"][pattern_ids]
+                    - window_n_tokens[window_ids]
+                )
+                <= self.flex
+            )
+            # the ratio cannot exceed what the length difference allows
+            & (200 * np.minimum(window_lens, pattern_lens) >= self.min_r * total_lens)
+            & (n_shared >= min_shared)
+        )
+        return window_ids[keep], pattern_ids[keep]
+
+    def _score_pairs(
+        self, window_texts: List[str], window_ids: np.ndarray, pattern_ids: np.ndarray
+    ) -> np.ndarray:
+        """Score the candidate pairs with the rapidfuzz ratio, in one vectorised call.
+
+        With rapidfuzz 3.6 or newer the pairs are scored with cpdist. Otherwise, the
+        distinct candidate windows and patterns are scored against each other with cdist,
+        and the pair scores are read from the resulting matrix.
+
+        Parameters
+        ----------
+        window_texts : List[str]
+            The normalised window texts.
+        window_ids : np.ndarray
+            The window ids of the candidate pairs.
+        pattern_ids : np.ndarray
+            The pattern ids of the candidate pairs.
+
+        Returns
+        -------
+        np.ndarray
+            The pairs scores, 0 for the pairs below min_r.
+        """
+        if hasattr(process, "cpdist"):
+            return process.cpdist(
+                [window_texts[window_id] for window_id in window_ids],
+                [self._pattern_texts[pattern_id] for pattern_id in pattern_ids],
+                scorer=fuzz.ratio,
+                score_cutoff=self.min_r,
+                workers=self.workers,
+            )
+
+        distinct_window_ids, window_rows = np.unique(window_ids, return_inverse=True)
+        distinct_pattern_ids, pattern_columns = np.unique(
+            pattern_ids, return_inverse=True
+        )
+        scores = process.cdist(
+            [window_texts[window_id] for window_id in distinct_window_ids],
+            [self._pattern_texts[pattern_id] for pattern_id in distinct_pattern_ids],
+            scorer=fuzz.ratio,
+            score_cutoff=self.min_r,
+            workers=self.workers,
+        )
+        return scores[window_rows, pattern_columns]
+
+    def _windows(self, doc: Doc) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Enumerate the token windows of a doc that may match a pattern.
+
+        Windows starting or ending with a whitespace token are skipped.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, List[str]]
+            The windows start tokens, end tokens and normalised texts.
+        """
+        starts, ends, window_texts = [], [], []
+        # doc.text is rebuilt on each access
+        text = doc.text
+        token_starts = [token.idx for token in doc]
+        token_ends = [token.idx + len(token) for token in doc]
+        is_space = [token.is_space for token in doc]
+        max_window_len = self._max_n_tokens + self.flex
+        for start in range(len(doc)):
+            if is_space[start]:
+                continue
+            for end in range(start + 1, min(start + max_window_len, len(doc)) + 1):
+                if is_space[end - 1]:
+                    continue
+                starts.append(start)
+                ends.append(end)
+                window_texts.append(
+                    self._normalise(text[token_starts[start] : token_ends[end - 1]])
+                )
+        return (
+            np.array(starts, dtype=np.int64),
+            np.array(ends, dtype=np.int64),
+            window_texts,
+        )
+
+    def _select_matches(
+        self,
+        scores: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        pattern_ids: np.ndarray,
+    ) -> List[Tuple[str, int, int, int, str]]:
+        """Keep the best scored non overlapping windows of each label.
+
+        Parameters
+        ----------
+        scores : np.ndarray
+            The scores of the windows reaching min_r.
+        starts : np.ndarray
+            The start tokens of the windows.
+        ends : np.ndarray
+            The end tokens of the windows.
+        pattern_ids : np.ndarray
+            The matched pattern ids.
+
+        Returns
+        -------
+        List[Tuple[str, int, int, int, str]]
+            The matches as (label, start, end, ratio, pattern).
+        """
+        matches = []
+        covered_tokens_by_label = defaultdict(set)
+        for position in np.lexsort((starts, -scores)):
+            start, end = int(starts[position]), int(ends[position])
+            pattern_id = pattern_ids[position]
+            label = self._pattern_labels[pattern_id]
+            covered_tokens = covered_tokens_by_label[label]
+            if any(token in covered_tokens for token in range(start, end)):
+                continue
+            covered_tokens.update(range(start, end))
+            matches.append(
+                (
+                    label,
+                    start,
+                    end,
+                    round(float(scores[position])),
+                    self._pattern_texts[pattern_id],
+                )
+            )
+        return sorted(matches, key=lambda match: (match[1], match[2]))
+
+    def __call__(self, doc: Doc) -> List[Tuple[str, int, int, int, str]]:
+        """Find the fuzzy matches in a doc.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc.
+
+        Returns
+        -------
+        List[Tuple[str, int, int, int, str]]
+            The matches as (label, start, end, ratio, pattern).
+        """
+        if not self._label_patterns:
+            return []
+        starts, ends, window_texts = self._windows(doc)
+        window_ids, pattern_ids = self._candidate_pairs(window_texts, ends - starts)
+        if not len(window_ids):
+            return []
+
+        scores = self._score_pairs(window_texts, window_ids, pattern_ids)
+        matched = scores >= self.min_r
+        window_ids = window_ids[matched]
+        return self._select_matches(
+            scores[matched], starts[window_ids], ends[window_ids], pattern_ids[matched]
+        )
+
+
+class NGramFuzzyRuler(FuzzyRuler):
+    """
+    A fuzzy ruler relying on the q-gram candidate blocking NGramFuzzyMatcher instead of the
+    spaczz FuzzyMatcher, to scale to large numbers of patterns.
+
+    It shares the FuzzyRuler API and output, i.e. the matches are stored in the
+    spaCy doc spans attribute, under the spans key.
+    The config can set the NGramFuzzyMatcher q and flex parameters.
+    """
+
+    def _build_matcher(self, config: Dict) -> NGramFuzzyMatcher:
+        """
+        Build the q-gram fuzzy matcher the patterns are added to.
+
+        Parameters
+        ----------
+        config : Dict
+            Configuration for the q-gram fuzzy matcher, i.e. min_r, q and flex.
+
+        Returns
+        -------
+        NGramFuzzyMatcher
+            The q-gram fuzzy matcher.
+        """
+        return NGramFuzzyMatcher(
+            vocab=self.spacy_model.vocab, ignore_case=self.ignore_case, **config
+        )
@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc, Span
+
+
+class PhraseRuler:
+    """
+    An exact entity matcher based on the spaCy phrase matcher, as the spaCy span ruler.
+
+    Unlike the span ruler, the matcher labels (label#id) of each entity and the label
+    and entity URI of each matcher label are kept, so that the patterns of an entity are
+    removed without going through all the patterns, and no span is built to get the
+    matches.
+
+    Attributes
+    ----------
+    spacy_model : Language
+        The spaCy model whose tokenizer is used to tokenise the patterns.
+    ignore_case : bool
+        Whether to ignore case, the phrase matcher then matches the LOWER attribute.
+    spans_key : str
+        The spans key to use to store the matches found in the spaCy doc spans attribute.
+    matcher : PhraseMatcher
+        The spaCy phrase matcher the patterns are added to.
+    """
+
+    def __init__(
+        self,
+        spacy_model: Language,
+        ignore_case: Optional[bool] = True,
+        spans_key: Optional[str] = None,
+    ) -> None:
+        """Initialiser for the phrase ruler.
+
+        Parameters
+        ----------
+        spacy_model : Language
+            The spaCy model whose tokenizer is used to tokenise the patterns.
+        ignore_case : Optional[bool], optional
+            Whether to ignore case, by default True.
+        spans_key : Optional[str], optional
+            The spans key to use to store the matches found in the spaCy doc spans
+            attribute, by default "string".
+        """
+        self.spacy_model = spacy_model
+        self.ignore_case = ignore_case
+        if spans_key is None:
+            spans_key = "string"
+        self.spans_key = spans_key
+
+        self.matcher = PhraseMatcher(
+            spacy_model.vocab, attr="LOWER" if ignore_case else "ORTH"
+        )
+        # matcher labels (label#id) of each entity URI, to remove entities
+        self._labels_by_id: Dict[str, Set[str]] = {}
+        # label and entity URI of each matcher label hash
+        self._label_ids: Dict[int, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._labels_by_id)
+
+    def add_patterns(
+        self, patterns: Iterable[Dict[str, str]], batch_size: Optional[int] = 1000
+    ) -> None:
+        """
+        Add patterns to the ruler.
+
+        The pattern format is: `{label (str), pattern (str), id (str)}`. Pattern docs are
+        only tokenised, in batches, and added to the matcher with one call per entity.
+
+        Parameters
+        ----------
+        patterns: Iterable[Dict[str,str]]
+            The patterns to add.
+        batch_size : Optional[int], optional
+            Number of patterns to tokenise per batch, by default 1000.
+        """
+        strings = self.spacy_model.vocab.strings
+        pattern_texts_by_label = {}
+        for pattern in patterns:
+            label_with_id = f"{pattern['label']}#{pattern['id']}"
+            if label_with_id not in pattern_texts_by_label:
+                self._labels_by_id.setdefault(pattern["id"], set()).add(label_with_id)
+                self._label_ids[strings.add(label_with_id)] = (
+                    pattern["label"],
+                    pattern["id"],
+                )
+            pattern_texts_by_label.setdefault(label_with_id, []).append(
+                pattern["pattern"]
+            )
+
+        pattern_docs = self.spacy_model.tokenizer.pipe(
+            (
+                pattern_text
+                for pattern_texts in pattern_texts_by_label.values()
+                for pattern_text in pattern_texts
+            ),
+            batch_size=batch_size,
+        )
+        for label_with_id, pattern_texts in pattern_texts_by_label.items():
+            self.matcher.add(
+                label_with_id, [next(pattern_docs) for _ in range(len(pattern_texts))]
+            )
+
+    def remove_by_id(self, entity_uri: str) -> None:
+        """
+        Remove the patterns of an entity from the ruler.
+
+        Parameters
+        ----------
+        entity_uri : str
+            The URI of the entity.
+
+        Raises
+        ------
+        ValueError
+            If the ruler has no pattern for the entity.
+        """
+        labels_with_id = self._labels_by_id.pop(entity_uri, None)
+        if labels_with_id is None:
+            raise ValueError(f"No pattern with id '{entity_uri}' in the phrase ruler.")
+        strings = self.spacy_model.vocab.strings
+        for label_with_id in labels_with_id:
+            self._label_ids.pop(strings.as_int(label_with_id), None)
+            if label_with_id in self.matcher:
+                self.matcher.remove(label_with_id)
+
+    def match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+        """
+        Find the entity matches of a spaCy doc, without modifying it.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to match.
+
+        Returns
+        -------
+        List[Tuple[int, int, str, str]]
+            The sorted distinct matches as (start token, end token, label, entity URI).
+        """
+        label_ids = self._label_ids
+        return sorted(
+            {
+                (start, end, *label_ids[match_id])
+                for match_id, start, end in self.matcher(doc)
+                if start != end
+            }
+        )
+
+    def __call__(self, doc: Doc) -> Doc:
+        """
+        Apply the ruler to a spaCy doc.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to process.
+
+        Returns
+        -------
+        Doc
+            The spaCy doc processed.
+        """
+        self.set_annotations(doc, self.match(doc))
+        return doc
+
+    def set_annotations(
+        self, doc: Doc, matches: List[Tuple[int, int, str, str]]
+    ) -> None:
+        """
+        Modify the spaCy doc with matches information in the spans attribute.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to modify.
+        matches : List[Tuple[int, int, str, str]]
+            The sorted distinct matches, see match.
+        """
+        doc.spans[self.spans_key] = [
+            Span(doc, start, end, label=label, span_id=entity_uri)
+            for start, end, label, entity_uri in matches
+        ]
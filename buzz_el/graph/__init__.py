@@ -1,2 +1,7 @@
-from .knowledge_graph import KnowledgeGraph
+from .context_cache import ContextCache
+from .entity_adjacency import EntityAdjacency
+from .entity_patterns import EntityPatterns
+from .federated_knowledge_graph import FederatedKnowledgeGraph
+from .knowledge_graph import KnowledgeGraph, KnowledgeGraphUpdate
 from .rdf_graph_loader import RDFGraphLoader
+from .streaming_rdf_graph_loader import StreamingRDFGraphLoader
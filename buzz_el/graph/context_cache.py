@@ -0,0 +1,252 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+
+class ContextCache:
+    """
+    A size bounded cache for the entity context strings.
+
+    Two eviction policies are available:
+
+    - lru: the least recently used entry is evicted first.
+    - lfu: the least frequently used entry is evicted first, ties being broken by recency.
+
+    Attributes
+    ----------
+    max_entries : Optional[int]
+        Maximum number of cached entries, by default None (unbounded).
+    max_bytes : Optional[int]
+        Maximum total size in bytes of the cached keys and values, by default None (unbounded).
+    policy : str
+        The eviction policy, either "lru" or "lfu".
+    hits : int
+        Number of lookups answered by the cache.
+    misses : int
+        Number of lookups not answered by the cache.
+    evictions : int
+        Number of entries evicted to respect the cache bounds.
+    total_bytes : int
+        Current total size in bytes of the cached keys and values.
+    """
+
+    policies = ("lru", "lfu")
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: Optional[str] = "lru",
+    ) -> None:
+        """Initialise the context cache.
+
+        Parameters
+        ----------
+        max_entries : Optional[int], optional
+            Maximum number of cached entries, by default None (unbounded).
+        max_bytes : Optional[int], optional
+            Maximum total size in bytes of the cached keys and values,
+            by default None (unbounded).
+        policy : Optional[str], optional
+            The eviction policy, either "lru" or "lfu", by default "lru".
+
+        Raises
+        ------
+        ValueError
+            If the policy is unknown or a bound is not strictly positive.
+        """
+        if policy not in self.policies:
+            raise ValueError(
+                f"Unknown cache policy '{policy}', expected one of {self.policies}."
+            )
+        for bound_name, bound in [
+            ("max_entries", max_entries),
+            ("max_bytes", max_bytes),
+        ]:
+            if bound is not None and bound <= 0:
+                raise ValueError(
+                    f"{bound_name} must be strictly positive, got {bound}."
+                )
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, str] = {}
+        self._sizes: Dict[Hashable, int] = {}
+        # lru: a single recency ordered bucket
+        # lfu: one recency ordered bucket per use frequency
+        self._frequencies: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_frequency = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def __call__(self, get_context: Callable[[str], str]) -> Callable[[str], str]:
+        """Wrap a get context callable with the cache.
+
+        Parameters
+        ----------
+        get_context : Callable[[str], str]
+            Callable to fetch the context string of an entity.
+
+        Returns
+        -------
+        Callable[[str], str]
+            The cached get context callable.
+        """
+
+        def cached_get_context(entity_uri: str) -> str:
+            context_string = self.get(entity_uri)
+            if context_string is None:
+                context_string = get_context(entity_uri)
+                self.put(entity_uri, context_string)
+            return context_string
+
+        return cached_get_context
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics.
+
+        Returns
+        -------
+        Dict[str, int]
+            The hits, misses, evictions, entries and bytes counters.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "bytes": self.total_bytes,
+        }
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Get a cached value and update its usage.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key to look up.
+
+        Returns
+        -------
+        Optional[str]
+            The cached value, None if the key is not cached.
+        """
+        with self._lock:
+            if key not in self._values:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key)
+            return self._values[key]
+
+    def put(self, key: Hashable, value: str) -> None:
+        """Cache a value, evicting entries if needed to respect the cache bounds.
+
+        Values larger than max_bytes on their own are not cached.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key to cache.
+        value : str
+            The value to cache.
+        """
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._values:
+                self._remove(key)
+            while self._values and (
+                (self.max_entries is not None and len(self._values) >= self.max_entries)
+                or (
+                    self.max_bytes is not None
+                    and self.total_bytes + size > self.max_bytes
+                )
+            ):
+                self._evict()
+
+            self._values[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            self._frequencies[key] = 1
+            self._buckets.setdefault(self._bucket_of(1), OrderedDict())[key] = None
+            self._min_frequency = 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache if present.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key to remove.
+        """
+        with self._lock:
+            if key in self._values:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all the cached entries. Statistics counters are kept."""
+        with self._lock:
+            self._values.clear()
+            self._sizes.clear()
+            self._frequencies.clear()
+            self._buckets.clear()
+            self._min_frequency = 0
+            self.total_bytes = 0
+
+    def _bucket_of(self, frequency: int) -> int:
+        """Get the bucket of a use frequency. LRU keeps all the entries in one bucket."""
+        return frequency if self.policy == "lfu" else 1
+
+    def _touch(self, key: Hashable) -> None:
+        """Record a use of a cached key."""
+        frequency = self._frequencies[key]
+        bucket = self._buckets[self._bucket_of(frequency)]
+        if self.policy == "lru":
+            bucket.move_to_end(key)
+            return
+
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        self._frequencies[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove a cached key without counting an eviction."""
+        bucket_key = self._bucket_of(self._frequencies.pop(key))
+        bucket = self._buckets[bucket_key]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[bucket_key]
+            if self._buckets:
+                self._min_frequency = min(self._buckets)
+        del self._values[key]
+        self.total_bytes -= self._sizes.pop(key)
+
+    def _evict(self) -> None:
+        """Evict one entry according to the cache policy."""
+        if self._min_frequency not in self._buckets:
+            self._min_frequency = min(self._buckets)
+        key = next(iter(self._buckets[self._min_frequency]))
+        self._remove(key)
+        self.evictions += 1
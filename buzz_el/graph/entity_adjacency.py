@@ -0,0 +1,241 @@
+from os import PathLike
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+from rdflib import URIRef
+from spacy.util import ensure_path
+
+from .knowledge_graph import Triple
+from .snapshot import StringTable
+
+
+class EntityAdjacency:
+    """
+    A compact undirected adjacency of the knowledge graph entities.
+
+    Entities are identified by integer ids, and their neighbours are stored CSR-like:
+    the sorted neighbours of entity i are indices[indptr[i]:indptr[i + 1]]. Edge lookups
+    are binary searches in the sorted i * n_entities + j edge keys, so many entity pairs
+    can be checked at once.
+
+    Attributes
+    ----------
+    uris : Sequence[str]
+        The entity URIs, entity ids being their index.
+    indptr : np.ndarray
+        The start of the neighbours of each entity in indices, plus the number of edges.
+    indices : np.ndarray
+        The neighbour entity ids.
+    """
+
+    def __init__(
+        self, uris: Sequence[str], indptr: np.ndarray, indices: np.ndarray
+    ) -> None:
+        """Initialise the adjacency from its CSR arrays.
+
+        Parameters
+        ----------
+        uris : Sequence[str]
+            The entity URIs, entity ids being their index.
+        indptr : np.ndarray
+            The start of the neighbours of each entity in indices, plus the number of
+            edges.
+        indices : np.ndarray
+            The neighbour entity ids, sorted for each entity.
+        """
+        self.uris = uris
+        self.indptr = indptr
+        self.indices = indices
+        self._entity_ids: Dict[str, int] = {
+            uri: entity_id for entity_id, uri in enumerate(uris)
+        }
+        self._edge_keys = (
+            np.repeat(np.arange(len(uris), dtype=np.int64), np.diff(indptr)) * len(uris)
+            + indices
+        )
+
+    @classmethod
+    def from_edges(
+        cls, uris: Sequence[str], sources: Iterable[int], targets: Iterable[int]
+    ) -> "EntityAdjacency":
+        """Build the adjacency from edges between entity ids, in any direction.
+
+        Duplicate edges and self loops are dropped.
+
+        Parameters
+        ----------
+        uris : Sequence[str]
+            The entity URIs, entity ids being their index.
+        sources : Iterable[int]
+            The source entity ids of the edges.
+        targets : Iterable[int]
+            The target entity ids of the edges.
+
+        Returns
+        -------
+        EntityAdjacency
+            The adjacency.
+        """
+        sources = np.fromiter(sources, dtype=np.int64)
+        targets = np.fromiter(targets, dtype=np.int64)
+        n_entities = len(uris)
+        edge_keys = np.unique(
+            np.concatenate(
+                [sources * n_entities + targets, targets * n_entities + sources]
+            )
+        )
+        rows, indices = np.divmod(edge_keys, n_entities)
+        keep = rows != indices
+        rows, indices = rows[keep], indices[keep]
+        indptr = np.zeros(n_entities + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_entities), out=indptr[1:])
+        return cls(uris, indptr, indices)
+
+    @classmethod
+    def from_triples(
+        cls, uris: Iterable[str], triples: Iterable[Triple]
+    ) -> "EntityAdjacency":
+        """Build the adjacency of entities from the triples linking them.
+
+        Two entities are adjacent if a triple links them, in either direction, whatever
+        the predicate.
+
+        Parameters
+        ----------
+        uris : Iterable[str]
+            The entity URIs.
+        triples : Iterable[Triple]
+            The rdflib triples, e.g. an rdflib graph.
+
+        Returns
+        -------
+        EntityAdjacency
+            The adjacency.
+        """
+        entity_ids = {}
+        for entity_uri in uris:
+            entity_ids.setdefault(entity_uri, len(entity_ids))
+
+        sources, targets = [], []
+        for subject, _, obj in triples:
+            if not isinstance(obj, URIRef):
+                continue
+            source = entity_ids.get(str(subject))
+            if source is None:
+                continue
+            target = entity_ids.get(str(obj))
+            if target is not None:
+                sources.append(source)
+                targets.append(target)
+
+        return cls.from_edges(list(entity_ids), sources, targets)
+
+    def __len__(self) -> int:
+        return len(self.uris)
+
+    @property
+    def n_edges(self) -> int:
+        """The number of undirected edges."""
+        return len(self.indices) // 2
+
+    def entity_ids(self, entity_uris: Iterable[str]) -> np.ndarray:
+        """Get the ids of entities.
+
+        Parameters
+        ----------
+        entity_uris : Iterable[str]
+            The entity URIs.
+
+        Returns
+        -------
+        np.ndarray
+            The entity ids, -1 for the entities not in the adjacency.
+        """
+        return np.fromiter(
+            (self._entity_ids.get(entity_uri, -1) for entity_uri in entity_uris),
+            dtype=np.int64,
+        )
+
+    def neighbours(self, entity_uri: str) -> List[str]:
+        """Get the neighbours of an entity.
+
+        Parameters
+        ----------
+        entity_uri : str
+            The entity URI.
+
+        Returns
+        -------
+        List[str]
+            The URIs of the neighbour entities, empty if the entity is unknown.
+        """
+        entity_id = self._entity_ids.get(entity_uri)
+        if entity_id is None:
+            return []
+        return [
+            self.uris[neighbour_id]
+            for neighbour_id in self.indices[
+                self.indptr[entity_id] : self.indptr[entity_id + 1]
+            ].tolist()
+        ]
+
+    def connected(self, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Check whether pairs of entities are neighbours, in one vectorised lookup.
+
+        Parameters
+        ----------
+        sources : np.ndarray
+            The entity ids of the first entity of each pair, -1 for unknown entities.
+        targets : np.ndarray
+            The entity ids of the second entity of each pair, -1 for unknown entities.
+
+        Returns
+        -------
+        np.ndarray
+            Whether each pair of entities is connected.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if not len(self._edge_keys):
+            return np.zeros(len(sources), dtype=bool)
+        keys = sources * len(self.uris) + targets
+        positions = np.minimum(
+            np.searchsorted(self._edge_keys, keys), len(self._edge_keys) - 1
+        )
+        return (self._edge_keys[positions] == keys) & (sources >= 0) & (targets >= 0)
+
+    def to_disk(self, path: PathLike) -> None:
+        """Save the adjacency to a numpy npz file.
+
+        Parameters
+        ----------
+        path : PathLike
+            The file path.
+        """
+        uris = StringTable.from_strings(self.uris)
+        with open(ensure_path(path), "wb") as adjacency_file:
+            np.savez(
+                adjacency_file,
+                uris_offsets=uris.offsets,
+                uris_data=uris.data,
+                indptr=self.indptr,
+                indices=self.indices,
+            )
+
+    @classmethod
+    def from_disk(cls, path: PathLike) -> "EntityAdjacency":
+        """Load an adjacency saved with to_disk.
+
+        Parameters
+        ----------
+        path : PathLike
+            The file path.
+
+        Returns
+        -------
+        EntityAdjacency
+            The loaded adjacency.
+        """
+        with np.load(ensure_path(path)) as sections:
+            uris = list(StringTable(sections["uris_offsets"], sections["uris_data"]))
+            return cls(uris, sections["indptr"], sections["indices"])
@@ -0,0 +1,336 @@
+from array import array
+from typing import Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+
+class EntityPatterns(Sequence[Dict[str, str]]):
+    """
+    A memory compact store of entity patterns.
+
+    Patterns are not kept as dicts:
+
+    - entity URIs and pattern labels (e.g. "KG_ENT") are interned, each pattern only
+      storing their integer ids;
+    - pattern phrases are stored UTF-8 encoded in one contiguous buffer with offsets.
+
+    The store still behaves as a sequence of `{label, pattern, id}` dicts, built on access,
+    so it can be given as is to `SpanRuler.add_patterns` and `FuzzyRuler.add_patterns`.
+
+    The store can also wrap read-only buffers, e.g. memory mapped snapshot arrays.
+
+    Patterns are removed by entity URI in place: they are only marked as removed, so the
+    cost of a removal is proportional to the number of removed patterns. The store is
+    compacted when the removed patterns outnumber the others, or when its buffers or a
+    pattern index are accessed.
+    """
+
+    __slots__ = (
+        "_uris",
+        "_uri_ids",
+        "_entity_labels",
+        "_entity_label_ids",
+        "_phrase_offsets",
+        "_phrase_data",
+        "_pattern_uri_ids",
+        "_pattern_entity_label_ids",
+        "_read_only",
+        "_uri_pattern_indices",
+        "_removed_indices",
+    )
+
+    def __init__(self, patterns: Optional[Iterable[Dict[str, str]]] = None) -> None:
+        """Initialise the entity patterns store.
+
+        Parameters
+        ----------
+        patterns : Optional[Iterable[Dict[str, str]]], optional
+            The patterns to add, by default None.
+        """
+        self._uris: Sequence[str] = []
+        self._uri_ids: Optional[Dict[str, int]] = {}
+        self._entity_labels: Sequence[str] = []
+        self._entity_label_ids: Optional[Dict[str, int]] = {}
+        self._phrase_offsets = array("Q", [0])
+        self._phrase_data = bytearray()
+        self._pattern_uri_ids = array("I")
+        self._pattern_entity_label_ids = array("I")
+        self._read_only = False
+        # pattern indices of each entity URI id, built on first removal
+        self._uri_pattern_indices: Optional[Dict[int, List[int]]] = None
+        self._removed_indices: Set[int] = set()
+
+        if patterns is not None:
+            self.extend(patterns)
+
+    @classmethod
+    def from_buffers(
+        cls,
+        uris: Sequence[str],
+        entity_labels: Sequence[str],
+        phrase_offsets: Sequence[int],
+        phrase_data: Sequence[int],
+        pattern_uri_ids: Sequence[int],
+        pattern_entity_label_ids: Sequence[int],
+    ) -> "EntityPatterns":
+        """Build a read-only store over existing buffers.
+
+        Parameters
+        ----------
+        uris : Sequence[str]
+            The entity URIs table.
+        entity_labels : Sequence[str]
+            The pattern labels table.
+        phrase_offsets : Sequence[int]
+            The phrases start offsets in the phrase buffer, plus the buffer size.
+        phrase_data : Sequence[int]
+            The buffer of UTF-8 encoded phrases.
+        pattern_uri_ids : Sequence[int]
+            The entity URI id of each pattern.
+        pattern_entity_label_ids : Sequence[int]
+            The pattern label id of each pattern.
+
+        Returns
+        -------
+        EntityPatterns
+            The read-only entity patterns store.
+        """
+        entity_patterns = cls()
+        entity_patterns._uris = uris
+        entity_patterns._uri_ids = None
+        entity_patterns._entity_labels = entity_labels
+        entity_patterns._entity_label_ids = None
+        entity_patterns._phrase_offsets = phrase_offsets
+        entity_patterns._phrase_data = phrase_data
+        entity_patterns._pattern_uri_ids = pattern_uri_ids
+        entity_patterns._pattern_entity_label_ids = pattern_entity_label_ids
+        entity_patterns._read_only = True
+        return entity_patterns
+
+    def __len__(self) -> int:
+        return len(self._pattern_uri_ids) - len(self._removed_indices)
+
+    def __getitem__(self, index: int) -> Dict[str, str]:
+        self.compact()
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("entity patterns index out of range")
+        return self._pattern(index)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for index in range(len(self._pattern_uri_ids)):
+            if index not in self._removed_indices:
+                yield self._pattern(index)
+
+    def _pattern(self, index: int) -> Dict[str, str]:
+        """Build the dict of the pattern stored at an index."""
+        start, end = self._phrase_offsets[index], self._phrase_offsets[index + 1]
+        return {
+            "label": self._entity_labels[self._pattern_entity_label_ids[index]],
+            "pattern": bytes(self._phrase_data[start:end]).decode("utf-8"),
+            "id": self._uris[self._pattern_uri_ids[index]],
+        }
+
+    @property
+    def uris(self) -> Sequence[str]:
+        """The distinct entity URIs, indexed by their integer id.
+
+        Returns
+        -------
+        Sequence[str]
+            The entity URIs table.
+        """
+        self.compact()
+        return self._uris
+
+    @property
+    def pattern_uri_ids(self) -> Sequence[int]:
+        """The entity URI id of each pattern.
+
+        Returns
+        -------
+        Sequence[int]
+            The pattern entity URI ids.
+        """
+        self.compact()
+        return self._pattern_uri_ids
+
+    @property
+    def entity_labels(self) -> Sequence[str]:
+        """The distinct pattern labels, indexed by their integer id.
+
+        Returns
+        -------
+        Sequence[str]
+            The pattern labels table.
+        """
+        self.compact()
+        return self._entity_labels
+
+    @property
+    def pattern_entity_label_ids(self) -> Sequence[int]:
+        """The pattern label id of each pattern.
+
+        Returns
+        -------
+        Sequence[int]
+            The pattern label ids.
+        """
+        self.compact()
+        return self._pattern_entity_label_ids
+
+    @property
+    def phrase_offsets(self) -> Sequence[int]:
+        """The phrases start offsets in the phrase buffer, plus the buffer size.
+
+        Returns
+        -------
+        Sequence[int]
+            The phrase offsets.
+        """
+        self.compact()
+        return self._phrase_offsets
+
+    @property
+    def phrase_data(self) -> Sequence[int]:
+        """The buffer of UTF-8 encoded phrases.
+
+        Returns
+        -------
+        Sequence[int]
+            The phrase data.
+        """
+        self.compact()
+        return self._phrase_data
+
+    def phrase(self, index: int) -> str:
+        """Get the phrase of a pattern without building the pattern dict.
+
+        Parameters
+        ----------
+        index : int
+            The pattern index.
+
+        Returns
+        -------
+        str
+            The pattern phrase.
+        """
+        self.compact()
+        start, end = self._phrase_offsets[index], self._phrase_offsets[index + 1]
+        return bytes(self._phrase_data[start:end]).decode("utf-8")
+
+    def append(self, pattern: Dict[str, str]) -> None:
+        """Add a pattern to the store.
+
+        Parameters
+        ----------
+        pattern : Dict[str, str]
+            The pattern to add, i.e. {label, pattern, id}.
+
+        Raises
+        ------
+        TypeError
+            If the store wraps read-only buffers.
+        """
+        if self._read_only:
+            raise TypeError("Cannot add patterns to read-only entity patterns.")
+        self._append_encoded(
+            pattern["pattern"].encode("utf-8"), pattern["id"], pattern["label"]
+        )
+
+    def _append_encoded(self, phrase: bytes, uri: str, entity_label: str) -> None:
+        """Add a pattern whose phrase is already UTF-8 encoded."""
+        uri_id = self._uri_ids.get(uri)
+        if uri_id is None:
+            uri_id = self._uri_ids[uri] = len(self._uris)
+            self._uris.append(uri)
+        entity_label_id = self._entity_label_ids.get(entity_label)
+        if entity_label_id is None:
+            entity_label_id = self._entity_label_ids[entity_label] = len(
+                self._entity_labels
+            )
+            self._entity_labels.append(entity_label)
+
+        if self._uri_pattern_indices is not None:
+            self._uri_pattern_indices.setdefault(uri_id, []).append(
+                len(self._pattern_uri_ids)
+            )
+        self._phrase_data += phrase
+        self._phrase_offsets.append(len(self._phrase_data))
+        self._pattern_uri_ids.append(uri_id)
+        self._pattern_entity_label_ids.append(entity_label_id)
+
+    def extend(self, patterns: Iterable[Dict[str, str]]) -> None:
+        """Add patterns to the store.
+
+        Parameters
+        ----------
+        patterns : Iterable[Dict[str, str]]
+            The patterns to add.
+        """
+        for pattern in patterns:
+            self.append(pattern)
+
+    def remove_ids(self, entity_uris: Collection[str]) -> None:
+        """Remove the patterns of some entities.
+
+        The patterns are marked as removed, through an entity URI to pattern indices map
+        built on the first removal, so the cost is proportional to the number of removed
+        patterns.
+
+        Parameters
+        ----------
+        entity_uris : Collection[str]
+            The URIs of the entities whose patterns are removed, the unknown ones are
+            ignored.
+
+        Raises
+        ------
+        TypeError
+            If the store wraps read-only buffers.
+        """
+        if self._read_only:
+            raise TypeError("Cannot remove patterns from read-only entity patterns.")
+        if self._uri_pattern_indices is None:
+            self._uri_pattern_indices = {}
+            for index, uri_id in enumerate(self._pattern_uri_ids):
+                if index not in self._removed_indices:
+                    self._uri_pattern_indices.setdefault(uri_id, []).append(index)
+
+        for entity_uri in entity_uris:
+            uri_id = self._uri_ids.get(entity_uri)
+            if uri_id is not None:
+                self._removed_indices.update(self._uri_pattern_indices.pop(uri_id, ()))
+        # amortised compaction, so that removed patterns do not pile up
+        if 2 * len(self._removed_indices) > len(self._pattern_uri_ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop the removed patterns from the buffers, and the URIs left without pattern.
+
+        It is a no-op if no pattern is removed.
+        """
+        if not self._removed_indices:
+            return
+        uris, entity_labels = self._uris, self._entity_labels
+        phrase_offsets, phrase_data = self._phrase_offsets, self._phrase_data
+        pattern_uri_ids = self._pattern_uri_ids
+        pattern_entity_label_ids = self._pattern_entity_label_ids
+        removed_indices = self._removed_indices
+
+        self._uris, self._uri_ids = [], {}
+        self._entity_labels, self._entity_label_ids = [], {}
+        self._phrase_offsets = array("Q", [0])
+        self._phrase_data = bytearray()
+        self._pattern_uri_ids = array("I")
+        self._pattern_entity_label_ids = array("I")
+        self._uri_pattern_indices = None
+        self._removed_indices = set()
+        for index, uri_id in enumerate(pattern_uri_ids):
+            if index in removed_indices:
+                continue
+            self._append_encoded(
+                bytes(phrase_data[phrase_offsets[index] : phrase_offsets[index + 1]]),
+                uris[uri_id],
+                entity_labels[pattern_entity_label_ids[index]],
+            )
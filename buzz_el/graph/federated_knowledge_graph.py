@@ -0,0 +1,257 @@
+from itertools import chain
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..commons.instrumentation import Instrumentation
+from .entity_patterns import EntityPatterns
+from .knowledge_graph import KnowledgeGraph, KnowledgeGraphUpdate, Triple
+
+
+class FederatedKnowledgeGraph(KnowledgeGraph):
+    """
+    A knowledge graph composed of several named knowledge graphs.
+
+    Its entity patterns are the union of the patterns of all the graphs, so a single
+    entity matcher scans each doc once for all of them. The entity ids of the patterns,
+    and so of the matched spans, are tagged with the name of their source graph:
+    "{graph_name}{separator}{entity_uri}", e.g. "geo::http://example.org/Paris". The
+    context lookups are dispatched to the source graph of each entity.
+
+    Attributes
+    ----------
+    knowledge_graphs : Dict[str, KnowledgeGraph]
+        The composed knowledge graphs, by name.
+    separator : str
+        The separator between the graph name and the entity URI in the entity ids.
+    kg : Dict[str, Any]
+        The KG objects of the composed knowledge graphs, by name.
+    """
+
+    def __init__(
+        self,
+        knowledge_graphs: Dict[str, KnowledgeGraph],
+        separator: Optional[str] = "::",
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        """Initialise the federated knowledge graph and merge the entity patterns.
+
+        Parameters
+        ----------
+        knowledge_graphs : Dict[str, KnowledgeGraph]
+            The knowledge graphs to compose, by name.
+        separator : Optional[str], optional
+            The separator between the graph name and the entity URI in the entity ids,
+            by default "::".
+        instrumentation : Optional[Instrumentation], optional
+            The instrumentation recording the context lookups, by default None (nothing
+            is recorded).
+
+        Raises
+        ------
+        ValueError
+            If there is no knowledge graph, the separator is empty or a graph name is
+            empty or contains the separator.
+        """
+        if not knowledge_graphs:
+            raise ValueError("At least one knowledge graph is needed.")
+        if not separator:
+            raise ValueError("The entity id separator cannot be empty.")
+        for graph_name in knowledge_graphs:
+            if not graph_name or separator in graph_name:
+                raise ValueError(
+                    f"Invalid knowledge graph name '{graph_name}', it must be non-empty "
+                    f"and not contain the separator '{separator}'."
+                )
+
+        self.knowledge_graphs = dict(knowledge_graphs)
+        self.separator = separator
+
+        entity_patterns = EntityPatterns()
+        for graph_name, knowledge_graph in self.knowledge_graphs.items():
+            self._extend_patterns(
+                entity_patterns, graph_name, knowledge_graph.entity_patterns
+            )
+
+        super().__init__(
+            kg={
+                graph_name: knowledge_graph.kg
+                for graph_name, knowledge_graph in self.knowledge_graphs.items()
+            },
+            entity_patterns=entity_patterns,
+            get_entity_context=self._get_federated_context,
+            instrumentation=instrumentation,
+        )
+
+    def entity_id(self, graph_name: str, entity_uri: str) -> str:
+        """Build the federated id of an entity.
+
+        Parameters
+        ----------
+        graph_name : str
+            The name of the source graph of the entity.
+        entity_uri : str
+            The entity URI in its source graph.
+
+        Returns
+        -------
+        str
+            The federated entity id.
+        """
+        return f"{graph_name}{self.separator}{entity_uri}"
+
+    def split_entity_id(self, entity_id: str) -> Tuple[str, str]:
+        """Split a federated entity id into its source graph name and entity URI.
+
+        Parameters
+        ----------
+        entity_id : str
+            The federated entity id, e.g. a matched span id.
+
+        Returns
+        -------
+        Tuple[str, str]
+            The source graph name, empty if the id is not tagged, and the entity URI.
+        """
+        graph_name, separator, entity_uri = entity_id.partition(self.separator)
+        if not separator:
+            return "", entity_id
+        return graph_name, entity_uri
+
+    def _extend_patterns(
+        self,
+        entity_patterns: EntityPatterns,
+        graph_name: str,
+        graph_patterns: Iterable[Dict[str, str]],
+    ) -> None:
+        """Add the patterns of a graph to the federated patterns, with tagged ids."""
+        if isinstance(graph_patterns, EntityPatterns):
+            # phrases are copied as bytes, without building the pattern dicts
+            uris = graph_patterns.uris
+            entity_labels = graph_patterns.entity_labels
+            offsets = graph_patterns.phrase_offsets
+            for index, (uri_id, entity_label_id) in enumerate(
+                zip(
+                    graph_patterns.pattern_uri_ids,
+                    graph_patterns.pattern_entity_label_ids,
+                )
+            ):
+                entity_patterns._append_encoded(
+                    bytes(
+                        graph_patterns.phrase_data[offsets[index] : offsets[index + 1]]
+                    ),
+                    self.entity_id(graph_name, uris[uri_id]),
+                    entity_labels[entity_label_id],
+                )
+        else:
+            entity_patterns.extend(
+                {**pattern, "id": self.entity_id(graph_name, pattern["id"])}
+                for pattern in graph_patterns
+            )
+
+    def _knowledge_graph(self, graph_name: str) -> KnowledgeGraph:
+        """Get a composed knowledge graph, raising a ValueError if the name is unknown."""
+        if graph_name not in self.knowledge_graphs:
+            raise ValueError(
+                f"Unknown knowledge graph '{graph_name}', "
+                f"expected one of {tuple(self.knowledge_graphs)}."
+            )
+        return self.knowledge_graphs[graph_name]
+
+    def _get_federated_context(self, entity_id: str) -> str:
+        """Get the context string of an entity from its source graph."""
+        graph_name, entity_uri = self.split_entity_id(entity_id)
+        knowledge_graph = self.knowledge_graphs.get(graph_name)
+        if knowledge_graph is None:
+            return ""
+        return knowledge_graph.get_context(entity_uri)
+
+    def update(
+        self,
+        added_triples: Iterable[Triple] = (),
+        removed_triples: Iterable[Triple] = (),
+        *,
+        graph_name: Optional[str] = None,
+    ) -> KnowledgeGraphUpdate:
+        """Apply a diff to one of the composed knowledge graphs.
+
+        The federated patterns of the affected entities are replaced. The returned update
+        has federated entity ids, so it can be given to EntityMatcher.apply_kg_update.
+
+        Parameters
+        ----------
+        added_triples : Iterable[Triple], optional
+            The triples to add, by default ().
+        removed_triples : Iterable[Triple], optional
+            The triples to remove, by default ().
+        graph_name : Optional[str], optional
+            The name of the knowledge graph the diff applies to. It is required, the
+            None default only keeps the KnowledgeGraph.update signature.
+
+        Returns
+        -------
+        KnowledgeGraphUpdate
+            The changes of the affected entities, with federated entity ids.
+
+        Raises
+        ------
+        ValueError
+            If the graph name is missing or unknown, or the graph does not support
+            incremental updates.
+        """
+        if graph_name is None:
+            raise ValueError(
+                "The name of the knowledge graph the diff applies to is required, "
+                f"expected one of {tuple(self.knowledge_graphs)}."
+            )
+        graph_update = self._knowledge_graph(graph_name).update(
+            added_triples=added_triples, removed_triples=removed_triples
+        )
+        kg_update = KnowledgeGraphUpdate(
+            entity_uris={
+                self.entity_id(graph_name, entity_uri)
+                for entity_uri in graph_update.entity_uris
+            },
+            entity_patterns=[
+                {**pattern, "id": self.entity_id(graph_name, pattern["id"])}
+                for pattern in graph_update.entity_patterns
+            ],
+            contexts=(
+                None
+                if graph_update.contexts is None
+                else {
+                    self.entity_id(graph_name, entity_uri): context_string
+                    for entity_uri, context_string in graph_update.contexts.items()
+                }
+            ),
+        )
+        self._apply_update(kg_update)
+        return kg_update
+
+    def sparql_endpoint(
+        self, sparql_query: str, graph_name: Optional[str] = None
+    ) -> Iterable:
+        """SPARQL endpoint to query the composed knowledge graphs.
+
+        Parameters
+        ----------
+        sparql_query : str
+            The SPARQL query to run.
+        graph_name : Optional[str], optional
+            The name of the knowledge graph to query, by default None: the query is run
+            on each graph and the results are chained.
+
+        Returns
+        -------
+        Iterable
+            Iterable over the query results.
+
+        Raises
+        ------
+        ValueError
+            If the graph name is unknown.
+        """
+        if graph_name is not None:
+            return self._knowledge_graph(graph_name).sparql_endpoint(sparql_query)
+        return chain.from_iterable(
+            knowledge_graph.sparql_endpoint(sparql_query)
+            for knowledge_graph in self.knowledge_graphs.values()
+        )
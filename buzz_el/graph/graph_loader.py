@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from os import PathLike
-from typing import Callable, Dict, List
+from typing import Any, Callable, Dict, Sequence
 
 from spacy.util import ensure_path
 
@@ -15,7 +15,7 @@ class GraphLoader(ABC):
     _kg_file_path : PathLike
         The path to the knowledge graph file.
     kg: Any
-        The knowledge graph object.
+        The knowledge graph object, loaded from the file on first access.
     """
 
     def __init__(self, kg_file_path: PathLike) -> None:
@@ -28,19 +28,37 @@ class GraphLoader(ABC):
         """
         self._kg_file_path = ensure_path(kg_file_path)
 
-        self.kg = self.load_kg_from_file()
+        self._kg = None
+        self._kg_loaded = False
+
+    @property
+    def kg(self) -> Any:
+        """Getter for the knowledge graph object.
+
+        The file is only loaded on first access, so that loaders able to skip it
+        (e.g. when reusing a snapshot) never pay for it.
+
+        Returns
+        -------
+        Any
+            The knowledge graph object.
+        """
+        if not self._kg_loaded:
+            self._kg = self.load_kg_from_file()
+            self._kg_loaded = True
+        return self._kg
 
     @abstractmethod
     def load_kg_from_file(self) -> None:
         """Load the knowledge graph from the specified file."""
 
     @abstractmethod
-    def build_patterns(self) -> List[Dict[str, str]]:
+    def build_patterns(self) -> Sequence[Dict[str, str]]:
         """Build the entity patterns.
 
         Returns
         -------
-        List[Dict[str, str]]
+        Sequence[Dict[str, str]]
             The entity patterns.
         """
 
@@ -1,4 +1,43 @@
-from typing import Any, Callable, Dict, Iterable, List
+from os import PathLike
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ..commons.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from .context_cache import ContextCache
+from .entity_patterns import EntityPatterns
+from .snapshot import load_snapshot, save_snapshot
+
+Triple = Tuple[Any, Any, Any]
+
+
+class KnowledgeGraphUpdate(NamedTuple):
+    """
+    The changes of the entities affected by a knowledge graph diff.
+
+    Attributes
+    ----------
+    entity_uris : Set[str]
+        The URIs of the entities whose patterns or context strings may have changed.
+    entity_patterns : List[Dict[str, str]]
+        The new patterns of these entities, replacing all their previous patterns.
+    contexts : Optional[Dict[str, str]]
+        The new context strings of these entities, empty strings for entities without
+        context, None if the context strings are not precomputed.
+    """
+
+    entity_uris: Set[str]
+    entity_patterns: List[Dict[str, str]]
+    contexts: Optional[Dict[str, str]] = None
 
 
 class KnowledgeGraph:
@@ -11,17 +50,33 @@ class KnowledgeGraph:
     ----------
     kg: Any
         The KG object.
-    entity_patterns: List[Dict[str, str]]
+    entity_patterns: Sequence[Dict[str, str]]
         The entity patterns.
     get_context : Callable[[str], str]
         Callable to fetch the context string of an entity.
+    context_index : Optional[Dict[str, str]]
+        Precomputed entity URI to context string index, if any.
+    context_cache : Optional[ContextCache]
+        Cache wrapping the get_context callable, if any.
+    apply_diff : Optional[Callable[[List[Triple], List[Triple]], KnowledgeGraphUpdate]]
+        Callable applying added and removed triples to the KG object, if supported.
+    instrumentation : Instrumentation
+        The instrumentation recording the get_context wall time and number of lookups
+        ("knowledge_graph.get_context" and "knowledge_graph.get_context.calls"), it can
+        be set after the knowledge graph is built, e.g. by a graph loader.
     """
 
     def __init__(
         self,
         kg: Any,
-        entity_patterns: List[Dict[str, str]],
+        entity_patterns: Sequence[Dict[str, str]],
         get_entity_context: Callable[[str], str],
+        context_index: Optional[Dict[str, str]] = None,
+        context_cache: Optional[ContextCache] = None,
+        apply_diff: Optional[
+            Callable[[List[Triple], List[Triple]], KnowledgeGraphUpdate]
+        ] = None,
+        instrumentation: Optional[Instrumentation] = None,
     ) -> None:
         """Initialise the knowledge graph object.
 
@@ -29,15 +84,204 @@ class KnowledgeGraph:
         ----------
         kg: Any
             The KG object.
-        entity_patterns: List[Dict[str, str]]
+        entity_patterns: Sequence[Dict[str, str]]
             The entity patterns.
         get_entity_context : Callable[[str], str]
             Callable to fetch the context string of an entity.
+        context_index : Optional[Dict[str, str]], optional
+            Precomputed entity URI to context string index, by default None.
+        context_cache : Optional[ContextCache], optional
+            Cache to wrap the get_context callable with, by default None.
+            It is useful when the contexts are not precomputed, as popular entities are
+            looked up again and again.
+        apply_diff : Optional[Callable[[List[Triple], List[Triple]], KnowledgeGraphUpdate]], optional
+            Callable applying added and removed triples to the KG object and returning the
+            affected entities changes, by default None (no incremental update support).
+            It is typically provided by the graph loader.
+        instrumentation : Optional[Instrumentation], optional
+            The instrumentation recording the context lookups, by default None (nothing
+            is recorded).
         """
 
         self.kg = kg
         self.entity_patterns = entity_patterns
-        self.get_context = get_entity_context
+        self.context_index = context_index
+        self.context_cache = context_cache
+        self.apply_diff = apply_diff
+        if self.context_cache is None:
+            self._get_entity_context = get_entity_context
+        else:
+            self._get_entity_context = self.context_cache(get_entity_context)
+        self.instrumentation = instrumentation
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """The instrumentation recording the context lookups."""
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation: Optional[Instrumentation]) -> None:
+        self._instrumentation = (
+            NO_INSTRUMENTATION if instrumentation is None else instrumentation
+        )
+        self.get_context = self._instrumentation.wrap(
+            "knowledge_graph.get_context", self._get_entity_context
+        )
+
+    def entity_uris(self) -> Iterable[str]:
+        """Get the distinct URIs of the entities with patterns.
+
+        Returns
+        -------
+        Iterable[str]
+            The entity URIs.
+        """
+        if isinstance(self.entity_patterns, EntityPatterns):
+            return self.entity_patterns.uris
+        return dict.fromkeys(pattern["id"] for pattern in self.entity_patterns)
+
+    def to_disk(
+        self, path: PathLike, metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Save the entity patterns and context strings to a binary snapshot file.
+
+        The underlying KG object is not saved. If there is no precomputed context index,
+        the context strings of the entities having patterns are fetched with get_context.
+
+        Parameters
+        ----------
+        path : PathLike
+            The snapshot file path.
+        metadata : Optional[Dict[str, Any]], optional
+            JSON serialisable metadata stored in the snapshot, by default None.
+        """
+        context_index = self.context_index
+        if context_index is None:
+            context_index = {
+                pattern["id"]: self.get_context(pattern["id"])
+                for pattern in self.entity_patterns
+            }
+
+        save_snapshot(
+            path,
+            entity_patterns=self.entity_patterns,
+            context_index=context_index,
+            metadata=metadata,
+        )
+
+    def update(
+        self,
+        added_triples: Iterable[Triple] = (),
+        removed_triples: Iterable[Triple] = (),
+        *,
+        graph_name: Optional[str] = None,
+    ) -> KnowledgeGraphUpdate:
+        """Apply a diff to the knowledge graph, without rebuilding it.
+
+        Only the entities affected by the diff are processed: their patterns are replaced,
+        their precomputed context strings updated and their cached context strings
+        invalidated. Triples of an N-Triples diff can be read with rdflib, e.g.
+        `Graph().parse(data=diff, format="nt")`.
+
+        Parameters
+        ----------
+        added_triples : Iterable[Triple], optional
+            The triples to add, by default ().
+        removed_triples : Iterable[Triple], optional
+            The triples to remove, by default ().
+        graph_name : Optional[str], optional
+            The name of the knowledge graph the diff applies to, only for knowledge graphs
+            composed of named graphs (see FederatedKnowledgeGraph), by default None.
+
+        Returns
+        -------
+        KnowledgeGraphUpdate
+            The changes of the affected entities, to propagate to the entity matchers.
+
+        Raises
+        ------
+        ValueError
+            If the knowledge graph does not support incremental updates, e.g. when loaded
+            from a snapshot, or a graph name is given.
+        """
+        if graph_name is not None:
+            raise ValueError(
+                f"This knowledge graph has no named graph, got '{graph_name}'."
+            )
+        if self.apply_diff is None:
+            raise ValueError(
+                "This knowledge graph does not support incremental updates."
+            )
+
+        kg_update = self.apply_diff(list(added_triples), list(removed_triples))
+        self._apply_update(kg_update)
+        return kg_update
+
+    def _apply_update(self, kg_update: KnowledgeGraphUpdate) -> None:
+        """Replace the patterns and context strings of the entities of an update.
+
+        Parameters
+        ----------
+        kg_update : KnowledgeGraphUpdate
+            The changes of the entities affected by a diff.
+        """
+        if not kg_update.entity_uris:
+            return
+
+        if not isinstance(self.entity_patterns, EntityPatterns):
+            # converted once, the next updates are applied in place
+            self.entity_patterns = EntityPatterns(self.entity_patterns)
+        self.entity_patterns.remove_ids(kg_update.entity_uris)
+        self.entity_patterns.extend(kg_update.entity_patterns)
+
+        if self.context_index is not None and kg_update.contexts is not None:
+            for entity_uri, context_string in kg_update.contexts.items():
+                if context_string:
+                    self.context_index[entity_uri] = context_string
+                else:
+                    self.context_index.pop(entity_uri, None)
+        if self.context_cache is not None:
+            for entity_uri in kg_update.entity_uris:
+                self.context_cache.invalidate(entity_uri)
+
+    @classmethod
+    def from_disk(
+        cls,
+        path: PathLike,
+        kg: Any = None,
+        context_cache: Optional[ContextCache] = None,
+    ) -> "KnowledgeGraph":
+        """Load a knowledge graph instance from a binary snapshot file.
+
+        The snapshot is memory mapped: the entity patterns and context strings are only
+        decoded when accessed.
+
+        Parameters
+        ----------
+        path : PathLike
+            The snapshot file path.
+        kg : Any, optional
+            The KG object, by default None as it is not part of the snapshot.
+        context_cache : Optional[ContextCache], optional
+            Cache to wrap the get_context callable with, by default None.
+
+        Returns
+        -------
+        KnowledgeGraph
+            The knowledge graph instance.
+        """
+        entity_patterns, context_index, _ = load_snapshot(path)
+
+        def get_indexed_context(entity_uri: str) -> str:
+            return context_index.get(entity_uri, "")
+
+        return cls(
+            kg=kg,
+            entity_patterns=entity_patterns,
+            get_entity_context=get_indexed_context,
+            context_index=context_index,
+            context_cache=context_cache,
+        )
 
     def sparql_endpoint(self, sparql_query: str) -> Iterable:
         """SPARQL endpoint to query the knowledge graph.
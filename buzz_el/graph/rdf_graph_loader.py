@@ -1,11 +1,24 @@
+import hashlib
+import json
+import re
+from itertools import chain
 from os import PathLike
-from typing import Callable, Dict, List, Optional, Set
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from rdflib import Graph
+from rdflib import Graph, Literal, URIRef
+from rdflib.term import Node
+from spacy.util import ensure_path
 
 from ..commons.utils import is_valid_url
+from .context_cache import ContextCache
+from .entity_adjacency import EntityAdjacency
+from .entity_patterns import EntityPatterns
 from .graph_loader import GraphLoader
-from .knowledge_graph import KnowledgeGraph
+from .knowledge_graph import KnowledgeGraph, KnowledgeGraphUpdate, Triple
+from .snapshot import read_snapshot_header, save_snapshot
+
+# a single IRI, either <full/uri> or prefix:localName, i.e. not a complex property path
+_SIMPLE_PROPERTY_PATTERN = re.compile(r"^(<[^<>\s]+>|[A-Za-z][\w.-]*:[\w.-]*)$")
 
 
 class RDFGraphLoader(GraphLoader):
@@ -39,6 +52,22 @@ class RDFGraphLoader(GraphLoader):
         by default None.
     _sparql_lang_filter_str: str
         The portion of the SPARQL query constituting the language filter.
+    lang_filter_tag : str
+        Same as _lang_filter, setting it updates the SPARQL language filter.
+    entity_patterns : EntityPatterns
+        The entity patterns, built once on first access.
+    _entity_patterns : Optional[EntityPatterns]
+        The cached entity patterns, None until built.
+    precompute_contexts : bool
+        Whether to compute all the entity context strings in one bulk pass when building
+        the knowledge graph instance, by default False.
+    context_index : Optional[Dict[str, str]]
+        The entity URI to context string index, only set once built with
+        precompute_contexts enabled.
+    context_cache : Optional[ContextCache]
+        Cache to wrap the knowledge graph instance get_context method with, by default None.
+    snapshot_path : Optional[PathLike]
+        Path of the knowledge graph snapshot file to reuse or create, by default None.
     """
 
     def __init__(
@@ -47,6 +76,9 @@ class RDFGraphLoader(GraphLoader):
         label_properties: Optional[Set[str]] = None,
         context_properties: Optional[Set[str]] = None,
         lang_filter_tag: Optional[str] = None,
+        precompute_contexts: Optional[bool] = False,
+        context_cache: Optional[ContextCache] = None,
+        snapshot_path: Optional[PathLike] = None,
     ) -> None:
         """Initialise the RDF graph loader object.
 
@@ -61,34 +93,43 @@ class RDFGraphLoader(GraphLoader):
         lang_filter_tag : Optional[str], optional
             Language filter tag to filter entity labels and context strings based on language,
             by default None.
+        precompute_contexts : Optional[bool], optional
+            Whether to compute all the entity context strings in one bulk pass when building
+            the knowledge graph instance, by default False.
+            The knowledge graph get_context method is then a simple index lookup instead of
+            a SPARQL query per entity.
+        context_cache : Optional[ContextCache], optional
+            Cache to wrap the knowledge graph instance get_context method with,
+            by default None.
+        snapshot_path : Optional[PathLike], optional
+            Path of the knowledge graph snapshot file, by default None.
+            When set, a snapshot built from the same file with the same settings is reused
+            instead of parsing the file. Otherwise the snapshot is (re)built.
         """
 
         super().__init__(kg_file_path)
 
+        self._sparql_var = "sparql_key"
+
+        self._entity_patterns = None
+        self.context_index = None
+
         self._label_properties = {"rdfs:label"}
+        self._label_sparql_alt_path_str = "|".join(self._label_properties)
         self.label_properties = label_properties
 
         self._context_properties = None
+        self._context_sparql_alt_path_str = None
         self.context_properties = context_properties
 
-        self._label_sparql_alt_path_str = "|".join(self._label_properties)
-
-        if self._context_properties is None:
-            self._context_sparql_alt_path_str = None
-        else:
-            self._context_sparql_alt_path_str = "|".join(self._context_properties)
-
-        self._sparql_var = "sparql_key"
+        self.lang_filter_tag = lang_filter_tag
 
-        self._lang_filter = lang_filter_tag
-        self._sparql_lang_filter_str = (
-            f'FILTER ( lang(?{self._sparql_var}) = "{self._lang_filter}" )'
-            if self._lang_filter
-            else ""
+        self.precompute_contexts = precompute_contexts
+        self.context_cache = context_cache
+        self.snapshot_path = (
+            None if snapshot_path is None else ensure_path(snapshot_path)
         )
 
-        self.entity_patterns = self.build_patterns()
-
     @property
     def label_properties(self) -> Set[str]:
         """Getter for the label properties attribute.
@@ -105,6 +146,7 @@ class RDFGraphLoader(GraphLoader):
         """Setter for the label properties attribute.
 
         Ensure properties'strings are ready to be used in a SPARQL query.
+        The cached entity patterns and context index are invalidated.
 
         Parameters
         ----------
@@ -121,6 +163,8 @@ class RDFGraphLoader(GraphLoader):
                     label_properties.add(prop)
 
             self._label_properties = label_properties
+            self._label_sparql_alt_path_str = "|".join(self._label_properties)
+            self.invalidate_cache()
 
     @property
     def context_properties(self) -> Set[str]:
@@ -138,6 +182,7 @@ class RDFGraphLoader(GraphLoader):
         """Setter for the context properties attribute.
 
         Ensure properties'strings are ready to be used in a SPARQL query.
+        The cached context index is invalidated.
 
         Parameters
         ----------
@@ -154,6 +199,62 @@ class RDFGraphLoader(GraphLoader):
                     context_properties.add(prop)
 
             self._context_properties = context_properties
+            self._context_sparql_alt_path_str = "|".join(self._context_properties)
+            self.context_index = None
+
+    @property
+    def lang_filter_tag(self) -> Optional[str]:
+        """Getter for the language filter tag attribute.
+
+        Returns
+        -------
+        Optional[str]
+            The language filter tag.
+        """
+        return self._lang_filter
+
+    @lang_filter_tag.setter
+    def lang_filter_tag(self, lang_filter_tag: Optional[str]) -> None:
+        """Setter for the language filter tag attribute.
+
+        Build the matching SPARQL language filter and invalidate the cached entity patterns
+        and context index.
+
+        Parameters
+        ----------
+        lang_filter_tag : Optional[str]
+            The language filter tag.
+        """
+        self._lang_filter = lang_filter_tag
+        self._sparql_lang_filter_str = (
+            f'FILTER ( lang(?{self._sparql_var}) = "{self._lang_filter}" )'
+            if self._lang_filter
+            else ""
+        )
+        self.invalidate_cache()
+
+    @property
+    def entity_patterns(self) -> EntityPatterns:
+        """Getter for the entity patterns attribute.
+
+        The patterns are built on first access only and reused afterwards.
+
+        Returns
+        -------
+        EntityPatterns
+            The entity patterns.
+        """
+        if self._entity_patterns is None:
+            self._entity_patterns = self.build_patterns()
+        return self._entity_patterns
+
+    def invalidate_cache(self) -> None:
+        """Drop the cached entity patterns and context index.
+
+        They are rebuilt on next use, e.g. after the underlying graph has been modified.
+        """
+        self._entity_patterns = None
+        self.context_index = None
 
     def __call__(self) -> KnowledgeGraph:
         """Builds and return the knowledge graph instance.
@@ -175,38 +276,121 @@ class RDFGraphLoader(GraphLoader):
 
         return kg
 
-    def build_patterns(self) -> List[Dict[str, str]]:
+    def build_patterns(self) -> EntityPatterns:
         """Build the entity patterns.
 
+        When all the label properties are single IRIs, the labels are read directly from
+        the graph triple index. Otherwise, e.g. for complex property paths, a SPARQL query
+        is run.
+
         Returns
         -------
-        List[Dict[str, str]]
-            The entity patterns.
+        EntityPatterns
+            The entity patterns, in a memory compact store.
         """
-        query = self._build_ent_labels_sparql_query()
+        label_predicates = self._resolve_properties(self._label_properties)
 
-        sparql_res = self.kg.query(query)
+        if label_predicates is None:
+            query = self._build_ent_labels_sparql_query()
+            ent_labels = (
+                (res["ent_uri"], res[self._sparql_var]) for res in self.kg.query(query)
+            )
+        else:
+            ent_labels = self._iter_property_values(label_predicates)
 
-        patterns = []
-        for res in sparql_res:
+        # deduplicate on the string values while keeping the graph order
+        distinct_ent_labels = dict.fromkeys(
+            (str(ent_uri), str(label)) for ent_uri, label in ent_labels
+        )
+
+        patterns = EntityPatterns()
+        for ent_uri, label in distinct_ent_labels:
             patterns.append(
                 {
                     "label": "KG_ENT",
-                    "pattern": str(res[self._sparql_var]),
-                    "id": str(res["ent_uri"]),
+                    "pattern": label,
+                    "id": ent_uri,
                 }
             )
 
         return patterns
 
-    def _build_ent_labels_sparql_query(self) -> str:
+    def _resolve_properties(self, props: Set[str]) -> Optional[List[URIRef]]:
+        """Resolve the properties to their predicate IRIs.
+
+        Parameters
+        ----------
+        props : Set[str]
+            The properties, as processed to be used in a SPARQL query.
+
+        Returns
+        -------
+        Optional[List[URIRef]]
+            The predicate IRIs, None if one of the properties is not a single IRI
+            (e.g. a SPARQL property path) or uses an unknown prefix.
+        """
+        predicates = []
+        for prop in props:
+            if not _SIMPLE_PROPERTY_PATTERN.match(prop):
+                return None
+            if prop.startswith("<"):
+                predicates.append(URIRef(prop[1:-1]))
+            else:
+                try:
+                    predicates.append(self.kg.namespace_manager.expand_curie(prop))
+                except ValueError:
+                    return None
+        return predicates
+
+    def _iter_property_values(
+        self, predicates: Iterable[URIRef], subjects: Optional[Iterable[Node]] = None
+    ) -> Iterable[Tuple[Node, Node]]:
+        """Iterate over the (subject, value) pairs of the predicates from the triple index.
+
+        The values are filtered with the language filter the same way the SPARQL queries do.
+
+        Parameters
+        ----------
+        predicates : Iterable[URIRef]
+            The predicates to look up.
+        subjects : Optional[Iterable[Node]], optional
+            The subjects to look up, by default None (all subjects).
+
+        Yields
+        ------
+        Tuple[Node, Node]
+            The subjects and their values.
+        """
+        subjects = [None] if subjects is None else list(subjects)
+        for predicate in predicates:
+            for subject, _, value in chain.from_iterable(
+                self.kg.triples((subject, predicate, None)) for subject in subjects
+            ):
+                if self._lang_filter and not (
+                    isinstance(value, Literal) and value.language == self._lang_filter
+                ):
+                    continue
+                yield subject, value
+
+    def _build_ent_labels_sparql_query(
+        self, entity_uris: Optional[Iterable[str]] = None
+    ) -> str:
         """
         Build the SPARQL query for extracting distinct entity URIs and labels.
 
         The query is based on the specified label properties and language filter.
+        It can be restricted to some entities.
         """
+        values_str = ""
+        if entity_uris is not None:
+            values_str = (
+                "VALUES ?ent_uri { "
+                + " ".join(f"<{entity_uri}>" for entity_uri in entity_uris)
+                + " }"
+            )
         sparql_q_ent_labels = f"""
             SELECT DISTINCT ?ent_uri ?{self._sparql_var} WHERE {{
+                {values_str}
                 ?ent_uri {self._label_sparql_alt_path_str} ?{self._sparql_var} .
                 {self._sparql_lang_filter_str}
             }}
@@ -245,15 +429,120 @@ class RDFGraphLoader(GraphLoader):
 
         return ent_context_query
 
+    def _build_ents_context_from_labels_query(self) -> str:
+        """
+        Build the SPARQL query for extracting all entities context strings from the surrounding
+        entities at once.
+
+        The query is based on the specified label properties and language filter.
+        """
+        ents_context_query = f"""
+            SELECT DISTINCT ?ent_uri ?{self._sparql_var} WHERE {{
+                ?ent_uri  ?p  ?context_ent .
+                ?context_ent {self._label_sparql_alt_path_str} ?{self._sparql_var} .
+                {self._sparql_lang_filter_str}
+            }}
+        """
+
+        return ents_context_query
+
+    def _build_ents_context_from_props_query(self) -> str:
+        """
+        Build the SPARQL query for extracting all entities context strings from the specified
+        context properties at once.
+
+        The query is based on the specified context properties and language filter.
+        """
+        ents_context_query = f"""
+            SELECT DISTINCT ?ent_uri ?{self._sparql_var} WHERE {{
+                ?ent_uri {self._context_sparql_alt_path_str} ?{self._sparql_var} .
+                {self._sparql_lang_filter_str}
+            }}
+        """
+
+        return ents_context_query
+
+    def build_context_index(self) -> Dict[str, str]:
+        """Build the entity URI to context string index in one bulk pass over the graph.
+
+        The context strings are the same as the ones returned by the per entity SPARQL
+        queries, i.e. the distinct context values joined with a space.
+
+        Returns
+        -------
+        Dict[str, str]
+            The entity URI to context string index.
+        """
+        context_predicates = None
+        if self.context_properties is not None:
+            context_predicates = self._resolve_properties(self._context_properties)
+            query = self._build_ents_context_from_props_query()
+        else:
+            query = self._build_ents_context_from_labels_query()
+
+        if context_predicates is None:
+            ent_contexts = (
+                (res["ent_uri"], res[self._sparql_var]) for res in self.kg.query(query)
+            )
+        else:
+            ent_contexts = self._iter_property_values(context_predicates)
+
+        ent_context_strings = {}
+        for ent_uri, context in dict.fromkeys(ent_contexts):
+            ent_context_strings.setdefault(str(ent_uri), []).append(context)
+
+        context_index = {
+            ent_uri: " ".join(context_strings)
+            for ent_uri, context_strings in ent_context_strings.items()
+        }
+
+        return context_index
+
+    def build_adjacency(self) -> EntityAdjacency:
+        """Export the links between the entities as a compact CSR adjacency.
+
+        The entities are the ones with patterns, and two entities are adjacent if a triple
+        links them, in either direction, whatever the predicate.
+
+        Returns
+        -------
+        EntityAdjacency
+            The entity adjacency.
+        """
+        return EntityAdjacency.from_triples(self.entity_patterns.uris, self.kg)
+
     def kg_get_context(self) -> Callable[[str], str]:
         """Build and return the knowledge graph instance get_context method.
 
+        If precompute_contexts is enabled, the context index is built and the returned
+        method is a lookup in that index.
+
         Returns
         -------
         Callable[[str], str]
             The get_context method.
         """
 
+        if self.precompute_contexts:
+            if self.context_index is None:
+                self.context_index = self.build_context_index()
+            context_index = self.context_index
+
+            def get_indexed_context(entity_uri: str) -> str:
+                return context_index.get(entity_uri, "")
+
+            return get_indexed_context
+
+        return self._sparql_get_context()
+
+    def _sparql_get_context(self) -> Callable[[str], str]:
+        """Build the get_context method running a SPARQL query per entity.
+
+        Returns
+        -------
+        Callable[[str], str]
+            The get_context method.
+        """
         if self.context_properties is not None:
             get_sparql_query = self._build_ent_context_from_props_query
         else:
@@ -274,20 +563,154 @@ class RDFGraphLoader(GraphLoader):
 
         return get_context
 
+    def kg_apply_diff(
+        self,
+    ) -> Callable[[List[Triple], List[Triple]], KnowledgeGraphUpdate]:
+        """Build and return the knowledge graph instance apply_diff method.
+
+        The returned method applies added and removed triples to the rdflib graph, and
+        recomputes the patterns (and the context strings, if precomputed) of the affected
+        entities only: the subjects of the triples and, when the context strings are
+        built from the surrounding entities labels, the entities linking to them.
+
+        Returns
+        -------
+        Callable[[List[Triple], List[Triple]], KnowledgeGraphUpdate]
+            The apply_diff method.
+        """
+        get_context = self._sparql_get_context()
+
+        def apply_diff(
+            added_triples: List[Triple], removed_triples: List[Triple]
+        ) -> KnowledgeGraphUpdate:
+            for triple in removed_triples:
+                self.kg.remove(triple)
+            for triple in added_triples:
+                self.kg.add(triple)
+            # the loader cached patterns no longer match the graph
+            self._entity_patterns = None
+
+            subjects = {subject for subject, _, _ in added_triples + removed_triples}
+            if self.context_properties is None:
+                subjects.update(
+                    linking_subject
+                    for subject in list(subjects)
+                    for linking_subject in self.kg.subjects(object=subject)
+                )
+            entity_uris = {
+                str(subject) for subject in subjects if isinstance(subject, URIRef)
+            }
+
+            label_predicates = self._resolve_properties(self._label_properties)
+            if label_predicates is None:
+                query = self._build_ent_labels_sparql_query(entity_uris)
+                ent_labels = (
+                    (res["ent_uri"], res[self._sparql_var])
+                    for res in self.kg.query(query)
+                )
+            else:
+                ent_labels = self._iter_property_values(
+                    label_predicates, [URIRef(entity_uri) for entity_uri in entity_uris]
+                )
+            entity_patterns = [
+                {"label": "KG_ENT", "pattern": label, "id": ent_uri}
+                for ent_uri, label in dict.fromkeys(
+                    (str(ent_uri), str(label)) for ent_uri, label in ent_labels
+                )
+            ]
+
+            contexts = None
+            if self.precompute_contexts:
+                contexts = {
+                    entity_uri: get_context(entity_uri) for entity_uri in entity_uris
+                }
+
+            return KnowledgeGraphUpdate(
+                entity_uris=entity_uris,
+                entity_patterns=entity_patterns,
+                contexts=contexts,
+            )
+
+        return apply_diff
+
+    def snapshot_fingerprint(self) -> str:
+        """Compute the fingerprint identifying the snapshot of this loader.
+
+        It is a hash of the knowledge graph file content and of the loader settings.
+
+        Returns
+        -------
+        str
+            The fingerprint hexadecimal digest.
+        """
+        settings = {
+            "loader": type(self).__name__,
+            "label_properties": sorted(self._label_properties),
+            "context_properties": (
+                None
+                if self._context_properties is None
+                else sorted(self._context_properties)
+            ),
+            "lang_filter_tag": self._lang_filter,
+        }
+        fingerprint = hashlib.sha256(
+            json.dumps(settings, sort_keys=True).encode("utf-8")
+        )
+        with open(self._kg_file_path, "rb") as kg_file:
+            for chunk in iter(lambda: kg_file.read(1 << 20), b""):
+                fingerprint.update(chunk)
+
+        return fingerprint.hexdigest()
+
+    def _is_snapshot_valid(self, fingerprint: str) -> bool:
+        """Check whether the snapshot file exists and matches the fingerprint."""
+        if not self.snapshot_path.exists():
+            return False
+        try:
+            header = read_snapshot_header(self.snapshot_path)
+        except ValueError:
+            return False
+        return header["metadata"].get("fingerprint") == fingerprint
+
     def build_knowledge_graph(self) -> KnowledgeGraph:
         """Builds and return the knowledge graph instance.
 
+        If a valid snapshot exists, the instance is loaded from it without parsing the
+        knowledge graph file, hence without underlying rdflib graph. Otherwise, the
+        instance is built from the graph and the snapshot is saved, if a path is set.
+
         Returns
         -------
         KnowledgeGraph
             The knowledge graph instance.
         """
+        if self.snapshot_path is not None:
+            fingerprint = self.snapshot_fingerprint()
+            if self._is_snapshot_valid(fingerprint):
+                return KnowledgeGraph.from_disk(
+                    self.snapshot_path, context_cache=self.context_cache
+                )
 
-        entity_patterns = self.build_patterns()
         get_context = self.kg_get_context()
 
         kg_instance = KnowledgeGraph(
-            kg=self.kg, entity_patterns=entity_patterns, get_entity_context=get_context
+            kg=self.kg,
+            entity_patterns=self.entity_patterns,
+            get_entity_context=get_context,
+            context_index=self.context_index,
+            context_cache=self.context_cache,
+            apply_diff=self.kg_apply_diff(),
         )
 
+        if self.snapshot_path is not None:
+            context_index = self.context_index
+            if context_index is None:
+                context_index = self.build_context_index()
+            save_snapshot(
+                self.snapshot_path,
+                entity_patterns=self.entity_patterns,
+                context_index=context_index,
+                metadata={"fingerprint": fingerprint},
+            )
+
         return kg_instance
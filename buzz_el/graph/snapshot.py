@@ -0,0 +1,322 @@
+import json
+import mmap
+import os
+from os import PathLike
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from spacy.util import ensure_path
+
+from .entity_patterns import EntityPatterns
+
+SNAPSHOT_MAGIC = b"BUZZKG\x00\x01"
+SNAPSHOT_VERSION = 1
+# sections are aligned so that numpy views over the memory map are aligned too
+_SECTION_ALIGNMENT = 8
+_HEADER_SIZE_DTYPE = np.dtype("<u8")
+
+
+class StringTable(Sequence[str]):
+    """
+    A compact read-only sequence of strings.
+
+    All the strings are stored UTF-8 encoded in one contiguous buffer, string i being
+    data[offsets[i]:offsets[i + 1]]. Strings are only decoded when accessed, so the table
+    can be backed by a memory map.
+
+    Attributes
+    ----------
+    offsets : np.ndarray
+        The strings start offsets in the buffer, plus the buffer size.
+    data : np.ndarray
+        The buffer of UTF-8 encoded strings.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        """Initialise the string table.
+
+        Parameters
+        ----------
+        offsets : np.ndarray
+            The strings start offsets in the buffer, plus the buffer size.
+        data : np.ndarray
+            The buffer of UTF-8 encoded strings.
+        """
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        """Build a string table from strings.
+
+        Parameters
+        ----------
+        strings : Iterable[str]
+            The strings to store.
+
+        Returns
+        -------
+        StringTable
+            The string table.
+        """
+        encoded_strings = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded_strings) + 1, dtype="<u8")
+        np.cumsum(
+            np.array([len(string) for string in encoded_strings], dtype="<u8"),
+            out=offsets[1:],
+        )
+        data = np.frombuffer(b"".join(encoded_strings), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class SnapshotContextIndex(Mapping[str, str]):
+    """
+    Read-only entity URI to context string index over snapshot arrays.
+
+    The URI to id dictionary is only built on first lookup.
+    """
+
+    def __init__(
+        self, uris: StringTable, contexts: StringTable, context_rows: np.ndarray
+    ) -> None:
+        """Initialise the context index view.
+
+        Parameters
+        ----------
+        uris : StringTable
+            The entity URIs table.
+        contexts : StringTable
+            The context strings table.
+        context_rows : np.ndarray
+            For each entity URI id, the row of its context string, -1 if it has none.
+        """
+        self._uris = uris
+        self._contexts = contexts
+        self._context_rows = context_rows
+        self._uri_ids = None
+
+    def _get_uri_ids(self) -> Dict[str, int]:
+        """Get the entity URI to id dictionary, building it if needed."""
+        if self._uri_ids is None:
+            self._uri_ids = {uri: uri_id for uri_id, uri in enumerate(self._uris)}
+        return self._uri_ids
+
+    def __getitem__(self, entity_uri: str) -> str:
+        uri_id = self._get_uri_ids()[entity_uri]
+        row = self._context_rows[uri_id]
+        if row < 0:
+            raise KeyError(entity_uri)
+        return self._contexts[row]
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def __iter__(self) -> Iterator[str]:
+        for uri_id in np.flatnonzero(self._context_rows >= 0):
+            yield self._uris[uri_id]
+
+
+def _align(position: int) -> int:
+    """Round a file position up to the section alignment."""
+    return -(-position // _SECTION_ALIGNMENT) * _SECTION_ALIGNMENT
+
+
+def _string_table_sections(name: str, strings: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Build the snapshot sections of a string table."""
+    table = StringTable.from_strings(strings)
+    return {f"{name}_offsets": table.offsets, f"{name}_data": table.data}
+
+
+def save_snapshot(
+    path: PathLike,
+    entity_patterns: Iterable[Dict[str, str]],
+    context_index: Mapping[str, str],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Save entity patterns and a context index to a binary snapshot file.
+
+    The file is made of a magic string, a JSON header describing the sections and the
+    sections themselves, i.e. little endian arrays that can be memory mapped as is.
+    The file is replaced atomically.
+
+    Parameters
+    ----------
+    path : PathLike
+        The snapshot file path.
+    entity_patterns : Iterable[Dict[str, str]]
+        The entity patterns, converted to EntityPatterns if needed.
+    context_index : Mapping[str, str]
+        The entity URI to context string index.
+    metadata : Optional[Dict[str, Any]], optional
+        JSON serialisable metadata stored in the header, by default None.
+    """
+    if not isinstance(entity_patterns, EntityPatterns):
+        entity_patterns = EntityPatterns(entity_patterns)
+    uri_ids = {uri: uri_id for uri_id, uri in enumerate(entity_patterns.uris)}
+
+    contexts = []
+    for entity_uri, context_string in context_index.items():
+        uri_ids.setdefault(entity_uri, len(uri_ids))
+        contexts.append((uri_ids[entity_uri], context_string))
+    context_rows = np.full(len(uri_ids), -1, dtype="<i8")
+    for row, (uri_id, _) in enumerate(contexts):
+        context_rows[uri_id] = row
+
+    sections = {
+        **_string_table_sections("uris", uri_ids),
+        **_string_table_sections("entity_labels", entity_patterns.entity_labels),
+        "phrases_offsets": np.asarray(entity_patterns.phrase_offsets, dtype="<u8"),
+        "phrases_data": np.frombuffer(
+            bytes(entity_patterns.phrase_data), dtype=np.uint8
+        ),
+        "pattern_uri_ids": np.asarray(entity_patterns.pattern_uri_ids, dtype="<u4"),
+        "pattern_entity_label_ids": np.asarray(
+            entity_patterns.pattern_entity_label_ids, dtype="<u4"
+        ),
+        **_string_table_sections("contexts", (context for _, context in contexts)),
+        "context_rows": context_rows,
+    }
+
+    section_headers = {}
+    position = 0
+    for name, section in sections.items():
+        section_headers[name] = {
+            "offset": position,
+            "dtype": section.dtype.str,
+            "count": len(section),
+        }
+        position = _align(position + section.nbytes)
+
+    header = json.dumps(
+        {
+            "version": SNAPSHOT_VERSION,
+            "metadata": metadata if metadata is not None else {},
+            "sections": section_headers,
+        }
+    ).encode("utf-8")
+    data_start = _align(len(SNAPSHOT_MAGIC) + _HEADER_SIZE_DTYPE.itemsize + len(header))
+
+    # write next to the target and rename, so readers never see a partial snapshot
+    path = ensure_path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp_path, "wb") as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC)
+        snapshot_file.write(np.array(len(header), dtype=_HEADER_SIZE_DTYPE).tobytes())
+        snapshot_file.write(header)
+        for name, section in sections.items():
+            snapshot_file.seek(data_start + section_headers[name]["offset"])
+            snapshot_file.write(section.tobytes())
+        # empty trailing sections must still be within the file to be memory mapped
+        snapshot_file.truncate(data_start + position)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_header(path: PathLike) -> Dict[str, Any]:
+    """Read the header of a snapshot file, without reading its sections.
+
+    Parameters
+    ----------
+    path : PathLike
+        The snapshot file path.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The snapshot header, with the format version, metadata and sections description.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a snapshot or has an unsupported version.
+    """
+    with open(ensure_path(path), "rb") as snapshot_file:
+        magic = snapshot_file.read(len(SNAPSHOT_MAGIC))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a knowledge graph snapshot.")
+        header_size = int(
+            np.frombuffer(
+                snapshot_file.read(_HEADER_SIZE_DTYPE.itemsize),
+                dtype=_HEADER_SIZE_DTYPE,
+            )[0]
+        )
+        header = json.loads(snapshot_file.read(header_size).decode("utf-8"))
+
+    if header["version"] != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {header['version']}, "
+            f"expected {SNAPSHOT_VERSION}."
+        )
+    header["data_start"] = _align(
+        len(SNAPSHOT_MAGIC) + _HEADER_SIZE_DTYPE.itemsize + header_size
+    )
+    return header
+
+
+def load_snapshot(
+    path: PathLike,
+) -> Tuple[EntityPatterns, SnapshotContextIndex, Dict[str, Any]]:
+    """Load a snapshot file through a read-only memory map.
+
+    No string is decoded at load time: the returned patterns and context index are views
+    over the memory mapped arrays.
+
+    Parameters
+    ----------
+    path : PathLike
+        The snapshot file path.
+
+    Returns
+    -------
+    Tuple[EntityPatterns, SnapshotContextIndex, Dict[str, Any]]
+        The entity patterns, the context index and the snapshot metadata.
+    """
+    header = read_snapshot_header(path)
+
+    with open(ensure_path(path), "rb") as snapshot_file:
+        # the memory map stays valid once the file is closed
+        buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    sections = {
+        name: np.frombuffer(
+            buffer,
+            dtype=np.dtype(section["dtype"]),
+            count=section["count"],
+            offset=header["data_start"] + section["offset"],
+        )
+        for name, section in header["sections"].items()
+    }
+
+    def string_table(name: str) -> StringTable:
+        return StringTable(sections[f"{name}_offsets"], sections[f"{name}_data"])
+
+    uris = string_table("uris")
+    entity_patterns = EntityPatterns.from_buffers(
+        uris=uris,
+        entity_labels=string_table("entity_labels"),
+        phrase_offsets=sections["phrases_offsets"],
+        phrase_data=sections["phrases_data"],
+        pattern_uri_ids=sections["pattern_uri_ids"],
+        pattern_entity_label_ids=sections["pattern_entity_label_ids"],
+    )
+    context_index = SnapshotContextIndex(
+        uris=uris,
+        contexts=string_table("contexts"),
+        context_rows=sections["context_rows"],
+    )
+
+    return entity_patterns, context_index, header["metadata"]
@@ -0,0 +1,311 @@
+import gzip
+from os import PathLike
+from typing import Callable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, r_wspace, r_wspaces
+from rdflib.term import Node
+
+from ..commons.utils import is_valid_url
+from .context_cache import ContextCache
+from .entity_patterns import EntityPatterns
+from .graph_loader import GraphLoader
+from .knowledge_graph import KnowledgeGraph
+
+
+class _TripleLineParser(W3CNTriplesParser):
+    """N-Triples parser reading the subject, predicate and object of a single line.
+
+    Anything after the object (an N-Quads graph label, the final dot) is ignored.
+    """
+
+    def parse_line(self, line: str) -> Tuple[Node, URIRef, Node]:
+        """Parse a N-Triples or N-Quads line.
+
+        Parameters
+        ----------
+        line : str
+            The line to parse.
+
+        Returns
+        -------
+        Tuple[Node, URIRef, Node]
+            The subject, predicate and object of the line.
+        """
+        self.line = line
+        self.eat(r_wspace)
+        subject = self.subject()
+        self.eat(r_wspaces)
+        predicate = self.predicate()
+        self.eat(r_wspaces)
+        object_ = self.object()
+        return subject, predicate, object_
+
+    def parse_term(self, term: str) -> Node:
+        """Parse a single N-Triples subject term, i.e. an IRI or a blank node.
+
+        Parameters
+        ----------
+        term : str
+            The term to parse.
+
+        Returns
+        -------
+        Node
+            The parsed term.
+        """
+        self.line = term
+        return self.subject()
+
+
+class StreamingRDFGraphLoader(GraphLoader):
+    """
+    A class to build a knowledge graph instance from a line based RDF file
+    (N-Triples or N-Quads, optionally gzipped) without materialising an rdflib graph.
+
+    The file is read line by line and only the triples needed for entity linking are kept:
+    the entity labels and context strings are collected in a single pass.
+    When no context properties are given, the context strings are built from the labels of
+    the surrounding entities as in RDFGraphLoader: the file is then read a second time to
+    collect the links to the labelled entities, so that the other links between nodes are
+    never kept. Memory is bounded by the collected labels and context strings, not by the
+    graph size.
+
+    Attributes
+    ----------
+    kg_file_path : PathLike
+        The path to the knowledge graph file.
+    kg: None
+        No graph object is kept by this loader.
+    label_properties : Set[str]
+        Set of relations used to link entities to their labels, by default {"rdfs:label"}.
+    context_properties : Optional[Set[str]]
+        Set of relations used to link entities to their context strings, by default None.
+    lang_filter_tag : Optional[str]
+        Language filter tag to filter entity labels and context strings based on language,
+        by default None.
+    context_cache : Optional[ContextCache]
+        Cache to wrap the knowledge graph instance get_context method with, by default None.
+    entity_patterns : EntityPatterns
+        The entity patterns collected while reading the file.
+    context_index : Dict[str, str]
+        The entity URI to context string index collected while reading the file.
+    _label_predicates : Set[str]
+        The label properties IRIs, formatted as N-Triples terms.
+    _context_predicates : Optional[Set[str]]
+        The context properties IRIs, formatted as N-Triples terms.
+    """
+
+    def __init__(
+        self,
+        kg_file_path: PathLike,
+        label_properties: Optional[Set[str]] = None,
+        context_properties: Optional[Set[str]] = None,
+        lang_filter_tag: Optional[str] = None,
+        context_cache: Optional[ContextCache] = None,
+    ) -> None:
+        """Initialise the streaming RDF graph loader object and read the file.
+
+        Parameters
+        ----------
+        kg_file_path : PathLike
+            The path to the knowledge graph file.
+        label_properties : Optional[Set[str]], optional
+            Set of relations used to link entities to their labels, by default {"rdfs:label"}.
+            Relations must be full URIs or prefixed names with a well known prefix.
+        context_properties : Optional[Set[str]], optional
+            Set of relations used to link entities to their context strings, by default None.
+            Relations must be full URIs or prefixed names with a well known prefix.
+        lang_filter_tag : Optional[str], optional
+            Language filter tag to filter entity labels and context strings based on language,
+            by default None.
+        context_cache : Optional[ContextCache], optional
+            Cache to wrap the knowledge graph instance get_context method with,
+            by default None.
+        """
+        if label_properties is None:
+            label_properties = {"rdfs:label"}
+        self.label_properties = label_properties
+        self.context_properties = context_properties
+        self.lang_filter_tag = lang_filter_tag
+        self.context_cache = context_cache
+
+        self._label_predicates = self._resolve_properties(self.label_properties)
+        if self.context_properties is None:
+            self._context_predicates = None
+        else:
+            self._context_predicates = self._resolve_properties(self.context_properties)
+
+        self.entity_patterns = EntityPatterns()
+        self.context_index = {}
+
+        super().__init__(kg_file_path)
+        # reading the file is what builds the patterns and context index
+        self.kg
+
+    @staticmethod
+    def _resolve_properties(props: Set[str]) -> Set[str]:
+        """Resolve the properties to their IRIs formatted as N-Triples terms.
+
+        Parameters
+        ----------
+        props : Set[str]
+            The properties, full URIs or prefixed names.
+
+        Returns
+        -------
+        Set[str]
+            The properties IRIs as N-Triples terms, e.g. "<http://...#label>".
+
+        Raises
+        ------
+        ValueError
+            If a prefixed name uses an unknown prefix.
+        """
+        namespace_manager = Graph().namespace_manager
+        predicates = set()
+        for prop in props:
+            if is_valid_url(prop):
+                predicates.add(f"<{prop}>")
+            elif prop.startswith("<") and prop.endswith(">"):
+                predicates.add(prop)
+            else:
+                predicates.add(f"<{namespace_manager.expand_curie(prop)}>")
+        return predicates
+
+    def _open_kg_file(self) -> TextIO:
+        """Open the knowledge graph file as text, decompressing it if needed."""
+        if self._kg_file_path.suffix == ".gz":
+            return gzip.open(self._kg_file_path, "rt", encoding="utf-8")
+        return open(self._kg_file_path, "r", encoding="utf-8")
+
+    def _keep_value(self, value: Node) -> bool:
+        """Apply the language filter to a label or context value."""
+        if not self.lang_filter_tag:
+            return True
+        return isinstance(value, Literal) and value.language == self.lang_filter_tag
+
+    def _triple_lines(self) -> Iterator[Tuple[List[str], str]]:
+        """Read the knowledge graph file lines holding a triple.
+
+        Returns
+        -------
+        Iterator[Tuple[List[str], str]]
+            The subject, predicate and rest of line raw terms, and the line itself.
+        """
+        with self._open_kg_file() as kg_file:
+            for line in kg_file:
+                terms = line.split(None, 2)
+                if len(terms) < 3 or terms[0].startswith("#"):
+                    continue
+                yield terms, line
+
+    def load_kg_from_file(self) -> None:
+        """Read the knowledge graph file and collect the entity patterns and context strings.
+
+        Lines are filtered on their predicate before being parsed, so only the relevant
+        triples are ever turned into rdflib terms. Without context properties, the file
+        is read a second time to build the context strings from the links to the labelled
+        entities.
+        """
+        parser = _TripleLineParser()
+
+        ent_labels = {}
+        ent_contexts = {}
+        # raw N-Triples subject term of the labelled entities, to find the links to them
+        label_terms = {}
+
+        for terms, line in self._triple_lines():
+            predicate = terms[1]
+            if predicate in self._label_predicates:
+                subject, _, value = parser.parse_line(line)
+                if self._keep_value(value):
+                    ent_labels[(str(subject), str(value))] = None
+                    label_terms[terms[0]] = str(subject)
+            elif (
+                self._context_predicates is not None
+                and predicate in self._context_predicates
+            ):
+                subject, _, value = parser.parse_line(line)
+                if self._keep_value(value):
+                    ent_contexts.setdefault(str(subject), {})[value] = None
+
+        self.entity_patterns = EntityPatterns(
+            {"label": "KG_ENT", "pattern": label, "id": ent_uri}
+            for ent_uri, label in ent_labels
+        )
+
+        if self._context_predicates is None:
+            labels_by_uri = {}
+            for ent_uri, label in ent_labels:
+                labels_by_uri.setdefault(ent_uri, []).append(label)
+            # the same parser resolves the blank nodes consistently with the first pass
+            for terms, _ in self._triple_lines():
+                if not terms[2].startswith(("<", "_:")):
+                    continue
+                object_uri = label_terms.get(terms[2].split(None, 1)[0])
+                if object_uri is None:
+                    continue
+                subject_contexts = ent_contexts.setdefault(
+                    str(parser.parse_term(terms[0])), {}
+                )
+                for label in labels_by_uri[object_uri]:
+                    subject_contexts[label] = None
+
+        self.context_index = {
+            ent_uri: " ".join(context_strings)
+            for ent_uri, context_strings in ent_contexts.items()
+        }
+
+    def build_patterns(self) -> EntityPatterns:
+        """Return the entity patterns collected while reading the file.
+
+        Returns
+        -------
+        EntityPatterns
+            The entity patterns.
+        """
+        return self.entity_patterns
+
+    def kg_get_context(self) -> Callable[[str], str]:
+        """Build and return the knowledge graph instance get_context method.
+
+        Returns
+        -------
+        Callable[[str], str]
+            The get_context method, a lookup in the context index.
+        """
+        context_index = self.context_index
+
+        def get_indexed_context(entity_uri: str) -> str:
+            return context_index.get(entity_uri, "")
+
+        return get_indexed_context
+
+    def build_knowledge_graph(self) -> KnowledgeGraph:
+        """Builds and return the knowledge graph instance.
+
+        Returns
+        -------
+        KnowledgeGraph
+            The knowledge graph instance, without any underlying graph object.
+        """
+        kg_instance = KnowledgeGraph(
+            kg=self.kg,
+            entity_patterns=self.build_patterns(),
+            get_entity_context=self.kg_get_context(),
+            context_index=self.context_index,
+            context_cache=self.context_cache,
+        )
+
+        return kg_instance
+
+    def __call__(self) -> KnowledgeGraph:
+        """Builds and return the knowledge graph instance.
+
+        Returns
+        -------
+        KnowledgeGraph
+            The knowledge graph instance.
+        """
+        return self.build_knowledge_graph()
@@ -0,0 +1,9 @@
+from .components import (
+    EntityLinkerComponent,
+    EntityMatcherComponent,
+    KnowledgeGraphComponent,
+    make_context_similarity_disambiguator,
+    make_entity_linker,
+    make_entity_matcher,
+    make_random_disambiguator,
+)
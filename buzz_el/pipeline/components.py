@@ -0,0 +1,376 @@
+from abc import ABC, abstractmethod
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import srsly
+from spacy.language import Language
+from spacy.tokens import Doc
+from spacy.util import ensure_path, registry
+
+from ..disambiguator import ContextSimilarityDisambiguator, Disambiguator
+from ..entity_linker import EntityLinker
+from ..entity_matcher import EntityMatcher, LabelNormalizer, has_content_word
+from ..graph import KnowledgeGraph
+
+KG_SNAPSHOT_FILE_NAME = "kg.snapshot"
+
+
+class KnowledgeGraphComponent(ABC):
+    """
+    Abstract class of the spaCy pipeline components relying on a knowledge graph.
+
+    The knowledge graph is loaded from a snapshot file (see KnowledgeGraph.to_disk) when
+    the pipeline is initialised, and saved along the pipeline with nlp.to_disk.
+
+    Attributes
+    ----------
+    nlp : Language
+        The spaCy pipeline the component belongs to.
+    name : str
+        The component name in the pipeline.
+    cfg : Dict
+        The component configuration, i.e. the entity matcher options, the label
+        normaliser being given as its LabelNormalizer.to_config settings and the fuzzy
+        prefilter as the name of a function registered in spaCy misc registry.
+    kg : Optional[KnowledgeGraph]
+        The knowledge graph, None until the component is initialised.
+    """
+
+    def __init__(self, nlp: Language, name: str, **cfg) -> None:
+        """Initialise the component, without knowledge graph.
+
+        Parameters
+        ----------
+        nlp : Language
+            The spaCy pipeline the component belongs to.
+        name : str
+            The component name in the pipeline.
+        **cfg
+            The component configuration, i.e. the entity matcher options.
+        """
+        self.nlp = nlp
+        self.name = name
+        self.cfg = cfg
+        self.kg = None
+
+    def initialize(
+        self,
+        get_examples: Optional[Callable[[], Iterable]] = None,
+        *,
+        nlp: Optional[Language] = None,
+        kg_snapshot: Optional[Path] = None,
+    ) -> None:
+        """Initialise the component with a knowledge graph snapshot.
+
+        It is called by nlp.initialize, the snapshot path being set in the
+        [initialize.components] section of the pipeline config.
+
+        Parameters
+        ----------
+        get_examples : Optional[Callable[[], Iterable]], optional
+            Unused, the component is not trainable.
+        nlp : Optional[Language], optional
+            Unused, the pipeline is given at construction.
+        kg_snapshot : Optional[Path], optional
+            The knowledge graph snapshot file path, by default None.
+
+        Raises
+        ------
+        ValueError
+            If no snapshot path is given.
+        """
+        if kg_snapshot is None:
+            raise ValueError(
+                f"The '{self.name}' component needs a knowledge graph snapshot, "
+                "set kg_snapshot in its [initialize.components] config section."
+            )
+        self.set_knowledge_graph(KnowledgeGraph.from_disk(kg_snapshot))
+
+    def set_knowledge_graph(self, knowledge_graph: KnowledgeGraph) -> None:
+        """Set the knowledge graph and build the inner components.
+
+        The inner spaCy components only tokenise the entity patterns, the other pipeline
+        components are disabled meanwhile.
+
+        Parameters
+        ----------
+        knowledge_graph : KnowledgeGraph
+            The knowledge graph.
+        """
+        self.kg = knowledge_graph
+        with self.nlp.select_pipes(enable=[]):
+            self._build(knowledge_graph)
+
+    @abstractmethod
+    def _build(self, knowledge_graph: KnowledgeGraph) -> None:
+        """Build the inner components from the knowledge graph."""
+
+    def _entity_matcher(self, knowledge_graph: KnowledgeGraph) -> EntityMatcher:
+        """Build the entity matcher with the component configuration."""
+        cfg = dict(self.cfg)
+        cfg.pop("disambiguator", None)
+        if cfg.get("label_normalizer") is not None:
+            cfg["label_normalizer"] = LabelNormalizer(**cfg["label_normalizer"])
+        if cfg.get("fuzzy_prefilter") is not None:
+            cfg["fuzzy_prefilter"] = registry.misc.get(cfg["fuzzy_prefilter"])
+        return EntityMatcher(knowledge_graph, self.nlp, **cfg)
+
+    @abstractmethod
+    def _process(self, doc: Doc) -> Doc:
+        """Apply the inner components to a doc."""
+
+    @abstractmethod
+    def _pipe(self, docs: Iterable[Doc], batch_size: int) -> Iterable[Doc]:
+        """Apply the inner components to docs, in batches."""
+
+    def __call__(self, doc: Doc) -> Doc:
+        """
+        Apply the component to a spaCy doc.
+
+        Parameters
+        ----------
+        doc : Doc
+            The spaCy doc to process.
+
+        Returns
+        -------
+        Doc
+            The spaCy doc processed.
+
+        Raises
+        ------
+        ValueError
+            If the component is not initialised.
+        """
+        self._check_initialised()
+        return self._process(doc)
+
+    def _check_initialised(self) -> None:
+        """Raise a ValueError if the component is not initialised."""
+        if self.kg is None:
+            raise ValueError(
+                f"The '{self.name}' component is not initialised, "
+                "call nlp.initialize with a knowledge graph snapshot first."
+            )
+
+    def pipe(
+        self, docs: Iterable[Doc], batch_size: Optional[int] = 128
+    ) -> Iterator[Doc]:
+        """
+        Apply the component to an iterable of spaCy docs.
+
+        Parameters
+        ----------
+        docs : Iterable[Doc]
+            An iterable of spaCy docs to process.
+        batch_size : Optional[int], optional
+            Number of docs processed at once by the inner components, by default 128.
+
+        Returns
+        -------
+        Iterator[Doc]
+            An iterator of processed spaCy docs.
+
+        Raises
+        ------
+        ValueError
+            If the component is not initialised.
+        """
+        self._check_initialised()
+        yield from self._pipe(docs, batch_size)
+
+    def to_disk(self, path: PathLike, *, exclude: Iterable[str] = tuple()) -> None:
+        """Save the component configuration and knowledge graph snapshot to a directory.
+
+        Parameters
+        ----------
+        path : PathLike
+            The directory path.
+        exclude : Iterable[str], optional
+            Unused, nothing can be excluded.
+        """
+        path = ensure_path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        srsly.write_json(path / "cfg", self.cfg)
+        if self.kg is not None:
+            self.kg.to_disk(path / KG_SNAPSHOT_FILE_NAME)
+
+    def from_disk(
+        self, path: PathLike, *, exclude: Iterable[str] = tuple()
+    ) -> "KnowledgeGraphComponent":
+        """Load the component configuration and knowledge graph snapshot from a directory.
+
+        Parameters
+        ----------
+        path : PathLike
+            The directory path.
+        exclude : Iterable[str], optional
+            Unused, nothing can be excluded.
+
+        Returns
+        -------
+        KnowledgeGraphComponent
+            The loaded component.
+        """
+        path = ensure_path(path)
+        self.cfg = srsly.read_json(path / "cfg")
+        if (path / KG_SNAPSHOT_FILE_NAME).exists():
+            self.set_knowledge_graph(
+                KnowledgeGraph.from_disk(path / KG_SNAPSHOT_FILE_NAME)
+            )
+        return self
+
+
+class EntityMatcherComponent(KnowledgeGraphComponent):
+    """
+    The entity matcher as a spaCy pipeline component.
+
+    Matches are stored in the doc spans attribute, under the entity matcher spans key.
+
+    Attributes
+    ----------
+    entity_matcher : Optional[EntityMatcher]
+        The entity matcher, None until the component is initialised.
+    """
+
+    def __init__(self, nlp: Language, name: str, **cfg) -> None:
+        super().__init__(nlp, name, **cfg)
+        self.entity_matcher = None
+
+    def _build(self, knowledge_graph: KnowledgeGraph) -> None:
+        self.entity_matcher = self._entity_matcher(knowledge_graph)
+
+    def _process(self, doc: Doc) -> Doc:
+        return self.entity_matcher(doc)
+
+    def _pipe(self, docs: Iterable[Doc], batch_size: int) -> Iterable[Doc]:
+        return self.entity_matcher.pipe(docs, batch_size=batch_size)
+
+
+class EntityLinkerComponent(KnowledgeGraphComponent):
+    """
+    The entity linker as a spaCy pipeline component.
+
+    Linked entities are stored in the doc ents attribute, the candidates in the doc spans
+    attribute, under the entity matcher spans key. The disambiguator is configured with
+    the name of a function registered in spaCy misc registry, building it from the
+    knowledge graph, e.g. "buzz_el.context_similarity_disambiguator.v1".
+
+    Attributes
+    ----------
+    entity_linker : Optional[EntityLinker]
+        The entity linker, None until the component is initialised.
+    """
+
+    def __init__(self, nlp: Language, name: str, **cfg) -> None:
+        super().__init__(nlp, name, **cfg)
+        self.entity_linker = None
+
+    def _build(self, knowledge_graph: KnowledgeGraph) -> None:
+        build_disambiguator = registry.misc.get(
+            self.cfg.get("disambiguator") or "buzz_el.random_disambiguator.v1"
+        )
+        self.entity_linker = EntityLinker(
+            knowledge_graph,
+            self.nlp,
+            entity_matcher=self._entity_matcher(knowledge_graph),
+            disambiguator=build_disambiguator(knowledge_graph),
+        )
+
+    def _process(self, doc: Doc) -> Doc:
+        return self.entity_linker(doc)
+
+    def _pipe(self, docs: Iterable[Doc], batch_size: int) -> Iterable[Doc]:
+        return self.entity_linker.pipe(docs, batch_size=batch_size)
+
+
+_DEFAULT_CONFIG: Dict = {
+    "ignore_case": True,
+    "use_fuzzy": False,
+    "fuzzy_threshold": None,
+    "fuzzy_engine": "spaczz",
+    "string_engine": "span_ruler",
+    "label_normalizer": None,
+    "hybrid": False,
+    "fuzzy_prefilter": None,
+}
+_LINKER_DEFAULT_CONFIG: Dict = {
+    **_DEFAULT_CONFIG,
+    "disambiguator": "buzz_el.random_disambiguator.v1",
+}
+
+
+@registry.misc("buzz_el.random_disambiguator.v1")
+def make_random_disambiguator(knowledge_graph: KnowledgeGraph) -> Disambiguator:
+    """Build the baseline disambiguator, picking a random candidate."""
+    return Disambiguator()
+
+
+@registry.misc("buzz_el.context_similarity_disambiguator.v1")
+def make_context_similarity_disambiguator(
+    knowledge_graph: KnowledgeGraph,
+) -> ContextSimilarityDisambiguator:
+    """Build the disambiguator comparing the candidate contexts to the doc text."""
+    return ContextSimilarityDisambiguator(knowledge_graph)
+
+
+registry.misc.register("buzz_el.has_content_word.v1", func=has_content_word)
+
+
+@Language.factory("buzz_entity_matcher", default_config=_DEFAULT_CONFIG)
+def make_entity_matcher(
+    nlp: Language,
+    name: str,
+    ignore_case: bool,
+    use_fuzzy: bool,
+    fuzzy_threshold: Optional[int],
+    fuzzy_engine: str,
+    string_engine: str,
+    label_normalizer: Optional[Dict],
+    hybrid: bool,
+    fuzzy_prefilter: Optional[str],
+) -> EntityMatcherComponent:
+    """Build the buzz_entity_matcher spaCy pipeline component."""
+    return EntityMatcherComponent(
+        nlp,
+        name,
+        ignore_case=ignore_case,
+        use_fuzzy=use_fuzzy,
+        fuzzy_threshold=fuzzy_threshold,
+        fuzzy_engine=fuzzy_engine,
+        string_engine=string_engine,
+        label_normalizer=label_normalizer,
+        hybrid=hybrid,
+        fuzzy_prefilter=fuzzy_prefilter,
+    )
+
+
+@Language.factory("buzz_entity_linker", default_config=_LINKER_DEFAULT_CONFIG)
+def make_entity_linker(
+    nlp: Language,
+    name: str,
+    ignore_case: bool,
+    use_fuzzy: bool,
+    fuzzy_threshold: Optional[int],
+    fuzzy_engine: str,
+    string_engine: str,
+    label_normalizer: Optional[Dict],
+    hybrid: bool,
+    fuzzy_prefilter: Optional[str],
+    disambiguator: str,
+) -> EntityLinkerComponent:
+    """Build the buzz_entity_linker spaCy pipeline component."""
+    return EntityLinkerComponent(
+        nlp,
+        name,
+        ignore_case=ignore_case,
+        use_fuzzy=use_fuzzy,
+        fuzzy_threshold=fuzzy_threshold,
+        fuzzy_engine=fuzzy_engine,
+        string_engine=string_engine,
+        label_normalizer=label_normalizer,
+        hybrid=hybrid,
+        fuzzy_prefilter=fuzzy_prefilter,
+        disambiguator=disambiguator,
+    )
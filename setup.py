@@ -1,3 +1,13 @@
 from setuptools import find_packages, setup
 
-setup(name="buzz_el", version="0.0.0", packages=find_packages())
+setup(
+    name="buzz_el",
+    version="0.0.0",
+    packages=find_packages(),
+    entry_points={
+        "spacy_factories": [
+            "buzz_entity_matcher = buzz_el.pipeline.components:make_entity_matcher",
+            "buzz_entity_linker = buzz_el.pipeline.components:make_entity_linker",
+        ]
+    },
+)
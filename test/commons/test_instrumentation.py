@@ -0,0 +1,53 @@
+import pytest
+
+from buzz_el.commons.instrumentation import NO_INSTRUMENTATION, Instrumentation
+
+
+def test_instrumentation_records() -> None:
+    records = []
+    instrumentation = Instrumentation(
+        buckets=(0.1, 1.0), callback=lambda *record: records.append(record)
+    )
+
+    instrumentation.observe("stage", 0.05)
+    instrumentation.observe("stage", 0.5)
+    instrumentation.observe("stage", 2.0)
+    instrumentation.count("events", 3)
+    with instrumentation.timer("block"):
+        pass
+    assert list(instrumentation.timed_iter("items", "ab")) == ["a", "b"]
+    assert instrumentation.wrap("call", len)("abc") == 3
+
+    exported = instrumentation.to_dict()
+    assert exported["timings"]["stage"] == {
+        "count": 3,
+        "sum": pytest.approx(2.55),
+        "buckets": {"0.1": 1, "1.0": 2, "+Inf": 3},
+    }
+    assert exported["timings"]["block"]["count"] == 1
+    assert exported["timings"]["items"]["count"] == 2
+    assert exported["timings"]["call"]["count"] == 1
+    assert exported["counters"] == {"events": 3, "call.calls": 1}
+    assert records[:4] == [
+        ("timing", "stage", 0.05),
+        ("timing", "stage", 0.5),
+        ("timing", "stage", 2.0),
+        ("counter", "events", 3),
+    ]
+
+    instrumentation.reset()
+    assert instrumentation.to_dict() == {"timings": {}, "counters": {}}
+
+
+def test_no_instrumentation() -> None:
+    with NO_INSTRUMENTATION.timer("block"):
+        NO_INSTRUMENTATION.count("events")
+    assert NO_INSTRUMENTATION.wrap("call", len) is len
+    assert NO_INSTRUMENTATION.to_dict() == {"timings": {}, "counters": {}}
+
+
+def test_instrumentation_invalid_buckets() -> None:
+    with pytest.raises(ValueError):
+        Instrumentation(buckets=())
+    with pytest.raises(ValueError):
+        Instrumentation(buckets=(0, 1))
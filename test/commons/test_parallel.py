@@ -0,0 +1,83 @@
+import pytest
+
+from buzz_el.commons.parallel import multiprocess_pipe
+
+
+def mark_first_token(doc):
+    doc.set_ents([doc.char_span(0, len(doc[0]), label="FIRST")])
+    return doc
+
+
+def mark_batch_size(docs):
+    for doc in docs:
+        doc.set_ents([doc.char_span(0, len(doc[0]), label=f"BATCH_{len(docs)}")])
+    return docs
+
+
+def test_multiprocess_pipe_keeps_order(en_sm_spacy_model) -> None:
+    texts = [f"Text number {i}" for i in range(10)]
+    docs = (en_sm_spacy_model.make_doc(text) for text in texts)
+
+    processed_docs = list(
+        multiprocess_pipe(
+            mark_first_token,
+            en_sm_spacy_model.vocab,
+            docs,
+            batch_size=3,
+            n_process=2,
+        )
+    )
+
+    assert [doc.text for doc in processed_docs] == texts
+    assert all(doc.ents[0].label_ == "FIRST" for doc in processed_docs)
+
+
+def test_multiprocess_pipe_single_process_in_place(en_sm_spacy_model) -> None:
+    doc = en_sm_spacy_model.make_doc("Some text")
+
+    processed_docs = list(
+        multiprocess_pipe(mark_first_token, en_sm_spacy_model.vocab, [doc])
+    )
+
+    assert processed_docs[0] is doc
+
+
+@pytest.mark.parametrize("n_process", [1, 2])
+def test_multiprocess_pipe_batched(en_sm_spacy_model, n_process) -> None:
+    texts = [f"Text number {i}" for i in range(5)]
+    docs = (en_sm_spacy_model.make_doc(text) for text in texts)
+
+    processed_docs = list(
+        multiprocess_pipe(
+            mark_batch_size,
+            en_sm_spacy_model.vocab,
+            docs,
+            batch_size=2,
+            n_process=n_process,
+            batched=True,
+        )
+    )
+
+    assert [doc.text for doc in processed_docs] == texts
+    assert [doc.ents[0].label_ for doc in processed_docs] == [
+        "BATCH_2",
+        "BATCH_2",
+        "BATCH_2",
+        "BATCH_2",
+        "BATCH_1",
+    ]
+
+
+@pytest.mark.parametrize("batch_size, n_process", [(0, 1), (1, 0)])
+def test_multiprocess_pipe_invalid_parameters(
+    en_sm_spacy_model, batch_size, n_process
+) -> None:
+    # the parameters are checked on call, before the docs are consumed
+    with pytest.raises(ValueError):
+        multiprocess_pipe(
+            mark_first_token,
+            en_sm_spacy_model.vocab,
+            [],
+            batch_size=batch_size,
+            n_process=n_process,
+        )
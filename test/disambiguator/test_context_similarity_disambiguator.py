@@ -0,0 +1,139 @@
+import pytest
+import spacy
+from rdflib import Graph
+from spacy.tokens import Span
+
+from buzz_el.disambiguator import ContextSimilarityDisambiguator
+from buzz_el.entity_linker import EntityLinker
+from buzz_el.graph import KnowledgeGraph
+
+CONTEXTS = {
+    "uri:paris_city": "Capital city of France, on the Seine river, with the Eiffel tower.",
+    "uri:paris_person": "American media personality, socialite, singer and DJ.",
+    "uri:france": "Country of western Europe.",
+}
+
+
+@pytest.fixture(scope="module")
+def nlp() -> spacy.language.Language:
+    return spacy.blank("en")
+
+
+@pytest.fixture(scope="module")
+def knowledge_graph() -> KnowledgeGraph:
+    return KnowledgeGraph(
+        kg=Graph(),
+        entity_patterns=[
+            {"label": "KG_ENT", "pattern": "Paris", "id": "uri:paris_city"},
+            {"label": "KG_ENT", "pattern": "Paris", "id": "uri:paris_person"},
+            {"label": "KG_ENT", "pattern": "France", "id": "uri:france"},
+        ],
+        get_entity_context=lambda entity_uri: CONTEXTS.get(entity_uri, ""),
+    )
+
+
+@pytest.fixture(scope="module")
+def disambiguator(knowledge_graph) -> ContextSimilarityDisambiguator:
+    return ContextSimilarityDisambiguator(knowledge_graph, window=10)
+
+
+def candidate_spans(doc, start, end, entity_uris):
+    return [
+        Span(doc, start, end, label="KG_ENT", span_id=entity_uri)
+        for entity_uri in entity_uris
+    ]
+
+
+def test_entity_vectors(disambiguator) -> None:
+    assert set(disambiguator._entity_rows) == set(CONTEXTS)
+    assert len(disambiguator._indptr) == len(CONTEXTS) + 1
+    for row in range(len(CONTEXTS)):
+        row_data = disambiguator._data[
+            disambiguator._indptr[row] : disambiguator._indptr[row + 1]
+        ]
+        assert (row_data**2).sum() == pytest.approx(1)
+
+
+@pytest.mark.parametrize(
+    "text, expected_uri",
+    [
+        ("We walked along the Seine river from the Eiffel tower in Paris.", 0),
+        ("The socialite Paris released a new single as a singer.", 1),
+    ],
+)
+def test_disambiguate(disambiguator, nlp, text, expected_uri) -> None:
+    doc = nlp(text)
+    start = [token.text for token in doc].index("Paris")
+    entity_uris = ["uri:paris_city", "uri:paris_person"]
+
+    for candidates in [entity_uris, entity_uris[::-1]]:
+        selected = disambiguator(candidate_spans(doc, start, start + 1, candidates))
+        assert [span.id_ for span in selected] == [entity_uris[expected_uri]]
+
+
+def test_ties_are_deterministic(disambiguator, nlp) -> None:
+    doc = nlp("Nothing related to the candidates here.")
+    spans = candidate_spans(doc, 0, 1, ["uri:unknown", "uri:other"]) + [
+        Span(doc, 0, 2, label="KG_ENT", span_id="uri:longer")
+    ]
+
+    assert [span.id_ for span in disambiguator(spans)] == ["uri:longer"]
+    assert [span.id_ for span in disambiguator(spans[:2])] == ["uri:unknown"]
+
+
+def test_entity_linker(knowledge_graph, disambiguator, nlp) -> None:
+    entity_linker = EntityLinker(knowledge_graph, nlp, disambiguator=disambiguator)
+
+    doc = entity_linker(nlp("Paris is the capital city of France."))
+
+    assert [(ent.text, ent.id_) for ent in doc.ents] == [
+        ("Paris", "uri:paris_city"),
+        ("France", "uri:france"),
+    ]
+
+
+def test_invalid_parameters(knowledge_graph) -> None:
+    with pytest.raises(ValueError):
+        ContextSimilarityDisambiguator(knowledge_graph, window=-1)
+    with pytest.raises(ValueError):
+        ContextSimilarityDisambiguator(knowledge_graph, n_features=0)
+
+
+def test_disambiguate_batch(disambiguator, nlp) -> None:
+    docs = [
+        nlp("We walked along the Seine river from the Eiffel tower in Paris."),
+        nlp("The socialite Paris released a new single as a singer."),
+    ]
+    span_groups = []
+    for doc in docs:
+        start = [token.text for token in doc].index("Paris")
+        span_groups.append(
+            candidate_spans(
+                doc, start, start + 1, ["uri:paris_person", "uri:paris_city"]
+            )
+        )
+    span_groups.append(candidate_spans(docs[0], 0, 1, ["uri:unknown", "uri:other"]))
+
+    selected = disambiguator.disambiguate_batch(span_groups)
+
+    assert [[span.id_ for span in spans] for spans in selected] == [
+        ["uri:paris_city"],
+        ["uri:paris_person"],
+        ["uri:unknown"],
+    ]
+    assert selected == [disambiguator(spans) for spans in span_groups]
+    assert disambiguator.disambiguate_batch([]) == []
+
+
+def test_for_knowledge_graph(disambiguator) -> None:
+    knowledge_graph = KnowledgeGraph(
+        kg=Graph(),
+        entity_patterns=[{"label": "KG_ENT", "pattern": "Seine", "id": "uri:seine"}],
+        get_entity_context=lambda entity_uri: "River of France.",
+    )
+
+    rebuilt = disambiguator.for_knowledge_graph(knowledge_graph)
+
+    assert rebuilt.kg is knowledge_graph
+    assert (rebuilt.window, rebuilt.n_features) == (10, disambiguator.n_features)
+    assert set(rebuilt._entity_rows) == {"uri:seine"}
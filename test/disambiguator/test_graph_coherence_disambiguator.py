@@ -0,0 +1,159 @@
+import pytest
+import spacy
+from rdflib import Graph
+from spacy.tokens import Span
+
+from buzz_el.disambiguator import Disambiguator, GraphCoherenceDisambiguator
+from buzz_el.entity_linker import EntityLinker
+from buzz_el.graph import EntityAdjacency, KnowledgeGraph
+
+URIS = ["uri:paris_city", "uri:paris_person", "uri:france", "uri:seine", "uri:hilton"]
+
+
+@pytest.fixture(scope="module")
+def nlp() -> spacy.language.Language:
+    return spacy.blank("en")
+
+
+@pytest.fixture(scope="module")
+def adjacency() -> EntityAdjacency:
+    # the city is linked to France and the Seine, the person to the Hilton hotels
+    return EntityAdjacency.from_edges(URIS, [0, 0, 1], [2, 3, 4])
+
+
+def paris_candidates(doc, entity_uris):
+    start = [token.text for token in doc].index("Paris")
+    return [
+        Span(doc, start, start + 1, label="KG_ENT", span_id=entity_uri)
+        for entity_uri in entity_uris
+    ]
+
+
+def test_doc_spans_context(adjacency, nlp) -> None:
+    disambiguator = GraphCoherenceDisambiguator(adjacency)
+    doc = nlp("Paris is on the Seine, in France.")
+    doc.spans["string"] = [
+        Span(doc, 4, 5, label="KG_ENT", span_id="uri:seine"),
+        Span(doc, 7, 8, label="KG_ENT", span_id="uri:france"),
+    ]
+
+    for entity_uris in [URIS[:2], URIS[1::-1]]:
+        selected = disambiguator(paris_candidates(doc, entity_uris))
+        assert [span.id_ for span in selected] == ["uri:paris_city"]
+
+
+def test_other_span_groups_ignored(adjacency, nlp) -> None:
+    doc = nlp("Paris is on the Seine, in France.")
+    doc.spans["places"] = [
+        Span(doc, 4, 5, label="KG_ENT", span_id="uri:seine"),
+        Span(doc, 7, 8, label="KG_ENT", span_id="uri:france"),
+    ]
+
+    selected = GraphCoherenceDisambiguator(adjacency)(
+        paris_candidates(doc, URIS[1::-1])
+    )
+    assert [span.id_ for span in selected] == ["uri:paris_person"]
+    selected = GraphCoherenceDisambiguator(adjacency, spans_key="places")(
+        paris_candidates(doc, URIS[1::-1])
+    )
+    assert [span.id_ for span in selected] == ["uri:paris_city"]
+
+
+def test_batch_context(adjacency, nlp) -> None:
+    disambiguator = GraphCoherenceDisambiguator(adjacency)
+    docs = [nlp("Paris went to the Hilton."), nlp("Paris is in France.")]
+    span_groups = [
+        paris_candidates(docs[0], URIS[:2]),
+        [Span(docs[0], 4, 5, label="KG_ENT", span_id="uri:hilton")],
+        paris_candidates(docs[1], URIS[:2]),
+        [Span(docs[1], 3, 4, label="KG_ENT", span_id=uri) for uri in URIS[2:4]],
+    ]
+
+    selected = disambiguator.disambiguate_batch(span_groups)
+
+    assert [[span.id_ for span in spans] for spans in selected] == [
+        ["uri:paris_person"],
+        ["uri:hilton"],
+        ["uri:paris_city"],
+        ["uri:france"],
+    ]
+    assert disambiguator.disambiguate_batch([]) == []
+
+
+def test_fallback(adjacency, nlp) -> None:
+    class LastDisambiguator(Disambiguator):
+        def __call__(self, overlapping_spans):
+            return [overlapping_spans[-1]]
+
+    doc = nlp("Paris is nice.")
+    candidates = paris_candidates(doc, URIS[:2])
+
+    assert [
+        span.id_ for span in GraphCoherenceDisambiguator(adjacency)(candidates)
+    ] == ["uri:paris_city"]
+    assert [
+        span.id_
+        for span in GraphCoherenceDisambiguator(adjacency, LastDisambiguator())(
+            candidates
+        )
+    ] == ["uri:paris_person"]
+
+
+def test_entity_linker(adjacency, nlp) -> None:
+    knowledge_graph = KnowledgeGraph(
+        kg=Graph(),
+        entity_patterns=[
+            {"label": "KG_ENT", "pattern": "Paris", "id": "uri:paris_person"},
+            {"label": "KG_ENT", "pattern": "Paris", "id": "uri:paris_city"},
+            {"label": "KG_ENT", "pattern": "France", "id": "uri:france"},
+            {"label": "KG_ENT", "pattern": "Hilton", "id": "uri:hilton"},
+        ],
+        get_entity_context=lambda entity_uri: "",
+    )
+    entity_linker = EntityLinker(
+        knowledge_graph, nlp, disambiguator=GraphCoherenceDisambiguator(adjacency)
+    )
+
+    doc = entity_linker(nlp("Paris, France."))
+
+    assert [(ent.text, ent.id_) for ent in doc.ents] == [
+        ("Paris", "uri:paris_city"),
+        ("France", "uri:france"),
+    ]
+    # the other candidates of the text are given to the disambiguator too
+    assert list(entity_linker.link_texts(["Paris, France.", "Paris Hilton."])) == [
+        [(0, 5, "uri:paris_city"), (7, 13, "uri:france")],
+        [(0, 5, "uri:paris_person"), (6, 12, "uri:hilton")],
+    ]
+
+
+def test_for_knowledge_graph() -> None:
+    graph = Graph()
+    graph.parse(
+        data="<uri:paris_city> <uri:country> <uri:france> .\n"
+        '<uri:paris_city> <uri:name> "Paris" .\n',
+        format="nt",
+    )
+    knowledge_graph = KnowledgeGraph(
+        kg=graph,
+        entity_patterns=[
+            {"label": "KG_ENT", "pattern": "Paris", "id": "uri:paris_city"},
+            {"label": "KG_ENT", "pattern": "France", "id": "uri:france"},
+        ],
+        get_entity_context=lambda entity_uri: "",
+    )
+    fallback = Disambiguator()
+    disambiguator = GraphCoherenceDisambiguator(
+        EntityAdjacency.from_edges([], [], []), fallback
+    )
+
+    rebuilt = disambiguator.for_knowledge_graph(knowledge_graph)
+
+    assert rebuilt.adjacency.neighbours("uri:paris_city") == ["uri:france"]
+    assert rebuilt.fallback is fallback
+    with pytest.raises(ValueError):
+        disambiguator.for_knowledge_graph(
+            KnowledgeGraph(
+                kg=None, entity_patterns=[], get_entity_context=lambda uri: ""
+            )
+        )
@@ -1,10 +1,15 @@
-from typing import List
+from typing import List, Tuple
 
 import pytest
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDFS
 from spacy.tokens import Doc
 
+from buzz_el.commons.instrumentation import Instrumentation
+from buzz_el.disambiguator import ContextSimilarityDisambiguator, Disambiguator
 from buzz_el.entity_linker import EntityLinker
 from buzz_el.entity_matcher import EntityMatcher
+from buzz_el.graph import KnowledgeGraph, RDFGraphLoader
 
 
 @pytest.fixture(scope="function")
@@ -54,3 +59,255 @@ class TestEntityLinker:
         corpus = entity_linker.pipe(corpus)
         for doc in corpus:
             assert len(doc.ents) > 0
+
+    def test_entity_linker_multiprocess_pipe(
+        self, pizza_bisou_kg, en_sm_spacy_model, corpus
+    ) -> None:
+        string_entity_linker = EntityLinker(pizza_bisou_kg, en_sm_spacy_model)
+        texts = [doc.text for doc in corpus]
+
+        processed_docs = list(
+            string_entity_linker.pipe(corpus, batch_size=1, n_process=2)
+        )
+
+        assert [doc.text for doc in processed_docs] == texts
+        for doc, processed_doc in zip(corpus, processed_docs):
+            # the disambiguator picks randomly, so only the candidates are compared
+            expected_doc = string_entity_linker(doc)
+            assert [
+                (span.start, span.end, span.id_)
+                for span in processed_doc.spans["string"]
+            ] == [
+                (span.start, span.end, span.id_)
+                for span in expected_doc.spans["string"]
+            ]
+            assert len(processed_doc.ents) == len(expected_doc.ents)
+
+
+def test_link_texts(pizza_bisou_kg, en_sm_spacy_model, pizza_bisou_en_reviews) -> None:
+    entity_linker = EntityLinker(pizza_bisou_kg, en_sm_spacy_model)
+    texts = ["The God Save The King pizza.", "No pizza here."] + pizza_bisou_en_reviews
+
+    linked_texts = list(entity_linker.link_texts(texts, batch_size=2))
+
+    assert linked_texts[0] == [
+        (4, 21, "http://www.msesboue.org/o/pizza-data-demo/bisou#_godSaveTheKing")
+    ]
+    assert linked_texts[1] == []
+    for text, linked_entities in zip(texts[2:], linked_texts[2:]):
+        doc = entity_linker(en_sm_spacy_model(text))
+        assert len(linked_entities) == len(doc.ents)
+        for start_char, end_char, entity_uri in linked_entities:
+            assert doc.char_span(start_char, end_char) is not None
+            assert entity_uri in {span.id_ for span in doc.spans["string"]}
+
+
+class TestKnowledgeGraphSwap:
+    @pytest.fixture(scope="class")
+    def small_kg(self, pizza_bisou_kg) -> KnowledgeGraph:
+        return KnowledgeGraph(
+            kg=pizza_bisou_kg.kg,
+            entity_patterns=[
+                {"label": "KG_ENT", "pattern": "honey", "id": "uri:honey"},
+            ],
+            get_entity_context=lambda ent_uri: "",
+        )
+
+    def test_swap(self, pizza_bisou_kg, small_kg, en_sm_spacy_model, corpus) -> None:
+        entity_linker = EntityLinker(pizza_bisou_kg, en_sm_spacy_model)
+        doc = entity_linker(corpus[0])
+        assert entity_linker.kg_version == doc._.kg_version == "0"
+        assert len(doc.ents) == 8
+
+        assert entity_linker.swap(small_kg) == "1"
+
+        assert entity_linker.kg is small_kg
+        assert entity_linker.entity_matcher.kg is small_kg
+        doc = entity_linker(en_sm_spacy_model(corpus[0].text))
+        assert doc._.kg_version == "1"
+        assert [ent.id_ for ent in doc.ents] == ["uri:honey"]
+
+    def test_in_flight_doc_keeps_version(
+        self, pizza_bisou_kg, small_kg, en_sm_spacy_model, corpus
+    ) -> None:
+        class SwappingEntityMatcher(EntityMatcher):
+            # swaps the linker knowledge graph while a doc is being processed
+            def match(self, doc: Doc) -> List[Tuple[int, int, str, str]]:
+                entity_linker.swap(small_kg, kg_version="new")
+                return super().match(doc)
+
+        entity_linker = EntityLinker(
+            pizza_bisou_kg,
+            en_sm_spacy_model,
+            entity_matcher=SwappingEntityMatcher(pizza_bisou_kg, en_sm_spacy_model),
+        )
+
+        doc = entity_linker(corpus[0])
+
+        assert doc._.kg_version == "0"
+        assert len(doc.ents) == 8
+        assert entity_linker.kg_version == "new"
+
+    def test_swap_in_background(
+        self, pizza_bisou_kg, small_kg, en_sm_spacy_model
+    ) -> None:
+        entity_linker = EntityLinker(pizza_bisou_kg, en_sm_spacy_model, kg_version="v1")
+
+        future = entity_linker.swap_in_background(lambda: small_kg, kg_version="v2")
+
+        assert future.result(timeout=60) == "v2"
+        assert entity_linker.kg is small_kg
+
+    def test_failed_background_swap(self, small_kg, en_sm_spacy_model) -> None:
+        entity_linker = EntityLinker(small_kg, en_sm_spacy_model)
+
+        def failing_build() -> KnowledgeGraph:
+            raise FileNotFoundError("missing snapshot")
+
+        future = entity_linker.swap_in_background(failing_build)
+
+        with pytest.raises(FileNotFoundError):
+            future.result(timeout=60)
+        assert entity_linker.kg is small_kg
+        assert entity_linker.kg_version == "0"
+
+    def test_swap_keeps_matcher_options(
+        self, pizza_bisou_kg, small_kg, en_sm_spacy_model
+    ) -> None:
+        instrumentation = Instrumentation()
+        entity_matcher = EntityMatcher(
+            pizza_bisou_kg,
+            en_sm_spacy_model,
+            string_engine="aho_corasick",
+            instrumentation=instrumentation,
+        )
+        entity_linker = EntityLinker(
+            pizza_bisou_kg, en_sm_spacy_model, entity_matcher=entity_matcher
+        )
+
+        entity_linker.swap(small_kg)
+        entity_linker(en_sm_spacy_model.make_doc("Some honey."))
+
+        assert entity_linker.entity_matcher.options() == entity_matcher.options()
+        exported = instrumentation.to_dict()
+        assert exported["timings"]["entity_matcher.match"]["count"] == 1
+        assert exported["counters"]["entity_matcher.matches"] == 1
+
+    def test_swap_rebuilds_disambiguator(
+        self, pizza_bisou_kg, small_kg, en_sm_spacy_model
+    ) -> None:
+        entity_linker = EntityLinker(
+            pizza_bisou_kg,
+            en_sm_spacy_model,
+            disambiguator=ContextSimilarityDisambiguator(pizza_bisou_kg, window=10),
+        )
+
+        entity_linker.swap(small_kg)
+
+        assert isinstance(entity_linker.disambiguator, ContextSimilarityDisambiguator)
+        assert entity_linker.disambiguator.kg is small_kg
+        assert entity_linker.disambiguator.window == 10
+
+        disambiguator = Disambiguator()
+        entity_linker.swap(pizza_bisou_kg, disambiguator=disambiguator)
+
+        assert entity_linker.disambiguator is disambiguator
+
+
+def test_update_rebuilds_disambiguator(
+    pizza_bisou_kg_file_path, en_sm_spacy_model
+) -> None:
+    truffle = URIRef("http://www.msesboue.org/o/pizza-data-demo/bisou#_truffle")
+    graph_loader = RDFGraphLoader(
+        kg_file_path=pizza_bisou_kg_file_path,
+        label_properties={"rdfs:label", "skos:altLabel"},
+        context_properties={"rdfs:comment"},
+        lang_filter_tag="en",
+        precompute_contexts=True,
+    )
+    knowledge_graph = graph_loader()
+    entity_linker = EntityLinker(
+        knowledge_graph,
+        en_sm_spacy_model,
+        disambiguator=ContextSimilarityDisambiguator(knowledge_graph),
+    )
+    disambiguator = entity_linker.disambiguator
+
+    entity_linker.update(
+        added_triples=[
+            (truffle, RDFS.label, Literal("black truffle", lang="en")),
+            (truffle, RDFS.comment, Literal("A rare mushroom.", lang="en")),
+        ]
+    )
+
+    assert entity_linker.disambiguator is not disambiguator
+    assert str(truffle) in entity_linker.disambiguator._entity_rows
+
+
+def test_group_overlapping() -> None:
+    matches = [(0, 2), (1, 3), (3, 4), (5, 9), (6, 7), (8, 10), (10, 11)]
+
+    assert EntityLinker._group_overlapping(matches) == [
+        [(0, 2), (1, 3)],
+        [(3, 4)],
+        [(5, 9), (6, 7), (8, 10)],
+        [(10, 11)],
+    ]
+    assert EntityLinker._group_overlapping([]) == []
+
+
+def test_pipe_disambiguates_batches(pizza_bisou_kg, en_sm_spacy_model, corpus) -> None:
+    class RecordingDisambiguator(Disambiguator):
+        def __init__(self) -> None:
+            super().__init__()
+            self.batch_sizes = []
+
+        def __call__(self, overlapping_spans):
+            return [max(overlapping_spans, key=len)]
+
+        def disambiguate_batch(self, span_groups):
+            self.batch_sizes.append(len(span_groups))
+            return super().disambiguate_batch(span_groups)
+
+    disambiguator = RecordingDisambiguator()
+    entity_linker = EntityLinker(
+        pizza_bisou_kg, en_sm_spacy_model, disambiguator=disambiguator
+    )
+    expected_ents = [
+        [(ent.start, ent.end, ent.id_) for ent in entity_linker(doc.copy()).ents]
+        for doc in corpus
+    ]
+    n_ambiguous_groups = sum(disambiguator.batch_sizes)
+    disambiguator.batch_sizes = []
+
+    docs = list(entity_linker.pipe(corpus, batch_size=len(corpus)))
+
+    assert disambiguator.batch_sizes == [n_ambiguous_groups]
+    assert [
+        [(ent.start, ent.end, ent.id_) for ent in doc.ents] for doc in docs
+    ] == expected_ents
+
+
+def test_instrumentation(pizza_bisou_kg, en_sm_spacy_model, corpus) -> None:
+    instrumentation = Instrumentation()
+    entity_linker = EntityLinker(
+        pizza_bisou_kg, en_sm_spacy_model, instrumentation=instrumentation
+    )
+
+    docs = list(entity_linker.pipe(corpus))
+
+    exported = instrumentation.to_dict()
+    for stage in ["match", "set_annotations", "group"]:
+        assert exported["timings"][f"entity_linker.{stage}"]["count"] == len(docs)
+    assert exported["timings"]["entity_linker.disambiguate"]["count"] == 1
+    assert exported["counters"]["entity_linker.docs"] == len(docs)
+    assert exported["counters"]["entity_linker.candidates"] == sum(
+        len(doc.spans["string"]) for doc in docs
+    )
+    assert exported["counters"]["entity_linker.ambiguous_groups"] > 0
+
+    instrumentation.reset()
+    list(entity_linker.link_texts(doc.text for doc in corpus))
+    exported = instrumentation.to_dict()
+    assert exported["timings"]["entity_linker.tokenize"]["count"] == len(corpus)
+    assert exported["counters"]["entity_linker.docs"] == len(corpus)
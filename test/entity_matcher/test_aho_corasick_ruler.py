@@ -0,0 +1,108 @@
+from typing import List
+
+import pytest
+import spacy
+
+from buzz_el.entity_matcher import AhoCorasickRuler, EntityMatcher
+
+
+@pytest.fixture(scope="module")
+def corpus(en_sm_spacy_model, pizza_bisou_en_reviews) -> List[spacy.tokens.Doc]:
+    return [doc for doc in en_sm_spacy_model.pipe(pizza_bisou_en_reviews)]
+
+
+@pytest.fixture(scope="module")
+def ruler(en_sm_spacy_model) -> AhoCorasickRuler:
+    ruler = AhoCorasickRuler(en_sm_spacy_model)
+    ruler.add_patterns(
+        [
+            {"label": "KG_ENT", "pattern": "black pepper", "id": "uri:blackPepper"},
+            {"label": "KG_ENT", "pattern": "Pepper", "id": "uri:pepper"},
+            {"label": "KG_ENT", "pattern": "pepper sauce", "id": "uri:pepperSauce"},
+            {"label": "KG_ENT", "pattern": "black", "id": "uri:black"},
+            {"label": "KG_ENT", "pattern": "black pepper oil", "id": "uri:oil"},
+        ],
+        batch_size=2,
+    )
+    return ruler
+
+
+def test_aho_corasick_ruler_match(ruler, en_sm_spacy_model) -> None:
+    doc = en_sm_spacy_model.make_doc("Black pepper sauce and black pepper.")
+
+    assert ruler.match(doc) == [
+        (0, 1, "KG_ENT", "uri:black"),
+        (0, 2, "KG_ENT", "uri:blackPepper"),
+        (1, 2, "KG_ENT", "uri:pepper"),
+        (1, 3, "KG_ENT", "uri:pepperSauce"),
+        (4, 5, "KG_ENT", "uri:black"),
+        (4, 6, "KG_ENT", "uri:blackPepper"),
+        (5, 6, "KG_ENT", "uri:pepper"),
+    ]
+
+
+def test_aho_corasick_ruler_case(en_sm_spacy_model) -> None:
+    ruler = AhoCorasickRuler(en_sm_spacy_model, ignore_case=False)
+    ruler.add_patterns([{"label": "KG_ENT", "pattern": "Pepper", "id": "uri:pepper"}])
+
+    doc = ruler(en_sm_spacy_model.make_doc("pepper and Pepper"))
+
+    assert [(span.start, span.end) for span in doc.spans["string"]] == [(2, 3)]
+
+
+def test_aho_corasick_ruler_remove_by_id(en_sm_spacy_model) -> None:
+    ruler = AhoCorasickRuler(en_sm_spacy_model)
+    ruler.add_patterns([{"label": "KG_ENT", "pattern": "pepper", "id": "uri:pepper"}])
+    ruler.remove_by_id("uri:pepper")
+    # the removed patterns outnumber the live ones, the ruler is compacted
+    assert len(ruler) == len(ruler.patterns) == 0
+    ruler.add_patterns(
+        [
+            {"label": "KG_ENT", "pattern": "black pepper", "id": "uri:pepper"},
+            {"label": "KG_ENT", "pattern": "black", "id": "uri:black"},
+        ]
+    )
+    doc = en_sm_spacy_model.make_doc("black pepper")
+
+    assert ruler.match(doc) == [
+        (0, 1, "KG_ENT", "uri:black"),
+        (0, 2, "KG_ENT", "uri:pepper"),
+    ]
+    ruler.remove_by_id("uri:pepper")
+    assert ruler.match(doc) == [(0, 1, "KG_ENT", "uri:black")]
+    assert (len(ruler), len(ruler.patterns)) == (1, 2)
+    ruler.compact()
+    assert (len(ruler), len(ruler.patterns)) == (1, 1)
+    assert ruler.match(doc) == [(0, 1, "KG_ENT", "uri:black")]
+    with pytest.raises(ValueError):
+        ruler.remove_by_id("uri:pepper")
+
+
+def test_aho_corasick_ruler_to_disk(tmp_path, ruler, en_sm_spacy_model) -> None:
+    doc = en_sm_spacy_model.make_doc("Black pepper sauce and black pepper.")
+    ruler.to_disk(tmp_path / "ruler.npz")
+
+    loaded_ruler = AhoCorasickRuler.from_disk(tmp_path / "ruler.npz", en_sm_spacy_model)
+
+    assert len(loaded_ruler) == len(ruler)
+    assert loaded_ruler.match(doc) == ruler.match(doc)
+
+
+def test_entity_matcher_aho_corasick_engine(
+    en_sm_spacy_model, pizza_bisou_kg, corpus
+) -> None:
+    span_ruler_matcher = EntityMatcher(pizza_bisou_kg, en_sm_spacy_model)
+    aho_corasick_matcher = EntityMatcher(
+        pizza_bisou_kg, en_sm_spacy_model, string_engine="aho_corasick"
+    )
+
+    for doc in corpus:
+        expected_spans = [
+            (span.start, span.end, span.label_, span.id_)
+            for span in span_ruler_matcher(doc).spans["string"]
+        ]
+        assert [
+            (span.start, span.end, span.label_, span.id_)
+            for span in aho_corasick_matcher(doc).spans["string"]
+        ] == expected_spans
+        assert aho_corasick_matcher.match(doc) == expected_spans
@@ -1,9 +1,19 @@
+import inspect
 from typing import List
 
 import pytest
 import spacy
+from rdflib import RDFS, Literal, URIRef
 
-from buzz_el.entity_matcher import EntityMatcher
+from buzz_el.commons.instrumentation import Instrumentation
+from buzz_el.entity_matcher import (
+    EntityMatcher,
+    FuzzyRuler,
+    NGramFuzzyMatcher,
+    NGramFuzzyRuler,
+    has_content_word,
+)
+from buzz_el.graph import RDFGraphLoader
 
 
 @pytest.fixture(scope="session")
@@ -122,3 +132,269 @@ class TestEntityMatcherFuzzy:
             "http://www.msesboue.org/o/pizza-data-demo/bisou#_mozzaFiorDiLatte"
             in matched_ents_fuzzy
         )
+
+
+def test_fuzzy_ruler_add_patterns(en_sm_spacy_model) -> None:
+    ruler = FuzzyRuler(spacy_model=en_sm_spacy_model, fuzzy_threshold=80)
+    ruler.add_patterns(
+        [
+            {"label": "KG_ENT", "pattern": "black pepper", "id": "uri:pepper"},
+            {"label": "KG_ENT", "pattern": "pepper", "id": "uri:pepper"},
+            {"label": "KG_ENT", "pattern": "honey", "id": "uri:honey"},
+        ],
+        batch_size=2,
+    )
+
+    assert len(ruler.matcher) == 2
+    assert len(ruler.matcher.patterns) == 3
+
+    doc = ruler(en_sm_spacy_model.make_doc("Some black peper and honey."))
+    assert {span.id_ for span in doc.spans["fuzzy"]} == {"uri:pepper", "uri:honey"}
+
+
+class TestEntityMatcherNGramFuzzy:
+    @pytest.fixture(scope="class")
+    def ngram_fuzzy_matcher(self, en_sm_spacy_model, pizza_bisou_kg) -> EntityMatcher:
+        entity_matcher = EntityMatcher(
+            knowledge_graph=pizza_bisou_kg,
+            spacy_model=en_sm_spacy_model,
+            use_fuzzy=True,
+            fuzzy_engine="ngram",
+        )
+        return entity_matcher
+
+    def test_ngram_fuzzy_matcher_init(self, ngram_fuzzy_matcher) -> None:
+        assert isinstance(ngram_fuzzy_matcher._fuzzy_matcher, NGramFuzzyRuler)
+
+    def test_unknown_fuzzy_engine(self, en_sm_spacy_model, pizza_bisou_kg) -> None:
+        with pytest.raises(ValueError):
+            EntityMatcher(
+                knowledge_graph=pizza_bisou_kg,
+                spacy_model=en_sm_spacy_model,
+                use_fuzzy=True,
+                fuzzy_engine="unknown",
+            )
+
+    def test_matched_entities(
+        self, en_sm_spacy_model, pizza_bisou_en_misspelling_reviews, ngram_fuzzy_matcher
+    ) -> None:
+        god_save_the_king_review = ngram_fuzzy_matcher(
+            en_sm_spacy_model(pizza_bisou_en_misspelling_reviews[2])
+        )
+
+        matched_ents_fuzzy = {
+            span.id_ for span in god_save_the_king_review.spans["fuzzy"]
+        }
+
+        assert (
+            "http://www.msesboue.org/o/pizza-data-demo/bisou#_godSaveTheKing"
+            in matched_ents_fuzzy
+        )
+        assert (
+            "http://www.msesboue.org/o/pizza-data-demo/bisou#_tomatoBase"
+            in matched_ents_fuzzy
+        )
+        assert (
+            "http://www.msesboue.org/o/pizza-data-demo/bisou#_mozzaFiorDiLatte"
+            in matched_ents_fuzzy
+        )
+
+
+def test_ngram_fuzzy_matcher_threshold(en_sm_spacy_model) -> None:
+    matcher = NGramFuzzyMatcher(en_sm_spacy_model.vocab, min_r=85)
+    matcher.add("KG_ENT#uri:pepper", [en_sm_spacy_model.make_doc("black pepper")])
+    matcher.add("KG_ENT#uri:honey", [en_sm_spacy_model.make_doc("honey")])
+
+    matches = matcher(en_sm_spacy_model.make_doc("Some Black peper and hunny."))
+
+    assert len(matcher) == 2
+    assert [(label, start, end) for label, start, end, _, _ in matches] == [
+        ("KG_ENT#uri:pepper", 1, 3)
+    ]
+    assert matches[0][3] >= 85
+
+
+@pytest.mark.parametrize("use_fuzzy", [False, True])
+def test_entity_matcher_match(
+    en_sm_spacy_model, pizza_bisou_kg, corpus, use_fuzzy
+) -> None:
+    entity_matcher = EntityMatcher(
+        knowledge_graph=pizza_bisou_kg,
+        spacy_model=en_sm_spacy_model,
+        use_fuzzy=use_fuzzy,
+    )
+    doc = en_sm_spacy_model(corpus[0].text)
+
+    matches = entity_matcher.match(doc)
+
+    assert not doc.spans
+    assert matches == [
+        (span.start, span.end, span.label_, span.id_)
+        for span in entity_matcher(doc).spans[entity_matcher.spans_key]
+    ]
+
+
+def test_entity_matcher_match_span_ruler_config(
+    en_sm_spacy_model, pizza_bisou_kg, corpus
+) -> None:
+    entity_matcher = EntityMatcher(
+        knowledge_graph=pizza_bisou_kg, spacy_model=en_sm_spacy_model
+    )
+    doc = en_sm_spacy_model(corpus[0].text)
+    phrase_ruler_matches = entity_matcher.match(doc)
+
+    entity_matcher.build_string_matcher(
+        {"spans_key": "string", "phrase_matcher_attr": "LOWER"}
+    )
+
+    assert entity_matcher.match(doc) == phrase_ruler_matches
+    assert not doc.spans
+
+
+def test_ngram_fuzzy_matcher_remove(en_sm_spacy_model) -> None:
+    matcher = NGramFuzzyMatcher(en_sm_spacy_model.vocab, min_r=85)
+    matcher.add("KG_ENT#uri:pepper", [en_sm_spacy_model.make_doc("black pepper")])
+    matcher.add("KG_ENT#uri:honey", [en_sm_spacy_model.make_doc("honey")])
+    doc = en_sm_spacy_model.make_doc("Some black pepper and honey.")
+    assert len(matcher(doc)) == 2
+
+    matcher.remove("KG_ENT#uri:pepper")
+
+    assert "KG_ENT#uri:pepper" not in matcher
+    assert [label for label, _, _, _, _ in matcher(doc)] == ["KG_ENT#uri:honey"]
+    with pytest.raises(ValueError):
+        matcher.remove("KG_ENT#uri:pepper")
+
+
+@pytest.mark.parametrize(
+    "matcher_config",
+    [
+        {"string_engine": "span_ruler"},
+        {"string_engine": "aho_corasick"},
+        {"use_fuzzy": True, "fuzzy_engine": "spaczz"},
+        {"use_fuzzy": True, "fuzzy_engine": "ngram"},
+    ],
+)
+def test_entity_matcher_update(
+    en_sm_spacy_model, pizza_bisou_kg_file_path, matcher_config
+) -> None:
+    bisou = "http://www.msesboue.org/o/pizza-data-demo/bisou#"
+    graph_loader = RDFGraphLoader(
+        kg_file_path=pizza_bisou_kg_file_path,
+        label_properties={"rdfs:label", "skos:altLabel"},
+        lang_filter_tag="en",
+    )
+    entity_matcher = EntityMatcher(
+        knowledge_graph=graph_loader(),
+        spacy_model=en_sm_spacy_model,
+        **matcher_config,
+    )
+    doc = en_sm_spacy_model.make_doc("Some black pepper and black truffle.")
+    assert {uri for _, _, _, uri in entity_matcher.match(doc)} == {
+        bisou + "_blackPepper"
+    }
+
+    entity_matcher.update(
+        added_triples=[
+            (
+                URIRef(bisou + "_truffle"),
+                RDFS.label,
+                Literal("black truffle", lang="en"),
+            )
+        ],
+        removed_triples=list(
+            graph_loader.kg.triples((URIRef(bisou + "_blackPepper"), None, None))
+        ),
+    )
+
+    assert {uri for _, _, _, uri in entity_matcher.match(doc)} == {bisou + "_truffle"}
+
+
+def test_entity_matcher_instrumentation(pizza_bisou_kg, en_sm_spacy_model) -> None:
+    instrumentation = Instrumentation()
+    entity_matcher = EntityMatcher(
+        pizza_bisou_kg, en_sm_spacy_model, instrumentation=instrumentation
+    )
+    doc = en_sm_spacy_model.make_doc("Black pepper, honey and spinach.")
+
+    matches = entity_matcher.match(doc)
+    entity_matcher(doc)
+
+    exported = instrumentation.to_dict()
+    assert exported["timings"]["entity_matcher.match"]["count"] == 2
+    assert exported["counters"]["entity_matcher.matches"] == 2 * len(matches)
+
+
+def test_entity_matcher_options(pizza_bisou_kg, en_sm_spacy_model) -> None:
+    entity_matcher = EntityMatcher(
+        pizza_bisou_kg, en_sm_spacy_model, use_fuzzy=True, fuzzy_engine="ngram"
+    )
+    init_parameters = set(inspect.signature(EntityMatcher).parameters)
+
+    options = entity_matcher.options()
+
+    # every option is kept, e.g. when the entity linker swaps its knowledge graph
+    assert set(options) == init_parameters - {"knowledge_graph", "spacy_model"}
+    assert EntityMatcher(pizza_bisou_kg, en_sm_spacy_model, **options).options() == (
+        options
+    )
+
+
+@pytest.mark.parametrize("fuzzy_engine", ["spaczz", "ngram"])
+def test_entity_matcher_hybrid(fuzzy_engine, pizza_bisou_kg, en_sm_spacy_model) -> None:
+    bisou = "http://www.msesboue.org/o/pizza-data-demo/bisou#"
+    string_matcher = EntityMatcher(pizza_bisou_kg, en_sm_spacy_model)
+    hybrid_matcher = EntityMatcher(
+        pizza_bisou_kg,
+        en_sm_spacy_model,
+        use_fuzzy=True,
+        fuzzy_threshold=85,
+        fuzzy_engine=fuzzy_engine,
+        hybrid=True,
+    )
+    doc = en_sm_spacy_model.make_doc("Black pepper, spinnach and walnuts.")
+
+    string_matches = string_matcher.match(doc)
+    hybrid_matches = hybrid_matcher.match(doc)
+
+    assert set(string_matches) < set(hybrid_matches)
+    fuzzy_matches = set(hybrid_matches) - set(string_matches)
+    assert bisou + "_spinach" in {uri for _, _, _, uri in fuzzy_matches}
+    # fuzzy matches are only looked for outside the exact matches
+    covered = {
+        token for start, end, _, _ in string_matches for token in range(start, end)
+    }
+    assert all(
+        not covered.intersection(range(start, end))
+        for start, end, _, _ in fuzzy_matches
+    )
+
+    doc = hybrid_matcher(doc)
+    assert [
+        (span.start, span.end, span.label_, span.id_) for span in doc.spans["hybrid"]
+    ] == hybrid_matches
+
+
+def test_entity_matcher_hybrid_prefilter(pizza_bisou_kg, en_sm_spacy_model) -> None:
+    doc = en_sm_spacy_model.make_doc("Black pepper and the spinnach.")
+    checked_spans = []
+
+    def prefilter(span) -> bool:
+        checked_spans.append(span.text)
+        return has_content_word(span)
+
+    entity_matcher = EntityMatcher(
+        pizza_bisou_kg,
+        en_sm_spacy_model,
+        use_fuzzy=True,
+        fuzzy_engine="ngram",
+        hybrid=True,
+        fuzzy_prefilter=prefilter,
+    )
+    entity_matcher.match(doc)
+
+    assert checked_spans == ["and the spinnach."]
+    assert not has_content_word(doc[2:4])
+
+    with pytest.raises(ValueError):
+        EntityMatcher(pizza_bisou_kg, en_sm_spacy_model, hybrid=True)
@@ -0,0 +1,119 @@
+import pickle
+
+import pytest
+
+from buzz_el.entity_matcher import AhoCorasickRuler, EntityMatcher, LabelNormalizer
+from buzz_el.graph import KnowledgeGraph
+
+PATTERNS = [
+    {"label": "KG_ENT", "pattern": "fior di latte", "id": "uri:fiorDiLatte"},
+    {"label": "KG_ENT", "pattern": "Parisian mushroom", "id": "uri:mushroom"},
+    {"label": "KG_ENT", "pattern": "crème fraîche", "id": "uri:cremeFraiche"},
+    {"label": "KG_ENT", "pattern": "cherry tomatoes", "id": "uri:cherryTomatoes"},
+]
+TEXT = "Fior-di-latte, parisian mushrooms, creme fraiche and a cherry tomato."
+EXPECTED_URIS = {"uri:fiorDiLatte", "uri:mushroom", "uri:cremeFraiche"}
+
+
+@pytest.mark.parametrize(
+    "word,singular",
+    [
+        ("mushrooms", "mushroom"),
+        ("berries", "berry"),
+        ("tomatoes", "tomato"),
+        ("glass", "glass"),
+        ("asparagus", "asparagus"),
+    ],
+)
+def test_singularize(word, singular) -> None:
+    assert LabelNormalizer.singularize(word) == singular
+
+
+def test_normalize_and_expand() -> None:
+    label_normalizer = LabelNormalizer(fold_plurals=True)
+
+    assert label_normalizer.normalize("Crème") == "Creme"
+    assert label_normalizer.normalize("ﬁor") == "fior"
+    assert label_normalizer.normalize("olives") == "olive"
+    assert label_normalizer.normalize("-") == "-"
+    assert set(label_normalizer.expand("fior di latte")) == {
+        "fior di latte",
+        "fior-di-latte",
+        "fior di lattes",
+    }
+    assert "crème fraîches" in label_normalizer.expand("crème fraîche")
+    assert "creme fraiche" in label_normalizer.expand("crème fraîche")
+    assert LabelNormalizer().expand("mushroom") == ["mushroom"]
+    assert LabelNormalizer().normalize("olives") == "olives"
+    # apostrophes and dots are kept, by the keys and the expansion alike
+    assert LabelNormalizer().normalize("d'Italia") == "d'Italia"
+    assert LabelNormalizer().expand("mozzarella d'Italia") == [
+        "mozzarella d'Italia",
+        "mozzarella-d'Italia",
+    ]
+
+
+def test_pickle() -> None:
+    label_normalizer = LabelNormalizer(fold_plurals=True)
+
+    loaded_normalizer = pickle.loads(pickle.dumps(label_normalizer))
+
+    assert loaded_normalizer.to_config() == label_normalizer.to_config()
+    assert loaded_normalizer.normalize("Crèmes") == "Creme"
+
+
+def test_doc_keys(en_sm_spacy_model) -> None:
+    label_normalizer = LabelNormalizer(fold_plurals=True)
+    doc = en_sm_spacy_model.make_doc("Fior-di-latte - mushrooms")
+
+    assert label_normalizer.doc_keys(doc) == [
+        "Fior",
+        None,
+        "di",
+        None,
+        "latte",
+        "-",
+        "mushroom",
+    ]
+
+
+def test_aho_corasick_ruler_normalizer(tmp_path, en_sm_spacy_model) -> None:
+    ruler = AhoCorasickRuler(
+        en_sm_spacy_model, normalizer=LabelNormalizer(fold_plurals=True)
+    )
+    ruler.add_patterns(PATTERNS)
+    doc = en_sm_spacy_model.make_doc(TEXT)
+
+    matches = ruler.match(doc)
+    assert {entity_uri for _, _, _, entity_uri in matches} == EXPECTED_URIS | {
+        "uri:cherryTomatoes"
+    }
+    assert doc[matches[0][0] : matches[0][1]].text == "Fior-di-latte"
+
+    ruler.to_disk(tmp_path / "ruler.npz")
+    loaded_ruler = AhoCorasickRuler.from_disk(tmp_path / "ruler.npz", en_sm_spacy_model)
+    assert loaded_ruler.normalizer.to_config() == ruler.normalizer.to_config()
+    assert loaded_ruler.match(doc) == matches
+
+
+@pytest.mark.parametrize("string_engine", ["span_ruler", "aho_corasick"])
+def test_entity_matcher_label_normalizer(string_engine, en_sm_spacy_model) -> None:
+    knowledge_graph = KnowledgeGraph(
+        kg=None, entity_patterns=PATTERNS, get_entity_context=lambda uri: ""
+    )
+    doc = en_sm_spacy_model.make_doc(TEXT)
+
+    entity_matcher = EntityMatcher(
+        knowledge_graph, en_sm_spacy_model, string_engine=string_engine
+    )
+    assert not {entity_uri for _, _, _, entity_uri in entity_matcher.match(doc)}
+
+    entity_matcher = EntityMatcher(
+        knowledge_graph,
+        en_sm_spacy_model,
+        string_engine=string_engine,
+        label_normalizer=LabelNormalizer(fold_plurals=True),
+    )
+    assert EXPECTED_URIS <= {
+        entity_uri for _, _, _, entity_uri in entity_matcher.match(doc)
+    }
@@ -0,0 +1,42 @@
+import pytest
+
+from buzz_el.entity_matcher import PhraseRuler
+
+
+@pytest.fixture
+def ruler(en_sm_spacy_model) -> PhraseRuler:
+    ruler = PhraseRuler(en_sm_spacy_model)
+    ruler.add_patterns(
+        [
+            {"label": "KG_ENT", "pattern": "black pepper", "id": "uri:blackPepper"},
+            {"label": "KG_ENT", "pattern": "Pepper", "id": "uri:pepper"},
+            {"label": "KG_ENT", "pattern": "poivre", "id": "uri:pepper"},
+        ],
+        batch_size=2,
+    )
+    return ruler
+
+
+def test_phrase_ruler_match(ruler, en_sm_spacy_model) -> None:
+    doc = ruler(en_sm_spacy_model.make_doc("Black pepper and poivre."))
+
+    assert ruler.match(doc) == [
+        (0, 2, "KG_ENT", "uri:blackPepper"),
+        (1, 2, "KG_ENT", "uri:pepper"),
+        (3, 4, "KG_ENT", "uri:pepper"),
+    ]
+    assert [span.id_ for span in doc.spans["string"]] == [
+        "uri:blackPepper",
+        "uri:pepper",
+        "uri:pepper",
+    ]
+
+
+def test_phrase_ruler_remove_by_id(ruler, en_sm_spacy_model) -> None:
+    ruler.remove_by_id("uri:pepper")
+    doc = en_sm_spacy_model.make_doc("Black pepper and poivre.")
+
+    assert len(ruler) == 1
+    assert ruler.match(doc) == [(0, 2, "KG_ENT", "uri:blackPepper")]
+    with pytest.raises(ValueError):
+        ruler.remove_by_id("uri:pepper")
@@ -0,0 +1,104 @@
+import pytest
+
+from buzz_el.graph import ContextCache, KnowledgeGraph, RDFGraphLoader
+
+
+class TestContextCache:
+    def test_lru_eviction(self) -> None:
+        cache = ContextCache(max_entries=2, policy="lru")
+        cache.put("a", "context a")
+        cache.put("b", "context b")
+        assert cache.get("a") == "context a"
+        cache.put("c", "context c")
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats == {
+            "hits": 1,
+            "misses": 0,
+            "evictions": 1,
+            "entries": 2,
+            "bytes": cache.total_bytes,
+        }
+
+    def test_lfu_eviction(self) -> None:
+        cache = ContextCache(max_entries=2, policy="lfu")
+        cache.put("a", "context a")
+        cache.put("b", "context b")
+        cache.get("b")
+        cache.get("b")
+        cache.get("a")
+        cache.put("c", "context c")
+
+        assert "a" not in cache
+        assert "b" in cache
+        assert "c" in cache
+        assert cache.evictions == 1
+
+    def test_max_bytes(self) -> None:
+        value = "x" * 100
+        cache = ContextCache(max_bytes=400)
+        for key in ["a", "b", "c", "d"]:
+            cache.put(key, value)
+
+        assert cache.total_bytes <= 400
+        assert 0 < len(cache) < 4
+        assert cache.evictions == 4 - len(cache)
+
+        cache.put("too big", "x" * 1000)
+        assert "too big" not in cache
+
+    def test_invalidate_and_clear(self) -> None:
+        cache = ContextCache()
+        cache.put("a", "context a")
+        cache.put("b", "context b")
+        cache.invalidate("a")
+
+        assert "a" not in cache
+        assert len(cache) == 1
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.total_bytes == 0
+
+    def test_invalid_parameters(self) -> None:
+        with pytest.raises(ValueError):
+            ContextCache(policy="fifo")
+        with pytest.raises(ValueError):
+            ContextCache(max_entries=0)
+
+
+def test_knowledge_graph_context_cache() -> None:
+    calls = []
+
+    def get_entity_context(ent_uri: str) -> str:
+        calls.append(ent_uri)
+        return f"{ent_uri} context"
+
+    cache = ContextCache(max_entries=10)
+    knowledge_graph = KnowledgeGraph(
+        kg=None,
+        entity_patterns=[],
+        get_entity_context=get_entity_context,
+        context_cache=cache,
+    )
+
+    for _ in range(3):
+        assert knowledge_graph.get_context("uri") == "uri context"
+
+    assert calls == ["uri"]
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_rdf_graph_loader_context_cache(pizza_bisou_kg_file_path) -> None:
+    cache = ContextCache(max_entries=10, policy="lfu")
+    kg_instance = RDFGraphLoader(
+        kg_file_path=pizza_bisou_kg_file_path, context_cache=cache
+    )()
+    ent_uri = "http://www.msesboue.org/o/pizza-data-demo/bisou#_burraTadah"
+
+    assert kg_instance.context_cache is cache
+    assert kg_instance.get_context(ent_uri) == kg_instance.get_context(ent_uri)
+    assert cache.stats["hits"] == 1
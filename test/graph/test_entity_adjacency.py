@@ -0,0 +1,69 @@
+import numpy as np
+from rdflib import URIRef
+
+from buzz_el.graph import EntityAdjacency, RDFGraphLoader
+
+URIS = ["uri:a", "uri:b", "uri:c", "uri:d"]
+
+
+def test_from_edges() -> None:
+    adjacency = EntityAdjacency.from_edges(URIS, [0, 1, 0, 2, 1], [1, 0, 2, 2, 2])
+
+    assert len(adjacency) == 4
+    assert adjacency.n_edges == 3
+    assert adjacency.indptr.tolist() == [0, 2, 4, 6, 6]
+    assert adjacency.indices.tolist() == [1, 2, 0, 2, 0, 1]
+    assert adjacency.neighbours("uri:a") == ["uri:b", "uri:c"]
+    assert adjacency.neighbours("uri:d") == []
+    assert adjacency.neighbours("uri:unknown") == []
+
+
+def test_connected() -> None:
+    adjacency = EntityAdjacency.from_edges(URIS, [0, 1], [1, 2])
+    sources = adjacency.entity_ids(["uri:a", "uri:b", "uri:a", "uri:c", "uri:x"])
+    targets = adjacency.entity_ids(["uri:b", "uri:a", "uri:c", "uri:b", "uri:a"])
+
+    assert sources.tolist() == [0, 1, 0, 2, -1]
+    assert adjacency.connected(sources, targets).tolist() == [
+        True,
+        True,
+        False,
+        True,
+        False,
+    ]
+    assert not EntityAdjacency.from_edges(URIS, [], []).connected([0], [1]).any()
+
+
+def test_to_disk(tmp_path) -> None:
+    adjacency = EntityAdjacency.from_edges(URIS, [0, 1], [1, 3])
+    adjacency.to_disk(tmp_path / "adjacency.npz")
+
+    loaded_adjacency = EntityAdjacency.from_disk(tmp_path / "adjacency.npz")
+
+    assert loaded_adjacency.uris == URIS
+    assert np.array_equal(loaded_adjacency.indptr, adjacency.indptr)
+    assert np.array_equal(loaded_adjacency.indices, adjacency.indices)
+    assert loaded_adjacency.neighbours("uri:d") == ["uri:b"]
+
+
+def test_rdf_graph_loader_build_adjacency(pizza_bisou_kg_file_path) -> None:
+    graph_loader = RDFGraphLoader(
+        kg_file_path=pizza_bisou_kg_file_path,
+        label_properties={"rdfs:label", "skos:altLabel"},
+        lang_filter_tag="en",
+    )
+
+    adjacency = graph_loader.build_adjacency()
+
+    entity_uris = set(graph_loader.entity_patterns.uris)
+    assert set(adjacency.uris) == entity_uris
+    expected_edges = {
+        frozenset((str(subject), str(obj)))
+        for subject, _, obj in graph_loader.kg
+        if str(subject) in entity_uris and str(obj) in entity_uris and subject != obj
+    }
+    assert adjacency.n_edges == len(expected_edges) > 0
+    for edge in expected_edges:
+        source, target = sorted(edge)
+        assert target in adjacency.neighbours(source)
+        assert source in adjacency.neighbours(target)
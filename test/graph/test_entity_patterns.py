@@ -0,0 +1,78 @@
+import pytest
+from spacy.pipeline import SpanRuler
+
+from buzz_el.graph import EntityPatterns
+
+PATTERNS = [
+    {"label": "KG_ENT", "pattern": "honey", "id": "uri:honey"},
+    {"label": "KG_ENT", "pattern": "miel", "id": "uri:honey"},
+    {"label": "KG_ENT", "pattern": "fior di latte", "id": "uri:mozza"},
+    {"label": "OTHER", "pattern": "crème fraîche", "id": "uri:creme"},
+]
+
+
+@pytest.fixture(scope="module")
+def entity_patterns() -> EntityPatterns:
+    return EntityPatterns(PATTERNS)
+
+
+def test_sequence_behaviour(entity_patterns) -> None:
+    assert len(entity_patterns) == 4
+    assert list(entity_patterns) == PATTERNS
+    assert entity_patterns[-1] == PATTERNS[-1]
+    assert PATTERNS[2] in entity_patterns
+    assert {"label": "KG_ENT", "pattern": "miel", "id": "uri:mozza"} not in (
+        entity_patterns
+    )
+    with pytest.raises(IndexError):
+        entity_patterns[4]
+
+
+def test_interning(entity_patterns) -> None:
+    assert list(entity_patterns.uris) == ["uri:honey", "uri:mozza", "uri:creme"]
+    assert list(entity_patterns.pattern_uri_ids) == [0, 0, 1, 2]
+    assert list(entity_patterns.entity_labels) == ["KG_ENT", "OTHER"]
+    assert entity_patterns.phrase(3) == "crème fraîche"
+
+
+def test_read_only_buffers(entity_patterns) -> None:
+    read_only_patterns = EntityPatterns.from_buffers(
+        uris=entity_patterns.uris,
+        entity_labels=entity_patterns.entity_labels,
+        phrase_offsets=entity_patterns.phrase_offsets,
+        phrase_data=bytes(entity_patterns.phrase_data),
+        pattern_uri_ids=entity_patterns.pattern_uri_ids,
+        pattern_entity_label_ids=entity_patterns.pattern_entity_label_ids,
+    )
+
+    assert list(read_only_patterns) == PATTERNS
+    with pytest.raises(TypeError):
+        read_only_patterns.append(PATTERNS[0])
+
+
+def test_span_ruler_compatibility(entity_patterns, en_sm_spacy_model) -> None:
+    ruler = SpanRuler(en_sm_spacy_model, spans_key="string")
+    ruler.add_patterns(entity_patterns)
+    doc = ruler(en_sm_spacy_model.make_doc("Some honey and fior di latte."))
+
+    assert [(span.text, span.id_) for span in doc.spans["string"]] == [
+        ("honey", "uri:honey"),
+        ("fior di latte", "uri:mozza"),
+    ]
+
+
+def test_remove_ids() -> None:
+    entity_patterns = EntityPatterns(PATTERNS)
+    entity_patterns.extend(PATTERNS)
+    entity_patterns.remove_ids({"uri:honey", "uri:unknown"})
+
+    assert len(entity_patterns) == 4
+    assert list(entity_patterns) == PATTERNS[2:] * 2
+    # removed patterns are only dropped from the buffers on access
+    assert list(entity_patterns.uris) == ["uri:mozza", "uri:creme"]
+    assert entity_patterns[1] == PATTERNS[3]
+
+    entity_patterns.append(PATTERNS[0])
+    entity_patterns.remove_ids({"uri:mozza"})
+
+    assert list(entity_patterns) == [PATTERNS[3], PATTERNS[3], PATTERNS[0]]
@@ -0,0 +1,124 @@
+import pytest
+from rdflib import RDFS, Graph, Literal, URIRef
+
+from buzz_el.entity_linker import EntityLinker
+from buzz_el.entity_matcher import EntityMatcher
+from buzz_el.graph import FederatedKnowledgeGraph, KnowledgeGraph, RDFGraphLoader
+
+BISOU = "http://www.msesboue.org/o/pizza-data-demo/bisou#"
+
+
+@pytest.fixture(scope="function")
+def geo_kg() -> KnowledgeGraph:
+    return KnowledgeGraph(
+        kg=Graph(),
+        entity_patterns=[
+            {"label": "KG_ENT", "pattern": "Naples", "id": "geo:naples"},
+            {"label": "KG_ENT", "pattern": "Parma", "id": "geo:parma"},
+        ],
+        get_entity_context=lambda entity_uri: f"city {entity_uri}",
+    )
+
+
+@pytest.fixture(scope="function")
+def federated_kg(geo_kg, pizza_bisou_kg_file_path) -> FederatedKnowledgeGraph:
+    pizza_kg = RDFGraphLoader(
+        kg_file_path=pizza_bisou_kg_file_path,
+        label_properties={"rdfs:label", "skos:altLabel"},
+        context_properties={"rdfs:comment"},
+        lang_filter_tag="en",
+        precompute_contexts=True,
+    )()
+    return FederatedKnowledgeGraph({"pizza": pizza_kg, "geo": geo_kg})
+
+
+def test_federated_patterns_and_contexts(federated_kg, geo_kg) -> None:
+    pizza_kg = federated_kg.knowledge_graphs["pizza"]
+    assert len(federated_kg.entity_patterns) == len(pizza_kg.entity_patterns) + 2
+    assert federated_kg.entity_patterns[0] == {
+        **pizza_kg.entity_patterns[0],
+        "id": "pizza::" + pizza_kg.entity_patterns[0]["id"],
+    }
+    assert federated_kg.entity_patterns[-1] == {
+        "label": "KG_ENT",
+        "pattern": "Parma",
+        "id": "geo::geo:parma",
+    }
+
+    assert federated_kg.split_entity_id("geo::geo:parma") == ("geo", "geo:parma")
+    assert federated_kg.get_context("geo::geo:parma") == "city geo:parma"
+    assert federated_kg.get_context(
+        "pizza::" + BISOU + "_blackPepper"
+    ) == pizza_kg.get_context(BISOU + "_blackPepper")
+    assert federated_kg.get_context("geo:parma") == ""
+    assert set(federated_kg.kg) == {"pizza", "geo"}
+
+
+def test_federated_matching(federated_kg, en_sm_spacy_model) -> None:
+    entity_matcher = EntityMatcher(federated_kg, en_sm_spacy_model)
+    doc = en_sm_spacy_model.make_doc("Black pepper from Naples.")
+
+    assert {entity_uri for _, _, _, entity_uri in entity_matcher.match(doc)} == {
+        "pizza::" + BISOU + "_blackPepper",
+        "geo::geo:naples",
+    }
+
+
+def test_federated_update(federated_kg, en_sm_spacy_model) -> None:
+    entity_matcher = EntityMatcher(federated_kg, en_sm_spacy_model)
+    doc = en_sm_spacy_model.make_doc("Black truffle from Naples.")
+    assert {uri for _, _, _, uri in entity_matcher.match(doc)} == {"geo::geo:naples"}
+
+    kg_update = federated_kg.update(
+        added_triples=[
+            (
+                URIRef(BISOU + "_truffle"),
+                RDFS.label,
+                Literal("black truffle", lang="en"),
+            )
+        ],
+        graph_name="pizza",
+    )
+    entity_matcher.apply_kg_update(kg_update)
+
+    assert kg_update.entity_uris == {"pizza::" + BISOU + "_truffle"}
+    assert set(kg_update.contexts) == kg_update.entity_uris
+    assert {uri for _, _, _, uri in entity_matcher.match(doc)} == {
+        "pizza::" + BISOU + "_truffle",
+        "geo::geo:naples",
+    }
+    with pytest.raises(ValueError):
+        federated_kg.update(graph_name="people")
+    with pytest.raises(ValueError):
+        federated_kg.update(added_triples=[])
+
+
+def test_federated_entity_linker_update(federated_kg, en_sm_spacy_model) -> None:
+    entity_linker = EntityLinker(federated_kg, en_sm_spacy_model)
+    truffle = "pizza::" + BISOU + "_truffle"
+
+    kg_update = entity_linker.update(
+        added_triples=[
+            (
+                URIRef(BISOU + "_truffle"),
+                RDFS.label,
+                Literal("black truffle", lang="en"),
+            )
+        ],
+        graph_name="pizza",
+    )
+
+    assert kg_update.entity_uris == {truffle}
+    doc = entity_linker(en_sm_spacy_model.make_doc("Black truffle from Naples."))
+    assert [ent.id_ for ent in doc.ents] == [truffle, "geo::geo:naples"]
+    with pytest.raises(ValueError):
+        entity_linker.update(added_triples=[])
+
+
+def test_federated_invalid_graphs(geo_kg) -> None:
+    with pytest.raises(ValueError):
+        FederatedKnowledgeGraph({})
+    with pytest.raises(ValueError):
+        FederatedKnowledgeGraph({"geo::places": geo_kg})
+    with pytest.raises(ValueError):
+        FederatedKnowledgeGraph({"geo": geo_kg}, separator="")
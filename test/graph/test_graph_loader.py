@@ -1,6 +1,7 @@
 from typing import Callable
 
 import pytest
+from rdflib import Literal, URIRef
 
 from buzz_el.graph import KnowledgeGraph, RDFGraphLoader
 
@@ -339,3 +340,196 @@ class TestBuildKG:
         assert len(kg_instance.kg) > 0
         assert len(kg_instance.entity_patterns) > 0
         assert isinstance(kg_instance.get_context, Callable) > 0
+
+
+class TestContextIndex:
+    @pytest.fixture(scope="class")
+    def precomputed_rdf_graph_loader(self, pizza_bisou_kg_file_path) -> RDFGraphLoader:
+        graph_loader = RDFGraphLoader(
+            kg_file_path=pizza_bisou_kg_file_path,
+            context_properties={"rdfs:comment"},
+            lang_filter_tag="en",
+            precompute_contexts=True,
+        )
+
+        return graph_loader
+
+    def test_build_context_index_matches_get_context(
+        self, default_rdf_graph_loader, custom_rdf_graph_loader
+    ) -> None:
+        for graph_loader in [default_rdf_graph_loader, custom_rdf_graph_loader]:
+            context_index = graph_loader.build_context_index()
+            get_context = graph_loader.kg_get_context()
+
+            assert len(context_index) > 0
+            for ent_uri, context_string in context_index.items():
+                assert sorted(context_string.split(" ")) == sorted(
+                    get_context(ent_uri).split(" ")
+                )
+
+    def test_kg_get_context_precomputed(self, precomputed_rdf_graph_loader) -> None:
+        kg_instance = precomputed_rdf_graph_loader()
+
+        assert kg_instance.context_index is not None
+        assert kg_instance.context_index is precomputed_rdf_graph_loader.context_index
+        assert kg_instance.get_context(
+            "http://www.msesboue.org/o/pizza-data-demo/bisou#_burraTadah"
+        ).startswith("The 'BurraTadah' pizza features a tomato base")
+        assert kg_instance.get_context("http://unknown.org/entity") == ""
+
+    def test_default_loader_has_no_context_index(
+        self, default_rdf_graph_loader
+    ) -> None:
+        kg_instance = default_rdf_graph_loader()
+
+        assert kg_instance.context_index is None
+
+
+class TestLazyPatterns:
+    @pytest.fixture(scope="function")
+    def counting_rdf_graph_loader(self, pizza_bisou_kg_file_path) -> RDFGraphLoader:
+        graph_loader = RDFGraphLoader(kg_file_path=pizza_bisou_kg_file_path)
+        graph_loader.build_patterns_calls = 0
+        build_patterns = graph_loader.build_patterns
+
+        def counting_build_patterns():
+            graph_loader.build_patterns_calls += 1
+            return build_patterns()
+
+        graph_loader.build_patterns = counting_build_patterns
+
+        return graph_loader
+
+    def test_patterns_built_once(self, counting_rdf_graph_loader) -> None:
+        assert counting_rdf_graph_loader.build_patterns_calls == 0
+
+        kg_instance = counting_rdf_graph_loader()
+        entity_patterns = counting_rdf_graph_loader.entity_patterns
+
+        assert counting_rdf_graph_loader.build_patterns_calls == 1
+        assert kg_instance.entity_patterns is entity_patterns
+
+    def test_patterns_invalidation(self, counting_rdf_graph_loader) -> None:
+        default_patterns = counting_rdf_graph_loader.entity_patterns
+
+        counting_rdf_graph_loader.lang_filter_tag = "fr"
+        fr_patterns = counting_rdf_graph_loader.entity_patterns
+
+        assert counting_rdf_graph_loader.build_patterns_calls == 2
+        assert len(fr_patterns) < len(default_patterns)
+        assert 'FILTER ( lang(?sparql_key) = "fr" )' in (
+            counting_rdf_graph_loader._build_ent_labels_sparql_query()
+        )
+
+        counting_rdf_graph_loader.label_properties = {"skos:altLabel"}
+        assert counting_rdf_graph_loader._label_sparql_alt_path_str == "skos:altLabel"
+        counting_rdf_graph_loader.entity_patterns
+        assert counting_rdf_graph_loader.build_patterns_calls == 3
+
+
+class TestTripleIndexPatterns:
+    @staticmethod
+    def sparql_patterns(graph_loader: RDFGraphLoader) -> set:
+        query = graph_loader._build_ent_labels_sparql_query()
+        return {
+            (str(res[graph_loader._sparql_var]), str(res["ent_uri"]))
+            for res in graph_loader.kg.query(query)
+        }
+
+    def test_resolve_properties(self, custom_rdf_graph_loader) -> None:
+        predicates = custom_rdf_graph_loader._resolve_properties(
+            custom_rdf_graph_loader.label_properties
+        )
+
+        assert set(predicates) == {
+            URIRef("http://www.w3.org/2000/01/rdf-schema#label"),
+            URIRef("http://www.w3.org/2004/02/skos/core#altLabel"),
+        }
+        assert (
+            custom_rdf_graph_loader._resolve_properties({"rdfs:label|skos:altLabel"})
+            is None
+        )
+        assert custom_rdf_graph_loader._resolve_properties({"unknown:label"}) is None
+
+    def test_patterns_match_sparql(
+        self, default_rdf_graph_loader, custom_rdf_graph_loader
+    ) -> None:
+        for graph_loader in [default_rdf_graph_loader, custom_rdf_graph_loader]:
+            patterns = graph_loader.build_patterns()
+            pattern_pairs = [(p["pattern"], p["id"]) for p in patterns]
+
+            assert len(pattern_pairs) == len(set(pattern_pairs))
+            assert set(pattern_pairs) == self.sparql_patterns(graph_loader)
+
+    def test_property_path_fallback(self, pizza_bisou_kg_file_path) -> None:
+        graph_loader = RDFGraphLoader(
+            kg_file_path=pizza_bisou_kg_file_path,
+            label_properties={"rdfs:label|skos:altLabel"},
+            lang_filter_tag="en",
+        )
+        patterns = graph_loader.build_patterns()
+
+        assert {(p["pattern"], p["id"]) for p in patterns} == self.sparql_patterns(
+            graph_loader
+        )
+        assert {
+            "label": "KG_ENT",
+            "pattern": "pepper",
+            "id": "http://www.msesboue.org/o/pizza-data-demo/bisou#_blackPepper",
+        } in patterns
+
+
+class TestIncrementalUpdate:
+    BISOU = "http://www.msesboue.org/o/pizza-data-demo/bisou#"
+
+    @pytest.fixture(scope="function")
+    def graph_loader(self, pizza_bisou_kg_file_path) -> RDFGraphLoader:
+        return RDFGraphLoader(
+            kg_file_path=pizza_bisou_kg_file_path,
+            label_properties={"rdfs:label", "skos:altLabel"},
+            context_properties={"rdfs:comment"},
+            lang_filter_tag="en",
+            precompute_contexts=True,
+        )
+
+    @staticmethod
+    def pattern_pairs(patterns) -> set:
+        return {(p["pattern"], p["id"]) for p in patterns}
+
+    def test_update_matches_rebuild(self, graph_loader) -> None:
+        knowledge_graph = graph_loader()
+        black_pepper = URIRef(self.BISOU + "_blackPepper")
+        new_entity = URIRef(self.BISOU + "_truffle")
+        label = URIRef("http://www.w3.org/2000/01/rdf-schema#label")
+        comment = URIRef("http://www.w3.org/2000/01/rdf-schema#comment")
+        removed_triples = list(graph_loader.kg.triples((black_pepper, None, None)))
+        added_triples = [
+            (new_entity, label, Literal("black truffle", lang="en")),
+            (new_entity, comment, Literal("A rare mushroom.", lang="en")),
+        ]
+
+        kg_update = knowledge_graph.update(
+            added_triples=added_triples, removed_triples=removed_triples
+        )
+
+        assert kg_update.entity_uris == {str(black_pepper), str(new_entity)}
+        assert self.pattern_pairs(knowledge_graph.entity_patterns) == (
+            self.pattern_pairs(graph_loader.build_patterns())
+        )
+        assert ("black truffle", str(new_entity)) in self.pattern_pairs(
+            knowledge_graph.entity_patterns
+        )
+        assert str(black_pepper) not in {
+            p["id"] for p in knowledge_graph.entity_patterns
+        }
+        assert knowledge_graph.get_context(str(new_entity)) == "A rare mushroom."
+        assert knowledge_graph.get_context(str(black_pepper)) == ""
+
+    def test_update_without_diff_support(self, pizza_bisou_kg) -> None:
+        knowledge_graph = KnowledgeGraph(
+            kg=pizza_bisou_kg.kg,
+            entity_patterns=[],
+            get_entity_context=lambda ent_uri: "",
+        )
+        with pytest.raises(ValueError):
+            knowledge_graph.update(added_triples=[])
@@ -1,6 +1,7 @@
 import pytest
 from rdflib import Graph, URIRef
 
+from buzz_el.commons.instrumentation import Instrumentation
 from buzz_el.graph import KnowledgeGraph
 
 
@@ -50,4 +51,20 @@ def test_knowledge_graph(knowledge_graph) -> None:
     test_q_res = [(str(r["s"]), str(r["p"]), str(r["o"])) for r in knowledge_graph.sparql_endpoint(test_endpoint_q)]
 
     assert ("subject", "predicate", "object") in test_q_res
-    assert ("sujet", "predicat", "objet") in test_q_res
\ No newline at end of file
+    assert ("sujet", "predicat", "objet") in test_q_res
+
+
+def test_knowledge_graph_instrumentation(knowledge_graph) -> None:
+    instrumentation = Instrumentation()
+    knowledge_graph.instrumentation = instrumentation
+
+    assert knowledge_graph.get_context("my_entity") == "entity context"
+    assert knowledge_graph.get_context("my_entity") == "entity context"
+
+    exported = instrumentation.to_dict()
+    assert exported["timings"]["knowledge_graph.get_context"]["count"] == 2
+    assert exported["counters"]["knowledge_graph.get_context.calls"] == 2
+
+    knowledge_graph.instrumentation = None
+    knowledge_graph.get_context("my_entity")
+    assert instrumentation.to_dict() == exported
@@ -0,0 +1,114 @@
+import pytest
+
+from buzz_el.graph import KnowledgeGraph, RDFGraphLoader
+from buzz_el.graph.snapshot import StringTable, load_snapshot, read_snapshot_header
+
+BURRATADAH_URI = "http://www.msesboue.org/o/pizza-data-demo/bisou#_burraTadah"
+
+
+def test_string_table() -> None:
+    strings = ["pizza", "", "fior di latte", "café"]
+    table = StringTable.from_strings(strings)
+
+    assert len(table) == 4
+    assert list(table) == strings
+    assert table[-1] == "café"
+    with pytest.raises(IndexError):
+        table[4]
+
+
+def test_knowledge_graph_to_disk_from_disk(tmp_path) -> None:
+    entity_patterns = [
+        {"label": "KG_ENT", "pattern": "honey", "id": "uri:honey"},
+        {"label": "KG_ENT", "pattern": "miel", "id": "uri:honey"},
+        {"label": "KG_ENT", "pattern": "pepper", "id": "uri:pepper"},
+    ]
+    knowledge_graph = KnowledgeGraph(
+        kg=None,
+        entity_patterns=entity_patterns,
+        get_entity_context=lambda ent_uri: f"{ent_uri} context",
+    )
+    snapshot_path = tmp_path / "kg.snapshot"
+    knowledge_graph.to_disk(snapshot_path, metadata={"source": "test"})
+
+    loaded_knowledge_graph = KnowledgeGraph.from_disk(snapshot_path)
+
+    assert list(loaded_knowledge_graph.entity_patterns) == entity_patterns
+    assert loaded_knowledge_graph.entity_patterns[1] == entity_patterns[1]
+    assert loaded_knowledge_graph.get_context("uri:pepper") == "uri:pepper context"
+    assert loaded_knowledge_graph.get_context("uri:unknown") == ""
+    assert dict(loaded_knowledge_graph.context_index) == {
+        "uri:honey": "uri:honey context",
+        "uri:pepper": "uri:pepper context",
+    }
+    assert load_snapshot(snapshot_path)[2] == {"source": "test"}
+
+
+def test_empty_snapshot(tmp_path) -> None:
+    snapshot_path = tmp_path / "empty.snapshot"
+    KnowledgeGraph(
+        kg=None, entity_patterns=[], get_entity_context=lambda ent_uri: ""
+    ).to_disk(snapshot_path)
+
+    loaded_knowledge_graph = KnowledgeGraph.from_disk(snapshot_path)
+
+    assert len(loaded_knowledge_graph.entity_patterns) == 0
+    assert len(loaded_knowledge_graph.context_index) == 0
+
+
+def test_invalid_snapshot(tmp_path) -> None:
+    snapshot_path = tmp_path / "invalid.snapshot"
+    snapshot_path.write_bytes(b"not a snapshot")
+
+    with pytest.raises(ValueError):
+        read_snapshot_header(snapshot_path)
+
+
+class TestRDFGraphLoaderSnapshot:
+    @staticmethod
+    def build_loader(kg_file_path, snapshot_path, lang_filter_tag="en"):
+        return RDFGraphLoader(
+            kg_file_path=kg_file_path,
+            label_properties={"rdfs:label", "skos:altLabel"},
+            lang_filter_tag=lang_filter_tag,
+            snapshot_path=snapshot_path,
+        )
+
+    def test_snapshot_reuse(self, pizza_bisou_kg_file_path, tmp_path) -> None:
+        snapshot_path = tmp_path / "pizza.snapshot"
+
+        graph_loader = self.build_loader(pizza_bisou_kg_file_path, snapshot_path)
+        kg_instance = graph_loader()
+        assert snapshot_path.exists()
+        assert kg_instance.kg is not None
+
+        reused_graph_loader = self.build_loader(pizza_bisou_kg_file_path, snapshot_path)
+        reused_kg_instance = reused_graph_loader()
+
+        assert reused_graph_loader._kg_loaded is False
+        assert reused_kg_instance.kg is None
+        assert [
+            (p["pattern"], p["id"]) for p in reused_kg_instance.entity_patterns
+        ] == [(p["pattern"], p["id"]) for p in kg_instance.entity_patterns]
+        assert sorted(reused_kg_instance.get_context(BURRATADAH_URI).split(" ")) == (
+            sorted(kg_instance.get_context(BURRATADAH_URI).split(" "))
+        )
+
+    def test_snapshot_rebuilt_on_settings_change(
+        self, pizza_bisou_kg_file_path, tmp_path
+    ) -> None:
+        snapshot_path = tmp_path / "pizza.snapshot"
+        self.build_loader(pizza_bisou_kg_file_path, snapshot_path)()
+        en_fingerprint = read_snapshot_header(snapshot_path)["metadata"]["fingerprint"]
+
+        fr_graph_loader = self.build_loader(
+            pizza_bisou_kg_file_path, snapshot_path, lang_filter_tag="fr"
+        )
+        fr_kg_instance = fr_graph_loader()
+
+        assert fr_graph_loader._kg_loaded is True
+        assert fr_kg_instance.kg is not None
+        assert read_snapshot_header(snapshot_path)["metadata"]["fingerprint"] == (
+            fr_graph_loader.snapshot_fingerprint()
+        )
+        assert fr_graph_loader.snapshot_fingerprint() != en_fingerprint
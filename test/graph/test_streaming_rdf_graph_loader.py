@@ -0,0 +1,129 @@
+import gzip
+import os.path
+from os import PathLike
+
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef
+
+from buzz_el.graph import KnowledgeGraph, RDFGraphLoader, StreamingRDFGraphLoader
+
+LABEL_PROPERTIES = {"rdfs:label", "http://www.w3.org/2004/02/skos/core#altLabel"}
+
+
+@pytest.fixture(scope="module")
+def pizza_bisou_nt_file_path(pizza_bisou_kg_file_path, tmp_path_factory) -> PathLike:
+    graph = Graph()
+    graph.parse(pizza_bisou_kg_file_path)
+    file_path = os.path.join(tmp_path_factory.mktemp("kg"), "pizzas_bisou_sample.nt")
+    graph.serialize(file_path, format="nt", encoding="utf-8")
+
+    return file_path
+
+
+@pytest.fixture(scope="module")
+def pizza_bisou_nq_gz_file_path(pizza_bisou_kg_file_path, tmp_path_factory) -> PathLike:
+    graph = ConjunctiveGraph()
+    graph.get_context(URIRef("http://example.org/graph")).parse(
+        pizza_bisou_kg_file_path
+    )
+    file_path = os.path.join(tmp_path_factory.mktemp("kg"), "pizzas_bisou_sample.nq.gz")
+    with gzip.open(file_path, "wb") as kg_file:
+        kg_file.write(graph.serialize(format="nquads", encoding="utf-8"))
+
+    return file_path
+
+
+def pattern_pairs(patterns) -> set:
+    return {(pattern["pattern"], pattern["id"]) for pattern in patterns}
+
+
+def context_words(context_index) -> dict:
+    return {
+        ent_uri: set(context_string.split(" "))
+        for ent_uri, context_string in context_index.items()
+    }
+
+
+class TestStreamingRDFGraphLoader:
+    def test_resolve_properties(self) -> None:
+        assert StreamingRDFGraphLoader._resolve_properties(LABEL_PROPERTIES) == {
+            "<http://www.w3.org/2000/01/rdf-schema#label>",
+            "<http://www.w3.org/2004/02/skos/core#altLabel>",
+        }
+        with pytest.raises(ValueError):
+            StreamingRDFGraphLoader._resolve_properties({"unknown:label"})
+
+    def test_matches_rdf_graph_loader_with_context_properties(
+        self, pizza_bisou_kg_file_path, pizza_bisou_nt_file_path
+    ) -> None:
+        settings = {
+            "label_properties": LABEL_PROPERTIES,
+            "context_properties": {"rdfs:comment"},
+            "lang_filter_tag": "en",
+        }
+        rdf_graph_loader = RDFGraphLoader(pizza_bisou_kg_file_path, **settings)
+        streaming_graph_loader = StreamingRDFGraphLoader(
+            pizza_bisou_nt_file_path, **settings
+        )
+
+        assert streaming_graph_loader.kg is None
+        assert pattern_pairs(streaming_graph_loader.build_patterns()) == pattern_pairs(
+            rdf_graph_loader.build_patterns()
+        )
+        assert streaming_graph_loader.context_index == (
+            rdf_graph_loader.build_context_index()
+        )
+
+    def test_matches_rdf_graph_loader_with_label_contexts(
+        self, pizza_bisou_kg_file_path, pizza_bisou_nq_gz_file_path
+    ) -> None:
+        rdf_graph_loader = RDFGraphLoader(pizza_bisou_kg_file_path)
+        streaming_graph_loader = StreamingRDFGraphLoader(pizza_bisou_nq_gz_file_path)
+
+        assert pattern_pairs(streaming_graph_loader.build_patterns()) == pattern_pairs(
+            rdf_graph_loader.build_patterns()
+        )
+        assert context_words(streaming_graph_loader.context_index) == context_words(
+            rdf_graph_loader.build_context_index()
+        )
+
+    def test_build_knowledge_graph(self, pizza_bisou_nt_file_path) -> None:
+        kg_instance = StreamingRDFGraphLoader(
+            pizza_bisou_nt_file_path, lang_filter_tag="en"
+        )()
+
+        assert isinstance(kg_instance, KnowledgeGraph)
+        assert kg_instance.kg is None
+        assert {
+            "label": "KG_ENT",
+            "pattern": "honey",
+            "id": "http://www.msesboue.org/o/pizza-data-demo/bisou#_honey",
+        } in kg_instance.entity_patterns
+        context_string = kg_instance.get_context(
+            "http://www.msesboue.org/o/pizza-data-demo/bisou#_burraTadah"
+        )
+        assert "pork pizza" in context_string
+        assert "pizza au porc" not in context_string
+        assert kg_instance.get_context("http://unknown.org/entity") == ""
+
+    def test_label_contexts_with_blank_nodes(self, tmp_path) -> None:
+        file_path = tmp_path / "blank_nodes.nt"
+        file_path.write_text(
+            "<http://example.org/honey> "
+            '<http://www.w3.org/2000/01/rdf-schema#label> "honey" .\n'
+            "_:b0 <http://example.org/topping> <http://example.org/honey> .\n"
+            '_:b0 <http://www.w3.org/2000/01/rdf-schema#label> "sweet pizza" .\n'
+            "<http://example.org/pizza> <http://example.org/part> _:b0 .\n",
+            encoding="utf-8",
+        )
+        streaming_graph_loader = StreamingRDFGraphLoader(file_path)
+
+        blank_node_uri = next(
+            pattern["id"]
+            for pattern in streaming_graph_loader.build_patterns()
+            if pattern["pattern"] == "sweet pizza"
+        )
+        assert streaming_graph_loader.context_index == {
+            blank_node_uri: "honey",
+            "http://example.org/pizza": "sweet pizza",
+        }
@@ -0,0 +1,140 @@
+import pytest
+import spacy
+
+from buzz_el.disambiguator import ContextSimilarityDisambiguator
+from buzz_el.entity_matcher import has_content_word
+from buzz_el.pipeline import (
+    EntityLinkerComponent,
+    EntityMatcherComponent,
+    KnowledgeGraphComponent,
+)
+
+GOD_SAVE_THE_KING_URI = (
+    "http://www.msesboue.org/o/pizza-data-demo/bisou#_godSaveTheKing"
+)
+
+
+@pytest.fixture(scope="module")
+def kg_snapshot(tmp_path_factory, pizza_bisou_kg):
+    snapshot_path = tmp_path_factory.mktemp("kg") / "pizza_bisou.snapshot"
+    pizza_bisou_kg.to_disk(snapshot_path)
+    return snapshot_path
+
+
+def test_entity_matcher_factory(kg_snapshot) -> None:
+    nlp = spacy.blank("en")
+    entity_matcher = nlp.add_pipe("buzz_entity_matcher")
+    assert isinstance(entity_matcher, EntityMatcherComponent)
+
+    with pytest.raises(ValueError):
+        nlp("The God Save The King pizza.")
+    with pytest.raises(ValueError):
+        nlp.initialize()
+
+    entity_matcher.initialize(kg_snapshot=kg_snapshot)
+    doc = nlp("The God Save The King pizza.")
+
+    assert GOD_SAVE_THE_KING_URI in {span.id_ for span in doc.spans["string"]}
+
+
+def test_entity_linker_factory_config(kg_snapshot, pizza_bisou_en_reviews) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("buzz_entity_linker", config={"use_fuzzy": True})
+    nlp.config["initialize"]["components"]["buzz_entity_linker"] = {
+        "kg_snapshot": str(kg_snapshot)
+    }
+    nlp.initialize()
+
+    entity_linker = nlp.get_pipe("buzz_entity_linker")
+    assert isinstance(entity_linker, EntityLinkerComponent)
+    assert entity_linker.entity_linker.entity_matcher.spans_key == "fuzzy"
+
+    docs = list(nlp.pipe(pizza_bisou_en_reviews, n_process=2))
+
+    assert all(len(doc.ents) > 0 for doc in docs)
+    assert GOD_SAVE_THE_KING_URI in {ent.id_ for ent in docs[2].ents}
+
+
+def test_entity_linker_to_disk(tmp_path, kg_snapshot) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("buzz_entity_linker")
+    nlp.get_pipe("buzz_entity_linker").initialize(kg_snapshot=kg_snapshot)
+    nlp.to_disk(tmp_path / "pipeline")
+
+    loaded_nlp = spacy.load(tmp_path / "pipeline")
+    doc = loaded_nlp("The God Save The King pizza.")
+
+    assert [ent.id_ for ent in doc.ents] == [GOD_SAVE_THE_KING_URI]
+
+
+def test_entity_matcher_factory_label_normalizer(kg_snapshot) -> None:
+    nlp = spacy.blank("en")
+    entity_matcher = nlp.add_pipe(
+        "buzz_entity_matcher",
+        config={
+            "string_engine": "aho_corasick",
+            "label_normalizer": {"strip_accents": True, "fold_plurals": True},
+        },
+    )
+    entity_matcher.initialize(kg_snapshot=kg_snapshot)
+
+    doc = nlp("The God-Save-The-Kings pizza.")
+
+    assert GOD_SAVE_THE_KING_URI in {span.id_ for span in doc.spans["string"]}
+
+
+def test_knowledge_graph_component_pipe(kg_snapshot, pizza_bisou_en_reviews) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("buzz_entity_linker")
+    with pytest.raises(TypeError):
+        KnowledgeGraphComponent(nlp, "abstract")
+    with pytest.raises(ValueError):
+        list(nlp.get_pipe("buzz_entity_linker").pipe([nlp.make_doc("pizza")]))
+    nlp.get_pipe("buzz_entity_linker").initialize(kg_snapshot=kg_snapshot)
+
+    docs = list(nlp.pipe(pizza_bisou_en_reviews, batch_size=2))
+
+    single_docs = [nlp(text) for text in pizza_bisou_en_reviews]
+
+    # the default disambiguator picks a random candidate, the candidates are compared
+    assert [[span.id_ for span in doc.spans["string"]] for doc in docs] == [
+        [span.id_ for span in doc.spans["string"]] for doc in single_docs
+    ]
+    assert [len(doc.ents) for doc in docs] == [len(doc.ents) for doc in single_docs]
+
+
+def test_entity_linker_factory_registered_functions(tmp_path, kg_snapshot) -> None:
+    nlp = spacy.blank("en")
+    entity_linker = nlp.add_pipe(
+        "buzz_entity_linker",
+        config={
+            "use_fuzzy": True,
+            "hybrid": True,
+            "fuzzy_prefilter": "buzz_el.has_content_word.v1",
+            "disambiguator": "buzz_el.context_similarity_disambiguator.v1",
+        },
+    )
+    entity_linker.initialize(kg_snapshot=kg_snapshot)
+
+    assert entity_linker.entity_linker.entity_matcher.fuzzy_prefilter is (
+        has_content_word
+    )
+    assert isinstance(
+        entity_linker.entity_linker.disambiguator, ContextSimilarityDisambiguator
+    )
+    assert GOD_SAVE_THE_KING_URI in {
+        ent.id_ for ent in nlp("The God Save The King pizza.").ents
+    }
+
+    nlp.to_disk(tmp_path / "pipeline")
+    loaded_linker = spacy.load(tmp_path / "pipeline").get_pipe("buzz_entity_linker")
+    assert isinstance(
+        loaded_linker.entity_linker.disambiguator, ContextSimilarityDisambiguator
+    )
+
+    nlp = spacy.blank("en")
+    entity_linker = nlp.add_pipe(
+        "buzz_entity_linker", config={"disambiguator": "buzz_el.unknown.v1"}
+    )
+    with pytest.raises(ValueError):
+        entity_linker.initialize(kg_snapshot=kg_snapshot)